@@ -1,10 +1,10 @@
+import threading
+import time
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from truck_simulator import TruckSimulator
-from monte_carlo import MonteCarloSimulation
+
+# Cold start: pandas, Plotly and the simulation modules (NumPy) are imported
+# where they are first needed, so the sidebar and the spec table render
+# without them; prewarm_engine() loads them in the background afterwards.
 
 # Page configuration
 st.set_page_config(
@@ -14,18 +14,156 @@ st.set_page_config(
 )
 
 # Initialize session state
+# Fleet stored as {rarity: truck count}
 if 'fleet' not in st.session_state:
-    st.session_state.fleet = []
+    st.session_state.fleet = {}
 
 if 'simulation_results' not in st.session_state:
     st.session_state.simulation_results = None
     
+if 'exact_results' not in st.session_state:
+    st.session_state.exact_results = None
+    
+if 'sweep_results' not in st.session_state:
+    st.session_state.sweep_results = None
+    
+if 'optimizer_results' not in st.session_state:
+    st.session_state.optimizer_results = None
+    
+if 'simulation_run' not in st.session_state:
+    st.session_state.simulation_run = None
+    
 if 'use_repair_tool' not in st.session_state:
     st.session_state.use_repair_tool = False
     
 if 'referral_tier' not in st.session_state:
     st.session_state.referral_tier = 0
 
+@st.cache_resource
+def get_result_cache():
+    # Shared by every session; results also persist on disk across restarts
+    from result_cache import ResultCache
+    return ResultCache(max_entries=64, directory=".simulation_cache")
+
+@st.cache_resource
+def get_truck_config():
+    # Truck economics from truck_config.json (or MAVIS_TRUCK_CONFIG); stdlib only, no NumPy
+    from truck_config import read_config
+    return read_config()
+
+def percent(fraction):
+    # 0.05 -> "5%"
+    return f"{fraction * 100:g}%"
+
+@st.cache_resource
+def prewarm_engine():
+    # Once per server process, after the first page is drawn: import the simulation
+    # and plotting stacks and run a tiny simulation so the first real run starts warm
+    def warm():
+        from monte_carlo import MonteCarloSimulation
+        MonteCarloSimulation({1: 1}, seed=0).run_simulation('1_week', iterations=100)
+        import pandas
+        import plotly.express
+        import plotly.graph_objects
+    
+    thread = threading.Thread(target=warm, name="prewarm-engine", daemon=True)
+    thread.start()
+    return thread
+
+def simulation_results_from(runner, comparison):
+    # Shape a finished background run like the results the charts expect
+    if not comparison:
+        return runner.result()
+    comparison = runner.result()
+    results = comparison['benefit']
+    results['comparison_baseline'] = comparison['baseline']
+    results['profit_delta_standard_error'] = comparison['delta_standard_error']
+    if 'convergence' in comparison:
+        results['convergence'] = comparison['convergence']
+    return results
+
+def histogram_trace(results, name, probability=False, **kwargs):
+    # Bars from the precomputed histogram: the payload does not grow with the iterations
+    import plotly.graph_objects as go
+    edges = results['histogram']['bin_edges']
+    counts = results['histogram']['counts']
+    total = sum(counts)
+    return go.Bar(
+        x=[(low + high) / 2 for low, high in zip(edges[:-1], edges[1:])],
+        y=[count / total for count in counts] if probability else counts,
+        width=[high - low for low, high in zip(edges[:-1], edges[1:])],
+        name=name,
+        **kwargs
+    )
+
+def add_box_traces(fig, results, name):
+    # Box from the precomputed quartiles and whiskers, plus the capped outlier sample
+    import plotly.graph_objects as go
+    box = results['box']
+    fig.add_trace(go.Box(
+        x=[name],
+        q1=[box['q1']],
+        median=[box['median']],
+        q3=[box['q3']],
+        lowerfence=[box['lower_whisker']],
+        upperfence=[box['upper_whisker']],
+        name=name
+    ))
+    if box['outliers']:
+        fig.add_trace(go.Scatter(
+            x=[name] * len(box['outliers']),
+            y=box['outliers'],
+            mode='markers',
+            marker=dict(size=4, opacity=0.5),
+            name=f"{name} outliers ({box['outlier_count']:,})",
+            showlegend=False
+        ))
+
+def show_simulation_progress():
+    # Live partial statistics of the background run; the Abort button reruns the script
+    from simulation_runner import SimulationRunner
+    
+    runner, comparison = st.session_state.simulation_run
+    
+    if st.button("⏹️ Abort Simulation"):
+        runner.cancel()
+        st.session_state.simulation_run = None
+        st.warning("Simulation aborted.")
+        return
+    
+    progress_bar = st.progress(0.0, text="Starting simulation...")
+    stats_placeholder = st.empty()
+    while runner.running:
+        progress = runner.progress
+        if progress is not None:
+            progress_bar.progress(
+                progress['fraction'],
+                text=f"{progress['completed']:,} / {progress['iterations']:,} iterations"
+            )
+            confidence = f"{progress['confidence']:.0%} CI"
+            lines = [
+                f"**Average profit so far:** {progress['mean_profit']:.2f} RON "
+                f"({confidence}: {progress['ci_low']:.2f} – {progress['ci_high']:.2f})"
+            ]
+            if comparison and 'mean_delta' in progress:
+                lines.append(
+                    f"**Benefit improvement so far:** {progress['mean_delta']:+.2f} RON "
+                    f"({confidence}: {progress['delta_ci_low']:+.2f} – {progress['delta_ci_high']:+.2f})"
+                )
+            stats_placeholder.markdown("\n\n".join(lines))
+        time.sleep(0.25)
+    
+    st.session_state.simulation_run = None
+    if runner.status == SimulationRunner.FAILED:
+        try:
+            runner.result()
+        except Exception as error:
+            st.error(f"Simulation failed: {error}")
+        return
+    if runner.status == SimulationRunner.COMPLETED:
+        st.session_state.simulation_results = simulation_results_from(runner, comparison)
+        st.rerun()
+
 def main():
     # Referral code header
     st.markdown("""
@@ -99,16 +237,17 @@ def main():
     """)
     
     # Sidebar for truck management
+    truck_config = get_truck_config()
+    tool = truck_config['repair_tool']
+    tool_text = f"-{percent(tool['reduction'])} breakdowns x {tool['trips']} trips"
+    
     with st.sidebar:
         st.header("🔧 Fleet Management")
         
         # Truck rarity selection
         rarity_options = {
-            1: "Rarity 1 - Comfort (4 RON/trip)",
-            2: "Rarity 2 - Highline (5 RON/trip)",
-            3: "Rarity 3 - Shift (7 RON/trip)",
-            4: "Rarity 4 - Electric (9 RON/trip)",
-            5: "Rarity 5 - Autonomous (11 RON/trip)"
+            rarity: f"Rarity {rarity} - {spec['name']} ({spec['earnings_per_trip']} RON/trip)"
+            for rarity, spec in truck_config['rarities'].items()
         }
         
         selected_rarity = st.selectbox(
@@ -126,17 +265,15 @@ def main():
         
         # Referral tier
         referral_options = {
-            0: "No referral tier",
-            1: "Tier 1 (-2% breakdowns)",
-            2: "Tier 2 (-3% breakdowns)", 
-            3: "Tier 3 (-5% breakdowns)"
+            tier: f"Tier {tier} (-{percent(reduction)} breakdowns)" if tier > 0 else "No referral tier"
+            for tier, reduction in truck_config['referral_reductions'].items()
         }
         
         st.session_state.referral_tier = st.selectbox(
             "🎁 Referral Tier:",
             options=list(referral_options.keys()),
             format_func=lambda x: referral_options[x],
-            index=st.session_state.referral_tier,
+            index=list(referral_options).index(st.session_state.referral_tier),
             help="Referral tiers reduce breakdown probability for ALL trucks in your fleet."
         )
         
@@ -144,41 +281,115 @@ def main():
         st.session_state.use_repair_tool = st.checkbox(
             "🔧 Use anti-breakdown tool",
             value=st.session_state.use_repair_tool,
-            help="Reduces breakdown probability by 5% for the first 2 trips. Costs 1 RON per truck."
+            help=f"Reduces breakdown probability by {percent(tool['reduction'])} for the first "
+                 f"{tool['trips']} trips. Costs {tool['cost']} RON per truck."
         )
         
         if st.button("➡️ Add Trucks"):
-            for _ in range(quantity):
-                st.session_state.fleet.append(selected_rarity)
+            st.session_state.fleet[selected_rarity] = st.session_state.fleet.get(selected_rarity, 0) + quantity
             st.success(f"{quantity} truck(s) of rarity {selected_rarity} added!")
             st.rerun()
         
         # Fleet summary
         if st.session_state.fleet:
             st.subheader("📋 Fleet Summary")
-            fleet_summary = pd.Series(st.session_state.fleet).value_counts().sort_index()
-            
-            for rarity, count in fleet_summary.items():
+            for rarity, count in sorted(st.session_state.fleet.items()):
                 st.write(f"**Rarity {rarity}:** {count} truck(s)")
             
-            st.write(f"**Total:** {len(st.session_state.fleet)} trucks")
+            st.write(f"**Total:** {sum(st.session_state.fleet.values())} trucks")
             
             # Show active benefits
             benefits = []
             if st.session_state.referral_tier > 0:
-                tier_reductions = {1: "-2%", 2: "-3%", 3: "-5%"}
-                benefits.append(f"🎁 Tier {st.session_state.referral_tier}: {tier_reductions[st.session_state.referral_tier]} breakdowns")
+                reduction = truck_config['referral_reductions'][st.session_state.referral_tier]
+                benefits.append(f"🎁 Tier {st.session_state.referral_tier}: -{percent(reduction)} breakdowns")
             
             if st.session_state.use_repair_tool:
-                benefits.append("🔧 Tool: -5% breakdowns x 2 trips (+1 RON/truck)")
+                benefits.append(f"🔧 Tool: {tool_text} (+{tool['cost']} RON/truck)")
             
             if benefits:
                 st.success("**Active benefits:**\n\n" + "\n".join(f"• {b}" for b in benefits))
             
             if st.button("🗑️ Clear Fleet"):
-                st.session_state.fleet = []
+                if st.session_state.simulation_run is not None:
+                    st.session_state.simulation_run[0].cancel()
+                    st.session_state.simulation_run = None
+                st.session_state.fleet = {}
                 st.session_state.simulation_results = None
+                st.session_state.exact_results = None
+                st.session_state.sweep_results = None
+                st.session_state.optimizer_results = None
                 st.rerun()
+        
+        # Purchase optimizer
+        with st.expander("🛒 Purchase Optimizer"):
+            budget = st.number_input("Budget (RON):", min_value=0.0, value=1000.0, step=50.0)
+            prices = {}
+            for rarity in rarity_options:
+                price = st.number_input(f"Price of rarity {rarity} (RON, 0 = not for sale):",
+                                        min_value=0.0, value=0.0, step=10.0, key=f"price_{rarity}")
+                if price > 0:
+                    prices[rarity] = price
+            max_trucks = st.number_input("Max trucks to buy (0 = no limit):", min_value=0, value=0, step=1)
+            
+            optimizer_period = st.selectbox(
+                "Horizon:",
+                options=['1_week', '30_days', '1_year'],
+                index=1,
+                key="optimizer_period"
+            )
+            # Same keys as FleetOptimizer.OBJECTIVES (not imported until a search runs)
+            objective_labels = {
+                'expected_profit': 'Highest average profit',
+                'percentile_5': 'Highest worst-case profit (5th percentile)'
+            }
+            objective = st.radio(
+                "Objective:",
+                options=list(objective_labels),
+                format_func=lambda x: objective_labels[x]
+            )
+            
+            if st.button("🔎 Find Best Purchase", disabled=not prices):
+                with st.spinner("Searching fleet compositions..."):
+                    from fleet_optimizer import FleetOptimizer
+                    optimizer = FleetOptimizer(prices, optimizer_period, st.session_state.fleet,
+                                               st.session_state.use_repair_tool, st.session_state.referral_tier,
+                                               cache=get_result_cache())
+                    try:
+                        optimization = optimizer.optimize(budget, objective, top_k=5,
+                                                          max_trucks=int(max_trucks) or None)
+                    except ValueError as error:
+                        # Too many combinations for the budget and prices: keep the error visible
+                        optimization = None
+                        st.error(f"Purchase search failed: {error}")
+                if optimization is not None:
+                    st.session_state.optimizer_results = optimization
+                    st.rerun()
+    
+    # Display purchase optimizer results
+    if st.session_state.optimizer_results:
+        optimization = st.session_state.optimizer_results
+        st.subheader("🛒 Best Purchases")
+        st.caption(f"{optimization['screened']:,} affordable purchases screened analytically; "
+                   f"top {len(optimization['candidates'])} simulated over {optimization['time_period']}")
+        
+        import pandas as pd
+        st.dataframe(pd.DataFrame([
+            {
+                'Purchase': ", ".join(f"{quantity}× R{rarity}" for rarity, quantity in sorted(candidate['purchase'].items())) or "Nothing",
+                'Cost (RON)': candidate['cost'],
+                'Left (RON)': candidate['remaining_budget'],
+                'Average Profit': round(candidate['simulation']['mean_profit'], 2) if candidate['simulation'] else 0.0,
+                '5th Percentile': round(candidate['simulation']['percentile_5'], 2) if candidate['simulation'] else 0.0
+            }
+            for candidate in optimization['candidates']
+        ]), use_container_width=True)
+        
+        if st.button("➕ Add Best Purchase to Fleet"):
+            for rarity, quantity in optimization['best']['purchase'].items():
+                st.session_state.fleet[rarity] = st.session_state.fleet.get(rarity, 0) + quantity
+            st.session_state.optimizer_results = None
+            st.rerun()
     
     # Main content area
     if not st.session_state.fleet:
@@ -187,21 +398,23 @@ def main():
         # Display truck specifications table
         st.subheader("🔍 Truck Specifications")
         
+        specs = truck_config['rarities']
         specs_data = {
-            'Rarity': [1, 2, 3, 4, 5],
-            'RON per trip': [4, 5, 7, 9, 11],
-            'Fuel (every 2 trips)': [2, 2, 2, 1, 1],
-            'Tires (every 4 trips)': [4, 4, 4, 4, 4],
-            'Repair cost': [6, 6, 6, 10, 10],
-            'Breakdown probability (%)': [30, 26, 20, 17, 14]
+            'Rarity': list(specs),
+            'Name': [spec['name'] for spec in specs.values()],
+            'RON per trip': [spec['earnings_per_trip'] for spec in specs.values()],
+            'Fuel': [f"{spec['fuel_cost']} every {spec['fuel_frequency']} trips" for spec in specs.values()],
+            'Tires': [f"{spec['tire_cost']} every {spec['tire_frequency']} trips" for spec in specs.values()],
+            'Repair cost': [spec['repair_cost'] for spec in specs.values()],
+            'Breakdown probability (%)': [round(spec['breakdown_probability'] * 100, 2) for spec in specs.values()]
         }
         
         st.info("💡 **Available benefits:**\n\n"
                 "• **Referral tier**: Permanently reduces breakdowns for entire fleet\n"
-                "• **Anti-breakdown tool**: Reduces breakdown 5% for 2 trips (costs 1 RON/truck)")
+                f"• **Anti-breakdown tool**: Reduces breakdown {percent(tool['reduction'])} for {tool['trips']} trips "
+                f"(costs {tool['cost']} RON/truck)")
         
-        specs_df = pd.DataFrame(specs_data)
-        st.dataframe(specs_df, use_container_width=True)
+        st.dataframe(specs_data, use_container_width=True)
         
     else:
         # Simulation parameters
@@ -220,40 +433,152 @@ def main():
                 }[x]
             )
             
-            st.write("**Iterations:** 10,000")
+            adaptive = st.checkbox(
+                "🎯 Adaptive iterations",
+                value=False,
+                help="Runs in batches and stops once the 95% confidence interval is within ±0.5% of the "
+                     "average profit (or of the benefit improvement) and ±0.5 points of the positive "
+                     "profit probability. Up to 100,000 iterations."
+            )
+            iterations = 100000 if adaptive else 10000
+            if adaptive:
+                from convergence import PrecisionTarget
+                precision = PrecisionTarget()
+            else:
+                precision = None
+            
+            st.write("**Iterations:** " + ("adaptive (up to 100,000)" if adaptive else "10,000"))
             st.write("**Trips every:** 12 hours")
             
-            if st.button("▶️ Run Monte Carlo Simulation", type="primary"):
-                with st.spinner("Running simulation..."):
-                    # Execute main simulation
-                    simulator = MonteCarloSimulation(st.session_state.fleet, st.session_state.use_repair_tool, st.session_state.referral_tier)
-                    results = simulator.run_simulation(time_period, iterations=10000)
-                    st.session_state.simulation_results = results
-                    
-                    # If benefits are active, run comparative simulation without benefits
-                    if st.session_state.use_repair_tool or st.session_state.referral_tier > 0:
-                        st.text("Running comparative simulation without benefits...")
-                        simulator_baseline = MonteCarloSimulation(st.session_state.fleet, use_repair_tool=False, referral_tier=0)
-                        results_baseline = simulator_baseline.run_simulation(time_period, iterations=10000)
-                        st.session_state.simulation_results['comparison_baseline'] = results_baseline
+            if st.session_state.simulation_run is not None:
+                show_simulation_progress()
+            elif st.button("▶️ Run Monte Carlo Simulation", type="primary"):
+                from monte_carlo import MonteCarloSimulation
+                from simulation_runner import SimulationRunner
+                
+                simulator = MonteCarloSimulation(st.session_state.fleet, st.session_state.use_repair_tool, st.session_state.referral_tier,
+                                                 cache=get_result_cache())
                 
-                st.success("Simulation completed!")
+                # If benefits are active, simulate with and without benefits from the same random draws
+                comparison = st.session_state.use_repair_tool or st.session_state.referral_tier > 0
+                runner = SimulationRunner(simulator, 'run_comparison' if comparison else 'run_simulation',
+                                          time_period, iterations=iterations, precision=precision)
+                st.session_state.simulation_run = (runner, comparison)
+                st.rerun()
+            
+            if st.button("🧮 Exact Distribution (no sampling)"):
+                # Closed-form distribution: instant and without sampling error
+                from monte_carlo import MonteCarloSimulation
+                simulator = MonteCarloSimulation(st.session_state.fleet, st.session_state.use_repair_tool, st.session_state.referral_tier)
+                st.session_state.exact_results = simulator.exact_distribution(time_period)
+                st.rerun()
+            
+            if st.button("🧪 Compare All Benefit Options"):
+                # Every referral tier with and without the tool, from shared random draws
+                with st.spinner("Simulating all benefit combinations..."):
+                    from scenario_sweep import run_sweep
+                    st.session_state.sweep_results = run_sweep([st.session_state.fleet], periods=[time_period],
+                                                               cache=get_result_cache())
                 st.rerun()
         
         with col2:
             st.subheader("🚚 Your Current Fleet")
-            fleet_df = pd.DataFrame({
-                'Truck': [f"Truck {i+1}" for i in range(len(st.session_state.fleet))],
-                'Rarity': st.session_state.fleet
-            })
-            st.dataframe(fleet_df, use_container_width=True)
+            st.dataframe({
+                'Rarity': sorted(st.session_state.fleet),
+                'Trucks': [st.session_state.fleet[rarity] for rarity in sorted(st.session_state.fleet)]
+            }, use_container_width=True)
+    
+    # Display benefit sweep
+    if st.session_state.sweep_results is not None:
+        import pandas as pd
+        sweep = st.session_state.sweep_results
+        st.header("🧪 Benefit Options Compared")
+        st.caption(f"{sweep['iterations'].iloc[0]:,} iterations per option over {sweep['time_period'].iloc[0]}")
+        st.dataframe(pd.DataFrame({
+            'Referral Tier': sweep['referral_tier'],
+            'Anti-breakdown Tool': sweep['use_repair_tool'].map({True: 'Yes', False: 'No'}),
+            'Average Profit (RON)': sweep['mean_profit'].round(2),
+            'Positive Probability (%)': sweep['positive_probability'].round(2),
+            '5th Percentile (RON)': sweep['percentile_5'].round(2),
+            '95th Percentile (RON)': sweep['percentile_95'].round(2)
+        }).sort_values('Average Profit (RON)', ascending=False), use_container_width=True, hide_index=True)
+    
+    # Display exact distribution
+    if st.session_state.exact_results:
+        import plotly.graph_objects as go
+        exact = st.session_state.exact_results
+        
+        st.header("🧮 Exact Profit Distribution")
+        st.caption(f"Computed analytically for {exact['fleet_size']} trucks over {exact['time_period']} (zero sampling error)")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric(
+                "💰 Expected Profit",
+                f"{exact['mean_profit']:.2f} RON",
+                delta=f"±{exact['std_profit']:.2f}"
+            )
+        
+        with col2:
+            st.metric(
+                "🎯 Positive Profit Probability",
+                f"{exact['positive_probability']:.2f}%"
+            )
+        
+        with col3:
+            st.metric(
+                "📉 5th Percentile",
+                f"{exact['percentile_5']:.2f} RON"
+            )
+        
+        with col4:
+            st.metric(
+                "📈 95th Percentile",
+                f"{exact['percentile_95']:.2f} RON"
+            )
+        
+        fig_exact = go.Figure()
+        fig_exact.add_trace(go.Scatter(
+            x=exact['profit_values'],
+            y=exact['probabilities'],
+            mode='lines',
+            fill='tozeroy',
+            name="Exact distribution"
+        ))
+        fig_exact.add_vline(
+            x=exact['mean_profit'],
+            line_dash="dash",
+            line_color="red",
+            annotation_text="Expected"
+        )
+        fig_exact.update_layout(
+            title="Exact Profit Probability Mass Function",
+            xaxis_title="Profit (RON)",
+            yaxis_title="Probability"
+        )
+        st.plotly_chart(fig_exact, use_container_width=True)
     
     # Display results
     if st.session_state.simulation_results:
+        import pandas as pd
+        import plotly.express as px
+        import plotly.graph_objects as go
         results = st.session_state.simulation_results
         
         st.header("📈 Simulation Results")
         
+        if 'convergence' in results:
+            convergence = results['convergence']
+            st.caption(
+                f"Adaptive run: {results['iterations']:,} iterations "
+                f"({'converged' if convergence['converged'] else 'iteration limit reached'}) · "
+                f"{convergence['confidence']:.0%} CI ±{convergence['mean_half_width']:.2f} RON, "
+                f"±{convergence['probability_half_width']:.2f} pts positive probability"
+            )
+        else:
+            st.caption(f"{results['iterations']:,} iterations")
+        
         # Summary statistics
         if 'comparison_baseline' in results and (st.session_state.use_repair_tool or st.session_state.referral_tier > 0):
             st.subheader("📊 Comparison: With vs Without Benefits")
@@ -334,22 +659,11 @@ def main():
                 fig_hist_comp = go.Figure()
                 
                 # Data with benefits
-                fig_hist_comp.add_trace(go.Histogram(
-                    x=results['all_profits'],
-                    name="With benefits",
-                    opacity=0.7,
-                    nbinsx=30,
-                    histnorm='probability'
-                ))
+                fig_hist_comp.add_trace(histogram_trace(results, "With benefits", probability=True, opacity=0.7))
                 
                 # Data without benefits
-                fig_hist_comp.add_trace(go.Histogram(
-                    x=results['comparison_baseline']['all_profits'],
-                    name="Without benefits",
-                    opacity=0.7,
-                    nbinsx=30,
-                    histnorm='probability'
-                ))
+                fig_hist_comp.add_trace(histogram_trace(results['comparison_baseline'], "Without benefits",
+                                                        probability=True, opacity=0.7))
                 
                 fig_hist_comp.update_layout(
                     title="Comparison: Profit Distribution",
@@ -364,17 +678,8 @@ def main():
                 # Box plot comparativo
                 fig_box_comp = go.Figure()
                 
-                fig_box_comp.add_trace(go.Box(
-                    y=results['all_profits'],
-                    name="With benefits",
-                    boxpoints="outliers"
-                ))
-                
-                fig_box_comp.add_trace(go.Box(
-                    y=results['comparison_baseline']['all_profits'],
-                    name="Without benefits",
-                    boxpoints="outliers"
-                ))
+                add_box_traces(fig_box_comp, results, "With benefits")
+                add_box_traces(fig_box_comp, results['comparison_baseline'], "Without benefits")
                 
                 fig_box_comp.update_layout(
                     title="Comparison: Distribution Analysis",
@@ -389,11 +694,11 @@ def main():
             
             with col1:
                 # Profit distribution histogram
-                fig_hist = px.histogram(
-                    x=results['all_profits'],
-                    nbins=50,
+                fig_hist = go.Figure(histogram_trace(results, "Profit Distribution"))
+                fig_hist.update_layout(
                     title="Profit Distribution",
-                    labels={'x': 'Profit (RON)', 'y': 'Frequency'}
+                    xaxis_title="Profit (RON)",
+                    yaxis_title="Frequency"
                 )
                 fig_hist.add_vline(
                     x=results['mean_profit'],
@@ -406,11 +711,7 @@ def main():
             with col2:
                 # Box plot
                 fig_box = go.Figure()
-                fig_box.add_trace(go.Box(
-                    y=results['all_profits'],
-                    name="Profit Distribution",
-                    boxpoints="outliers"
-                ))
+                add_box_traces(fig_box, results, "Profit Distribution")
                 fig_box.update_layout(
                     title="Distribution Analysis",
                     yaxis_title="Profit (RON)"
@@ -450,15 +751,15 @@ def main():
                 st.subheader("📈 Benefits Effectiveness")
                 
                 comparison = results['comparison_baseline']
-                tool_cost = len(st.session_state.fleet) * 1 if st.session_state.use_repair_tool else 0  # 1 RON por camión
+                tool_cost = sum(st.session_state.fleet.values()) * tool['cost'] if st.session_state.use_repair_tool else 0
                 
                 # Calculate active benefits
                 benefits_text = []
                 if st.session_state.referral_tier > 0:
-                    tier_reductions = {1: "2%", 2: "3%", 3: "5%"}
-                    benefits_text.append(f"Tier {st.session_state.referral_tier}: -{tier_reductions[st.session_state.referral_tier]} permanent breakdown reduction")
+                    reduction = truck_config['referral_reductions'][st.session_state.referral_tier]
+                    benefits_text.append(f"Tier {st.session_state.referral_tier}: -{percent(reduction)} permanent breakdown reduction")
                 if st.session_state.use_repair_tool:
-                    benefits_text.append("Tool: -5% breakdowns x 2 trips")
+                    benefits_text.append(f"Tool: {tool_text}")
                 
                 effectiveness_data = {
                     'Metric': [
@@ -470,7 +771,7 @@ def main():
                     ],
                     'Value': [
                         f"{tool_cost}",
-                        f"{results['mean_profit'] - comparison['mean_profit']:.2f}",
+                        f"{results['mean_profit'] - comparison['mean_profit']:.2f} ± {1.96 * results.get('profit_delta_standard_error', 0):.2f} (95% CI)",
                         f"{((results['mean_profit'] - comparison['mean_profit']) / tool_cost * 100):.1f}%" if tool_cost > 0 else "Free" if len(benefits_text) > 0 else "N/A",
                         "; ".join(benefits_text) if benefits_text else "None",
                         f"{results['positive_probability'] - comparison['positive_probability']:.1f}%"
@@ -509,8 +810,8 @@ def main():
                     f"{results['positive_probability']:.2f}%",
                     f"{comparison['positive_probability']:.2f}%",
                     f"{results['positive_probability'] - comparison['positive_probability']:.2f}%",
-                    f"{len(st.session_state.fleet) if st.session_state.use_repair_tool else 0} RON",
-                    f"{((results['mean_profit'] - comparison['mean_profit']) / max(len(st.session_state.fleet) if st.session_state.use_repair_tool else 1, 1) * 100):.1f}%"
+                    f"{sum(st.session_state.fleet.values()) * tool['cost'] if st.session_state.use_repair_tool else 0} RON",
+                    f"{((results['mean_profit'] - comparison['mean_profit']) / max(sum(st.session_state.fleet.values()) * tool['cost'] if st.session_state.use_repair_tool else 1, 1) * 100):.1f}%"
                 ]
             })
         else:
@@ -542,3 +843,4 @@ def main():
 
 if __name__ == "__main__":
     main()
+    prewarm_engine()
@@ -0,0 +1,301 @@
+"""
+Ejecutor de simulaciones por lotes sin interfaz gráfica
+
+Lee escenarios JSONL (un objeto por línea) de un archivo o de la entrada
+estándar y escribe un resultado por escenario, en el mismo orden, a medida
+que terminan:
+
+    python batch_runner.py escenarios.jsonl -o resultados.jsonl --workers 4
+    cat escenarios.jsonl | python batch_runner.py - --format parquet -o resultados.parquet
+
+Campos de cada escenario (solo fleet es obligatorio):
+    fleet: lista de rarezas o {rareza: cantidad}
+    referral_tier (o tier), use_repair_tool (o tool), time_period (o period),
+    iterations, seed, engine, sampler, id
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from monte_carlo import MonteCarloSimulation
+import samplers
+
+# Nombres cortos aceptados en la entrada
+FIELD_ALIASES = {
+    'tier': 'referral_tier',
+    'tool': 'use_repair_tool',
+    'period': 'time_period'
+}
+
+# Columnas de salida (además de MonteCarloSimulation.SUMMARY_FIELDS)
+SCENARIO_FIELDS = ('id', 'fleet', 'fleet_size', 'use_repair_tool', 'referral_tier', 'time_period', 'engine',
+                   'sampler')
+
+# Opciones de la línea de comandos que actúan como valores por defecto de los escenarios
+DEFAULT_FIELDS = ('referral_tier', 'use_repair_tool', 'time_period', 'iterations', 'seed', 'engine', 'sampler')
+
+# Filas acumuladas antes de escribir un grupo de filas Parquet
+PARQUET_BATCH_ROWS = 1000
+
+
+def parse_scenario(line, defaults):
+    """
+    Convertir una línea JSONL en los parámetros de una simulación
+
+    Args:
+        line (str): Objeto JSON del escenario
+        defaults (dict): Valores por defecto de la línea de comandos
+
+    Returns:
+        dict: Escenario normalizado
+    """
+    raw = json.loads(line)
+    if not isinstance(raw, dict):
+        raise ValueError("Cada línea debe ser un objeto JSON")
+
+    scenario = dict(defaults)
+    for name, value in raw.items():
+        scenario[FIELD_ALIASES.get(name, name)] = value
+
+    if 'fleet' not in scenario:
+        raise ValueError("El escenario debe incluir la flota ('fleet')")
+    if scenario['seed'] is None:
+        # Semilla explícita para que cada fila se pueda reproducir
+        scenario['seed'] = random.getrandbits(63)
+    return scenario
+
+
+def run_scenario(scenario):
+    """
+    Ejecutar un escenario (nivel de módulo para poder enviarlo a otro proceso)
+
+    Args:
+        scenario (dict): Escenario normalizado por parse_scenario
+
+    Returns:
+        dict: Fila de resultados (con 'error' si el escenario no es válido)
+    """
+    row = {field: scenario.get(field) for field in SCENARIO_FIELDS}
+    row.update({field: None for field in MonteCarloSimulation.SUMMARY_FIELDS})
+    row['seed'] = scenario.get('seed')
+    row['error'] = None
+
+    try:
+        simulation = MonteCarloSimulation(
+            scenario['fleet'], bool(scenario['use_repair_tool']), int(scenario['referral_tier']),
+            engine=scenario['engine'], seed=scenario['seed'], sampler=scenario['sampler']
+        )
+        row['fleet'] = MonteCarloSimulation.fleet_label(simulation.fleet_counts)
+        row['fleet_size'] = simulation.fleet_size
+
+        results = simulation.run_simulation(scenario['time_period'], iterations=int(scenario['iterations']))
+        row.update({field: results[field] for field in MonteCarloSimulation.SUMMARY_FIELDS})
+    except (ValueError, TypeError, KeyError) as error:
+        row['error'] = str(error)
+    return row
+
+
+class JsonlWriter:
+    """Escritor de filas JSONL (una línea por resultado, volcada al terminar)"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, row):
+        self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def close(self):
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class ParquetWriter:
+    """Escritor Parquet por grupos de filas (requiere pyarrow)"""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Se necesita pyarrow para escribir Parquet (pip install pyarrow)")
+
+        self.pa = pa
+        string_fields = ('id', 'fleet', 'time_period', 'engine', 'sampler', 'error')
+        integer_fields = ('fleet_size', 'referral_tier', 'iterations', 'seed')
+        fields = []
+        for name in SCENARIO_FIELDS + MonteCarloSimulation.SUMMARY_FIELDS + ('error',):
+            if name in string_fields:
+                fields.append(pa.field(name, pa.string()))
+            elif name in integer_fields:
+                fields.append(pa.field(name, pa.int64()))
+            elif name == 'use_repair_tool':
+                fields.append(pa.field(name, pa.bool_()))
+            else:
+                fields.append(pa.field(name, pa.float64()))
+        self.schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.rows = []
+
+    def write(self, row):
+        row = dict(row)
+        if row['id'] is not None:
+            row['id'] = str(row['id'])
+        self.rows.append(row)
+        if len(self.rows) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self.rows:
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+def _scenarios(stream, defaults):
+    """Leer escenarios línea a línea; las líneas inválidas se marcan para devolver una fila de error"""
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield parse_scenario(line, defaults)
+        except ValueError as error:
+            yield {'id': f"line {number}", 'invalid': str(error)}
+
+
+def _run_or_reject(scenario):
+    """Ejecutar un escenario o devolver la fila de error de una línea inválida"""
+    if 'invalid' in scenario:
+        row = {field: scenario.get(field) for field in SCENARIO_FIELDS}
+        row.update({field: None for field in MonteCarloSimulation.SUMMARY_FIELDS})
+        row['error'] = scenario['invalid']
+        return row
+    return run_scenario(scenario)
+
+
+def run_batch(stream, writer, workers=1, defaults=None):
+    """
+    Ejecutar todos los escenarios de un flujo y escribir sus resultados en orden
+
+    Con varios procesos se mantienen como máximo 2 × workers escenarios en
+    curso, así que la entrada se consume a medida que se escriben resultados.
+
+    Args:
+        stream: Flujo de texto con un escenario JSON por línea
+        writer: JsonlWriter o ParquetWriter
+        workers (int): Procesos en paralelo (1 ejecuta en el proceso actual)
+        defaults (dict): Valores por defecto de los escenarios
+
+    Returns:
+        dict: Escenarios, iteraciones, errores, tiempo y rendimiento
+    """
+    if defaults is None:
+        arguments = build_parser().parse_args([])
+        defaults = {name: getattr(arguments, name) for name in DEFAULT_FIELDS}
+
+    scenarios = _scenarios(stream, defaults)
+    start = time.perf_counter()
+    count = iterations = failed = 0
+
+    def record(row):
+        nonlocal count, iterations, failed
+        writer.write(row)
+        count += 1
+        if row['error'] is None:
+            iterations += row['iterations']
+        else:
+            failed += 1
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for scenario in scenarios:
+                pending.append(executor.submit(_run_or_reject, scenario))
+                if len(pending) >= 2 * workers:
+                    record(pending.popleft().result())
+            while pending:
+                record(pending.popleft().result())
+    else:
+        for scenario in scenarios:
+            record(_run_or_reject(scenario))
+
+    elapsed = time.perf_counter() - start
+    return {
+        'scenarios': count,
+        'failed': failed,
+        'iterations': iterations,
+        'elapsed_seconds': elapsed,
+        'workers': workers,
+        'scenarios_per_second': count / elapsed if elapsed > 0 else 0.0,
+        'iterations_per_second': iterations / elapsed if elapsed > 0 else 0.0,
+        'iterations_per_second_per_process': iterations / elapsed / workers if elapsed > 0 else 0.0
+    }
+
+
+def build_parser():
+    """Analizador de argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Run Mavis Road Monte Carlo scenarios from JSONL without the web interface."
+    )
+    parser.add_argument('input', nargs='?', default='-', help="Scenario JSONL file ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='-', help="Output file ('-' for stdout, JSONL only)")
+    parser.add_argument('--format', choices=('jsonl', 'parquet'), default=None,
+                        help="Output format (default: from the output extension, else jsonl)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--iterations', type=int, default=10000, help="Default iterations per scenario")
+    parser.add_argument('--time-period', dest='time_period', default='30_days',
+                        choices=list(MonteCarloSimulation.TIME_PERIODS), help="Default period")
+    parser.add_argument('--referral-tier', dest='referral_tier', type=int, default=0, help="Default referral tier")
+    parser.add_argument('--repair-tool', dest='use_repair_tool', action='store_true', help="Use the tool by default")
+    parser.add_argument('--engine', default='vectorized', choices=MonteCarloSimulation.ENGINES, help="Default engine")
+    parser.add_argument('--sampler', default='pseudo', choices=samplers.SAMPLERS,
+                        help="Default sampler (all need --engine binomial except pseudo and antithetic)")
+    parser.add_argument('--seed', type=int, default=None, help="Default seed (random per scenario if omitted)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    output_format = args.format or ('parquet' if args.output.endswith('.parquet') else 'jsonl')
+
+    if output_format == 'parquet':
+        if args.output == '-':
+            print("Parquet output needs a file (-o results.parquet)", file=sys.stderr)
+            return 2
+        try:
+            writer = ParquetWriter(args.output)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 2
+    else:
+        writer = JsonlWriter(sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8'))
+
+    stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    defaults = {name: getattr(args, name) for name in DEFAULT_FIELDS}
+    try:
+        summary = run_batch(stream, writer, max(1, args.workers), defaults)
+    finally:
+        writer.close()
+        if stream is not sys.stdin:
+            stream.close()
+
+    print(
+        f"{summary['scenarios']} scenarios ({summary['failed']} failed), "
+        f"{summary['iterations']:,} iterations in {summary['elapsed_seconds']:.2f} s: "
+        f"{summary['scenarios_per_second']:.1f} scenarios/s, "
+        f"{summary['iterations_per_second']:,.0f} iterations/s "
+        f"({summary['iterations_per_second_per_process']:,.0f} per process, {summary['workers']} workers)",
+        file=sys.stderr
+    )
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,492 @@
+"""
+Benchmarks de los caminos críticos de la simulación
+
+    python benchmark.py run -o bench.json            # rendimiento + equivalencia estadística
+    python benchmark.py run --quick -o bench.json    # presupuestos 10 veces menores
+    python benchmark.py compare base.json bench.json # regresiones entre dos commits
+    python benchmark.py check                        # solo equivalencia estadística
+    python benchmark.py startup -o startup.json      # tiempo de importación en frío
+
+Cada caso registra tiempo total, viajes/s, iteraciones/s y memoria máxima
+(tracemalloc, en una segunda pasada para no perturbar el cronometraje).
+"""
+import argparse
+import ast
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from statistics import median
+import numpy as np
+from truck_simulator import TruckSimulator
+import truck_economics
+from monte_carlo import MonteCarloSimulation
+
+FLEET_SIZES = (1, 10, 100, 1000)
+
+# Combinaciones de beneficios (use_repair_tool, referral_tier)
+BENEFITS = ((False, 0), (True, 0), (False, 3), (True, 3))
+
+# Viajes simulados por caso y motor (fija el número de iteraciones de cada caso)
+TRIP_BUDGETS = {
+    'vectorized': 5 * 10 ** 7,
+    'binomial': 5 * 10 ** 8,
+    'reference': 2 * 10 ** 6
+}
+
+# Viajes de las pruebas unitarias de simulate_trip y simulate_single_run
+MICRO_TRIP_BUDGET = 10 ** 6
+
+MAX_ITERATIONS = 100000
+
+# Nivel de significación de las pruebas de equivalencia
+EQUIVALENCE_ALPHA = 0.001
+
+# Módulos cuyo arranque en frío mide `startup` ('app' son las importaciones de
+# nivel superior de app.py: lo que se carga antes de dibujar la primera página)
+STARTUP_MODULES = ('app', 'monte_carlo', 'simulation_runner', 'fleet_optimizer', 'scenario_sweep',
+                   'streamlit', 'pandas', 'plotly.express', 'plotly.graph_objects')
+
+# Paquetes más pesados que se listan por módulo
+STARTUP_TOP_PACKAGES = 8
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def fleet_of_size(size):
+    """Flota mixta de `size` camiones repartidos entre las rarezas de la configuración"""
+    rarities = list(truck_economics.ECONOMICS.rarities)
+    counts = {rarity: size // len(rarities) for rarity in rarities}
+    for rarity in rarities[:size % len(rarities)]:
+        counts[rarity] += 1
+    return {rarity: count for rarity, count in counts.items() if count > 0}
+
+
+def _measure(function, memory=True):
+    """
+    Medir tiempo y, opcionalmente, memoria máxima de una llamada
+
+    Returns:
+        dict: wall_seconds y peak_memory_bytes (None sin medición de memoria)
+    """
+    start = time.perf_counter()
+    function()
+    wall = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {'wall_seconds': wall, 'peak_memory_bytes': peak}
+
+
+def _case(kind, engine, fleet_size, time_period, use_repair_tool, referral_tier, iterations, trips, measurement):
+    """Registro de un caso con sus métricas de rendimiento"""
+    wall = measurement['wall_seconds']
+    return {
+        'id': (f"{kind}/engine={engine}/fleet={fleet_size}/period={time_period}"
+               f"/tool={int(use_repair_tool)}/tier={referral_tier}"),
+        'kind': kind,
+        'engine': engine,
+        'fleet_size': fleet_size,
+        'time_period': time_period,
+        'use_repair_tool': use_repair_tool,
+        'referral_tier': referral_tier,
+        'iterations': iterations,
+        'trips': trips,
+        'wall_seconds': wall,
+        'trips_per_second': trips / wall if wall > 0 else math.inf,
+        'iterations_per_second': iterations / wall if wall > 0 else math.inf,
+        'peak_memory_bytes': measurement['peak_memory_bytes']
+    }
+
+
+def benchmark_trip(benefits, budget_scale=1.0, memory=True):
+    """Viajes por segundo de TruckSimulator.simulate_trip"""
+    cases = []
+    trips = max(1, int(MICRO_TRIP_BUDGET * budget_scale))
+    for use_repair_tool, referral_tier in benefits:
+        def run():
+            truck = TruckSimulator(3, use_repair_tool, referral_tier, seed=0)
+            for _ in range(trips):
+                truck.simulate_trip()
+
+        cases.append(_case('simulate_trip', 'reference', 1, None, use_repair_tool, referral_tier,
+                           trips, trips, _measure(run, memory)))
+    return cases
+
+
+def benchmark_single_run(sizes, periods, benefits, budget_scale=1.0, memory=True):
+    """Iteraciones por segundo de MonteCarloSimulation.simulate_single_run"""
+    cases = []
+    for size in sizes:
+        for time_period in periods:
+            trips_per_run = size * (MonteCarloSimulation.TIME_PERIODS[time_period] // 12)
+            runs = max(1, int(MICRO_TRIP_BUDGET * budget_scale) // trips_per_run)
+            for use_repair_tool, referral_tier in benefits:
+                simulation = MonteCarloSimulation(fleet_of_size(size), use_repair_tool, referral_tier)
+                hours = MonteCarloSimulation.TIME_PERIODS[time_period]
+
+                def run():
+                    rng = np.random.default_rng(0)
+                    for _ in range(runs):
+                        simulation.simulate_single_run(hours, rng)
+
+                cases.append(_case('simulate_single_run', 'reference', size, time_period, use_repair_tool,
+                                   referral_tier, runs, runs * trips_per_run, _measure(run, memory)))
+    return cases
+
+
+def benchmark_run_simulation(engines, sizes, periods, benefits, budget_scale=1.0, memory=True):
+    """Rendimiento de run_simulation por motor, tamaño de flota, período y beneficios"""
+    cases = []
+    for engine in engines:
+        for size in sizes:
+            for time_period in periods:
+                trips_per_iteration = size * (MonteCarloSimulation.TIME_PERIODS[time_period] // 12)
+                iterations = int(TRIP_BUDGETS[engine] * budget_scale) // trips_per_iteration
+                iterations = min(max(iterations, 1), MAX_ITERATIONS)
+                for use_repair_tool, referral_tier in benefits:
+                    simulation = MonteCarloSimulation(
+                        fleet_of_size(size), use_repair_tool, referral_tier, engine=engine, seed=0
+                    )
+                    measurement = _measure(
+                        lambda: simulation.run_simulation(time_period, iterations=iterations), memory
+                    )
+                    cases.append(_case('run_simulation', engine, size, time_period, use_repair_tool,
+                                       referral_tier, iterations, iterations * trips_per_iteration, measurement))
+    return cases
+
+
+def _kolmogorov_p_value(statistic, effective_n):
+    """p-valor asintótico de Kolmogorov-Smirnov (conservador con datos discretos)"""
+    if statistic <= 0:
+        return 1.0
+    root = math.sqrt(effective_n)
+    scaled = (root + 0.12 + 0.11 / root) * statistic
+    total = sum((-1) ** (k - 1) * math.exp(-2 * k * k * scaled * scaled) for k in range(1, 101))
+    return float(min(max(2 * total, 0.0), 1.0))
+
+
+def ks_two_sample(a, b):
+    """
+    Prueba de Kolmogorov-Smirnov de dos muestras
+
+    Returns:
+        tuple: (estadístico D, p-valor)
+    """
+    a = np.sort(np.asarray(a, dtype=float))
+    b = np.sort(np.asarray(b, dtype=float))
+    support = np.union1d(a, b)
+    cdf_a = np.searchsorted(a, support, side='right') / len(a)
+    cdf_b = np.searchsorted(b, support, side='right') / len(b)
+    statistic = float(np.abs(cdf_a - cdf_b).max())
+    return statistic, _kolmogorov_p_value(statistic, len(a) * len(b) / (len(a) + len(b)))
+
+
+def ks_exact(samples, values, probabilities):
+    """
+    Prueba de Kolmogorov-Smirnov de una muestra contra una distribución discreta exacta
+
+    Returns:
+        tuple: (estadístico D, p-valor)
+    """
+    samples = np.sort(np.asarray(samples, dtype=float))
+    values = np.asarray(values, dtype=float)
+    cdf = np.cumsum(probabilities) / np.sum(probabilities)
+    empirical = np.searchsorted(samples, values, side='right') / len(samples)
+    statistic = float(np.abs(empirical - cdf).max())
+    return statistic, _kolmogorov_p_value(statistic, len(samples))
+
+
+def equivalence_checks(size=10, periods=('1_week', '30_days'), benefits=BENEFITS,
+                       reference_iterations=2000, fast_iterations=50000, seed=0):
+    """
+    Comprobar que los motores rápidos reproducen la distribución del motor de referencia
+
+    Para cada configuración: KS de cada motor contra la distribución exacta
+    y KS de dos muestras entre cada motor rápido y el de referencia.
+
+    Returns:
+        list: Una comprobación por configuración y motor, con estadístico, p-valor y si pasa
+    """
+    checks = []
+    fleet = fleet_of_size(size)
+    configurations = [(time_period, benefit) for time_period in periods for benefit in benefits]
+    for index, (time_period, (use_repair_tool, referral_tier)) in enumerate(configurations):
+        # Semilla distinta por configuración: con la misma, todas compartirían los mismos sorteos
+        config_seed = seed + index
+        exact = MonteCarloSimulation(fleet, use_repair_tool, referral_tier).exact_distribution(time_period)
+        samples = {}
+        for engine in MonteCarloSimulation.ENGINES:
+            iterations = reference_iterations if engine == 'reference' else fast_iterations
+            simulation = MonteCarloSimulation(fleet, use_repair_tool, referral_tier, engine=engine, seed=config_seed)
+            samples[engine] = simulation.run_simulation(
+                time_period, iterations=iterations, keep_samples=True
+            )['all_profits']
+
+        for engine in MonteCarloSimulation.ENGINES:
+            tests = [('exact', ks_exact(samples[engine], exact['profit_values'], exact['probabilities']))]
+            if engine != 'reference':
+                tests.append(('reference', ks_two_sample(samples[engine], samples['reference'])))
+            for against, (statistic, p_value) in tests:
+                checks.append({
+                    'engine': engine,
+                    'against': against,
+                    'fleet_size': size,
+                    'time_period': time_period,
+                    'use_repair_tool': use_repair_tool,
+                    'referral_tier': referral_tier,
+                    'ks_statistic': statistic,
+                    'p_value': p_value,
+                    'passed': p_value > EQUIVALENCE_ALPHA
+                })
+    return checks
+
+
+def _top_level_imports(path):
+    """Módulos importados en el nivel superior de un script"""
+    with open(path, encoding='utf-8') as file:
+        tree = ast.parse(file.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def _import_times(statement):
+    """
+    Ejecutar `statement` en un intérprete nuevo con python -X importtime
+
+    Returns:
+        list: (paquete, tiempo propio en µs, tiempo acumulado en µs, profundidad) por importación
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                               capture_output=True, text=True, cwd=ROOT)
+    lines = completed.stderr.splitlines()
+    if completed.returncode != 0:
+        raise ImportError(lines[-1] if lines else f"{statement} failed")
+
+    rows = []
+    for line in lines:
+        if not line.startswith('import time:') or line.endswith('imported package'):
+            continue
+        own, cumulative, package = line[len('import time:'):].split('|')
+        depth = (len(package) - len(package.lstrip()) - 1) // 2
+        rows.append((package.strip(), int(own), int(cumulative), depth))
+    return rows
+
+
+def startup_times(modules=STARTUP_MODULES, repeat=5):
+    """
+    Tiempo de importación en frío de cada módulo (un intérprete nuevo por medición)
+
+    Se descuentan las importaciones del propio arranque del intérprete (site,
+    encodings...), medidas con un programa vacío.
+
+    Args:
+        modules (iterable): Módulos a importar ('app' mide las importaciones de app.py)
+        repeat (int): Mediciones por módulo
+
+    Returns:
+        list: Por módulo, mediana y mínimo en ms y paquetes más pesados (o el error)
+    """
+    interpreter = {package for package, _, _, _ in _import_times('pass')}
+    results = []
+    for module in modules:
+        if module == 'app':
+            statement = 'import ' + ', '.join(_top_level_imports(os.path.join(ROOT, 'app.py')))
+        else:
+            statement = f'import {module}'
+        try:
+            runs = [_import_times(statement) for _ in range(repeat)]
+        except ImportError as error:
+            results.append({'module': module, 'statement': statement, 'error': str(error)})
+            continue
+
+        totals = [
+            sum(cumulative for package, _, cumulative, depth in run if depth == 0 and package not in interpreter)
+            for run in runs
+        ]
+        # Tiempo propio por paquete raíz en la medición mediana
+        run = runs[sorted(range(repeat), key=totals.__getitem__)[repeat // 2]]
+        packages = {}
+        for package, own, _, _ in run:
+            if package not in interpreter:
+                root = package.split('.')[0]
+                packages[root] = packages.get(root, 0) + own
+        heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:STARTUP_TOP_PACKAGES]
+        results.append({
+            'module': module,
+            'statement': statement,
+            'import_ms': median(totals) / 1000,
+            'min_import_ms': min(totals) / 1000,
+            'packages_ms': {package: own / 1000 for package, own in heaviest}
+        })
+    return results
+
+
+def _metadata():
+    """Versión del código y del entorno en que se midió"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform()
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Comparar dos informes de benchmark caso a caso
+
+    Args:
+        baseline (dict): Informe de referencia
+        current (dict): Informe nuevo
+        threshold (float): Pérdida relativa de rendimiento considerada regresión
+
+    Returns:
+        list: Por caso común, rendimiento relativo (>1 es más rápido) y si es regresión
+    """
+    base_cases = {case['id']: case for case in baseline.get('cases', [])}
+    rows = []
+    for case in current.get('cases', []):
+        base = base_cases.get(case['id'])
+        if base is None:
+            continue
+        ratio = case['trips_per_second'] / base['trips_per_second'] if base['trips_per_second'] else math.nan
+        memory_ratio = None
+        if case['peak_memory_bytes'] and base['peak_memory_bytes']:
+            memory_ratio = case['peak_memory_bytes'] / base['peak_memory_bytes']
+        rows.append({
+            'id': case['id'],
+            'speedup': ratio,
+            'memory_ratio': memory_ratio,
+            'regression': ratio < 1 - threshold
+        })
+
+    # Arranque en frío: el mínimo de las mediciones es el valor menos ruidoso
+    base_startup = {entry['module']: entry for entry in baseline.get('startup', []) if 'error' not in entry}
+    for entry in current.get('startup', []):
+        base = base_startup.get(entry['module'])
+        if base is None or 'error' in entry:
+            continue
+        ratio = base['min_import_ms'] / entry['min_import_ms'] if entry['min_import_ms'] else math.nan
+        rows.append({
+            'id': f"startup/{entry['module']}",
+            'speedup': ratio,
+            'memory_ratio': None,
+            'regression': ratio < 1 - threshold
+        })
+    return rows
+
+
+def build_parser():
+    """Analizador de argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Benchmarks for the Mavis Road simulation hot paths.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help="Run the benchmark suite")
+    run.add_argument('-o', '--output', default='-', help="JSON report ('-' for stdout)")
+    run.add_argument('--quick', action='store_true', help="10x smaller trip budgets")
+    run.add_argument('--engines', nargs='+', default=list(MonteCarloSimulation.ENGINES),
+                     choices=MonteCarloSimulation.ENGINES)
+    run.add_argument('--sizes', nargs='+', type=int, default=list(FLEET_SIZES))
+    run.add_argument('--periods', nargs='+', default=list(MonteCarloSimulation.TIME_PERIODS),
+                     choices=list(MonteCarloSimulation.TIME_PERIODS))
+    run.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    run.add_argument('--no-checks', action='store_true', help="Skip the statistical equivalence checks")
+
+    check = subparsers.add_parser('check', help="Run only the statistical equivalence checks")
+    check.add_argument('-o', '--output', default='-', help="JSON report ('-' for stdout)")
+
+    startup = subparsers.add_parser('startup', help="Measure cold import time of the app and simulation modules")
+    startup.add_argument('-o', '--output', default='-', help="JSON report ('-' for stdout)")
+    startup.add_argument('--modules', nargs='+', default=list(STARTUP_MODULES),
+                         help="Modules to import ('app' = the top-level imports of app.py)")
+    startup.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per module")
+
+    compare_parser = subparsers.add_parser('compare', help="Compare two benchmark reports")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="Relative throughput loss reported as a regression")
+    return parser
+
+
+def _write(report, output):
+    text = json.dumps(report, indent=2)
+    if output == '-':
+        print(text)
+    else:
+        with open(output, 'w', encoding='utf-8') as file:
+            file.write(text + "\n")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        with open(args.current, encoding='utf-8') as file:
+            current = json.load(file)
+        rows = compare(baseline, current, args.threshold)
+        for row in rows:
+            flag = "REGRESSION" if row['regression'] else ""
+            print(f"{row['speedup']:7.2f}x  {row['id']}  {flag}")
+        regressions = sum(row['regression'] for row in rows)
+        print(f"{len(rows)} cases compared, {regressions} regressions", file=sys.stderr)
+        return 1 if regressions else 0
+
+    if args.command == 'startup':
+        report = {'metadata': _metadata(), 'startup': startup_times(args.modules, max(1, args.repeat))}
+        for entry in report['startup']:
+            if 'error' in entry:
+                print(f"{'-':>8}     {entry['module']}: {entry['error']}", file=sys.stderr)
+            else:
+                packages = ", ".join(f"{package} {ms:.0f}" for package, ms in entry['packages_ms'].items())
+                print(f"{entry['import_ms']:8.1f} ms  {entry['module']}  ({packages})", file=sys.stderr)
+        _write(report, args.output)
+        return 0
+
+    report = {'metadata': _metadata(), 'cases': [], 'equivalence': []}
+    if args.command == 'run':
+        scale = 0.1 if args.quick else 1.0
+        memory = not args.no_memory
+        report['cases'] += benchmark_trip(BENEFITS, scale, memory)
+        report['cases'] += benchmark_single_run(
+            [size for size in args.sizes if size <= 100], args.periods, BENEFITS, scale, memory
+        )
+        report['cases'] += benchmark_run_simulation(args.engines, args.sizes, args.periods, BENEFITS, scale, memory)
+        for case in report['cases']:
+            print(f"{case['wall_seconds']:8.3f} s  {case['trips_per_second']:14,.0f} trips/s  {case['id']}",
+                  file=sys.stderr)
+
+    if args.command == 'check' or not args.no_checks:
+        report['equivalence'] = equivalence_checks()
+        failed = [check for check in report['equivalence'] if not check['passed']]
+        print(f"{len(report['equivalence'])} equivalence checks, {len(failed)} failed", file=sys.stderr)
+
+    _write(report, args.output)
+    return 1 if any(not check['passed'] for check in report['equivalence']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import math
+from statistics import NormalDist
+
+
+class PrecisionTarget:
+    """
+    Objetivo de precisión para detener una simulación Monte Carlo por convergencia
+    """
+
+    def __init__(self, half_width=None, relative_half_width=None, probability_half_width=None,
+                 confidence=0.95, min_iterations=2000):
+        """
+        Inicializar objetivo de precisión
+
+        Si no se indica ningún objetivo se usa ±0.5% de la ganancia media y
+        ±0.5 puntos porcentuales en la probabilidad de ganancia positiva.
+
+        Args:
+            half_width (float): Semiancho máximo del intervalo de la ganancia media (RON)
+            relative_half_width (float): Semiancho máximo relativo a |ganancia media| (0.01 = 1%)
+            probability_half_width (float): Semiancho máximo de positive_probability (puntos %)
+            confidence (float): Nivel de confianza del intervalo (0-1)
+            min_iterations (int): Iteraciones mínimas antes de evaluar la convergencia
+        """
+        if half_width is None and relative_half_width is None and probability_half_width is None:
+            relative_half_width = 0.005
+            probability_half_width = 0.5
+
+        if not 0 < confidence < 1:
+            raise ValueError("El nivel de confianza debe estar entre 0 y 1")
+
+        self.half_width = half_width
+        self.relative_half_width = relative_half_width
+        self.probability_half_width = probability_half_width
+        self.confidence = confidence
+        self.min_iterations = min_iterations
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def evaluate(self, mean_stats, probability_stats=None):
+        """
+        Evaluar la precisión alcanzada con las estadísticas acumuladas
+
+        Args:
+            mean_stats (RunningStats): Estadísticas de la cantidad cuya media se estima
+            probability_stats (RunningStats): Estadísticas para positive_probability
+                (por defecto las mismas que mean_stats)
+
+        Returns:
+            dict: Errores estándar, semianchos, iteraciones requeridas y si se alcanzó el objetivo
+        """
+        if probability_stats is None:
+            probability_stats = mean_stats
+
+        n = mean_stats.count
+        mean = mean_stats.mean
+        std = math.sqrt(mean_stats.sample_variance)
+        standard_error = std / math.sqrt(n)
+
+        # Error de la proporción con ajuste de Agresti-Coull (no se anula en 0% o 100%)
+        positives = probability_stats.positives
+        adjusted_n = n + self.z ** 2
+        adjusted_p = (positives + self.z ** 2 / 2) / adjusted_n
+        probability_standard_error = math.sqrt(adjusted_p * (1 - adjusted_p) / adjusted_n) * 100
+
+        # Iteraciones necesarias para cada objetivo activo
+        required = [self.min_iterations]
+        mean_targets = []
+        if self.half_width is not None:
+            mean_targets.append(self.half_width)
+        if self.relative_half_width is not None:
+            mean_targets.append(self.relative_half_width * abs(mean))
+        for target in mean_targets:
+            if target > 0:
+                required.append(math.ceil((self.z * std / target) ** 2))
+            elif std > 0:
+                required.append(math.inf)
+        if self.probability_half_width is not None:
+            required.append(math.ceil(
+                (self.z * probability_standard_error / self.probability_half_width) ** 2 * adjusted_n
+            ) - math.ceil(self.z ** 2))
+        required_iterations = max(required)
+
+        return {
+            'standard_error': standard_error,
+            'mean_half_width': self.z * standard_error,
+            'probability_standard_error': probability_standard_error,
+            'probability_half_width': self.z * probability_standard_error,
+            'confidence': self.confidence,
+            'required_iterations': required_iterations,
+            'converged': n >= required_iterations
+        }
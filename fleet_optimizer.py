@@ -0,0 +1,222 @@
+from statistics import NormalDist
+import numpy as np
+import truck_economics
+from monte_carlo import MonteCarloSimulation
+import vectorized_engine
+
+# Máximo de composiciones que se evalúan analíticamente
+MAX_CANDIDATES = 1 << 22
+
+# Mejores composiciones según la aproximación normal cuyo percentil 5 se recalcula
+# con la distribución exacta (convolución de binomiales, del orden de 1 ms cada una)
+EXACT_SCREEN_CANDIDATES = 512
+
+
+class FleetOptimizer:
+    """
+    Optimizador de compras de camiones bajo un presupuesto
+    """
+
+    # Objetivos disponibles y la clave de resultados de simulación que los mide
+    OBJECTIVES = {
+        'expected_profit': 'mean_profit',
+        'percentile_5': 'percentile_5'
+    }
+
+    def __init__(self, prices, time_period, fleet=None, use_repair_tool=False, referral_tier=0,
+                 engine='vectorized', seed=0, cache=None):
+        """
+        Inicializar optimizador
+
+        Args:
+            prices (dict): Precio de compra por rareza (solo se consideran estas rarezas)
+            time_period (str): Período de tiempo ('1_week', '30_days', '1_year')
+            fleet (list | dict): Flota actual a la que se suman las compras
+            use_repair_tool (bool): Si usar herramienta de reducción de averías
+            referral_tier (int): Tier de referido (0-3)
+            engine (str): Motor de simulación del refinamiento
+            seed (int): Semilla común a todos los candidatos refinados (números
+                aleatorios comunes: las diferencias entre candidatos no son ruido)
+            cache (ResultCache): Caché de resultados de simulación
+        """
+        if time_period not in MonteCarloSimulation.TIME_PERIODS:
+            raise ValueError(f"Período {time_period} no válido")
+
+        for rarity, price in prices.items():
+            truck_economics.ECONOMICS.validate(rarity)
+            if price <= 0:
+                raise ValueError("Los precios deben ser positivos")
+
+        fleet_counts = MonteCarloSimulation.count_fleet(fleet or {})
+        for rarity in fleet_counts:
+            truck_economics.ECONOMICS.validate(rarity)
+
+        self.prices = dict(sorted(prices.items()))
+        self.time_period = time_period
+        self.fleet_counts = fleet_counts
+        self.use_repair_tool = use_repair_tool
+        self.referral_tier = referral_tier
+        self.engine = engine
+        self.seed = seed
+        self.cache = cache
+
+    def candidate_purchases(self, budget, max_trucks=None):
+        """
+        Enumerar todas las compras que caben en el presupuesto
+
+        Args:
+            budget (float): Presupuesto disponible
+            max_trucks (int): Máximo de camiones a comprar (None sin límite)
+
+        Returns:
+            np.ndarray: Matriz (candidatos × rarezas) con la cantidad comprada de cada rareza
+        """
+        if budget < 0:
+            raise ValueError("El presupuesto no puede ser negativo")
+
+        purchases = np.zeros((1, 0), dtype=np.int64)
+        remaining = np.array([budget], dtype=float)
+        trucks = np.zeros(1, dtype=np.int64)
+
+        for price in self.prices.values():
+            affordable = np.floor(remaining / price + 1e-9).astype(np.int64)
+            if max_trucks is not None:
+                affordable = np.minimum(affordable, max_trucks - trucks)
+            repeats = affordable + 1
+            if repeats.sum() > MAX_CANDIDATES:
+                raise ValueError(
+                    "Demasiadas combinaciones posibles: reduzca el presupuesto o limite max_trucks"
+                )
+
+            # Cada compra parcial se extiende con 0..affordable camiones de esta rareza
+            parent = np.repeat(np.arange(len(purchases)), repeats)
+            quantity = np.arange(len(parent)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+            purchases = np.column_stack([purchases[parent], quantity])
+            remaining = remaining[parent] - quantity * price
+            trucks = trucks[parent] + quantity
+
+        return purchases
+
+    def screen(self, purchases, exact_candidates=0):
+        """
+        Puntuar compras con los momentos exactos de la ganancia
+
+        La ganancia de cada camión es independiente, así que media y varianza de
+        la flota son sumas de las de cada camión. El percentil 5 se aproxima con
+        una normal de esos momentos, que lo sesga en flotas pequeñas (ganancia
+        discreta y asimétrica), así que los exact_candidates mejores según la
+        aproximación se recalculan con la distribución exacta.
+
+        Args:
+            purchases (np.ndarray): Matriz (candidatos × rarezas) de candidate_purchases
+            exact_candidates (int): Candidatos cuyo percentil 5 se calcula de forma exacta
+
+        Returns:
+            dict: Media, desviación estándar y percentil 5 por candidato, y qué
+                percentiles son exactos ('exact_percentile_5')
+        """
+        trips = MonteCarloSimulation.TIME_PERIODS[self.time_period] // 12
+        truck_moments = [
+            vectorized_engine.profit_moments({rarity: 1}, trips, self.use_repair_tool, self.referral_tier)
+            for rarity in self.prices
+        ]
+        fleet_moments = vectorized_engine.profit_moments(
+            self.fleet_counts, trips, self.use_repair_tool, self.referral_tier
+        )
+
+        mean = fleet_moments['mean'] + purchases @ np.array([m['mean'] for m in truck_moments])
+        variance = fleet_moments['variance'] + purchases @ np.array([m['variance'] for m in truck_moments])
+        std = np.sqrt(variance)
+        percentile_5 = mean + NormalDist().inv_cdf(0.05) * std
+        exact = np.zeros(len(purchases), dtype=bool)
+
+        for index in np.argsort(-percentile_5, kind='stable')[:exact_candidates]:
+            fleet = dict(self.fleet_counts)
+            for rarity, quantity in zip(self.prices, purchases[index]):
+                if quantity > 0:
+                    fleet[rarity] = fleet.get(rarity, 0) + int(quantity)
+            if fleet:
+                simulation = MonteCarloSimulation(fleet, self.use_repair_tool, self.referral_tier)
+                percentile_5[index] = simulation.exact_distribution(self.time_period)['percentile_5']
+            exact[index] = True
+
+        return {
+            'expected_profit': mean,
+            'std_profit': std,
+            'percentile_5': percentile_5,
+            'exact_percentile_5': exact
+        }
+
+    def optimize(self, budget, objective='expected_profit', top_k=10, iterations=10000, max_trucks=None):
+        """
+        Buscar la compra que maximiza el objetivo
+
+        Todas las compras posibles se puntúan analíticamente (el percentil 5 de
+        las mejores, con la distribución exacta) y solo las top_k mejores se
+        simulan con Monte Carlo para ordenarlas por el objetivo.
+
+        Args:
+            budget (float): Presupuesto disponible
+            objective (str): 'expected_profit' o 'percentile_5'
+            top_k (int): Candidatos que se refinan con simulación
+            iterations (int): Iteraciones de cada simulación de refinamiento
+            max_trucks (int): Máximo de camiones a comprar (None sin límite)
+
+        Returns:
+            dict: Mejor candidato, candidatos refinados ordenados y número de compras evaluadas
+        """
+        if objective not in self.OBJECTIVES:
+            raise ValueError(f"Objetivo {objective} no válido")
+        if top_k < 1:
+            raise ValueError("top_k debe ser positivo")
+
+        purchases = self.candidate_purchases(budget, max_trucks)
+        exact_candidates = max(EXACT_SCREEN_CANDIDATES, top_k) if objective == 'percentile_5' else 0
+        scores = self.screen(purchases, exact_candidates)
+        cost = purchases @ np.array(list(self.prices.values()), dtype=float)
+
+        # Mejor puntuación primero; a igual puntuación, la compra más barata
+        order = np.lexsort((cost, -scores[objective]))[:top_k]
+
+        candidates = []
+        for index in order:
+            purchase = {
+                rarity: int(quantity)
+                for rarity, quantity in zip(self.prices, purchases[index]) if quantity > 0
+            }
+            fleet = dict(self.fleet_counts)
+            for rarity, quantity in purchase.items():
+                fleet[rarity] = fleet.get(rarity, 0) + quantity
+
+            candidate = {
+                'purchase': purchase,
+                'fleet': fleet,
+                'cost': float(cost[index]),
+                'remaining_budget': float(budget - cost[index]),
+                'expected_profit': float(scores['expected_profit'][index]),
+                'std_profit': float(scores['std_profit'][index]),
+                'screening_score': float(scores[objective][index]),
+                'simulation': None,
+                'score': float(scores[objective][index])
+            }
+
+            if fleet:
+                simulation = MonteCarloSimulation(
+                    fleet, self.use_repair_tool, self.referral_tier,
+                    engine=self.engine, seed=self.seed, cache=self.cache
+                )
+                results = simulation.run_simulation(self.time_period, iterations=iterations)
+                candidate['simulation'] = results
+                candidate['score'] = float(results[self.OBJECTIVES[objective]])
+            candidates.append(candidate)
+
+        candidates.sort(key=lambda candidate: (-candidate['score'], candidate['cost']))
+
+        return {
+            'objective': objective,
+            'time_period': self.time_period,
+            'budget': budget,
+            'best': candidates[0],
+            'candidates': candidates,
+            'screened': len(purchases)
+        }
@@ -0,0 +1,143 @@
+import contextlib
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+# Funciones y líneas de asignación que se incluyen en los informes de perfil y memoria
+PROFILE_TOP = 25
+MEMORY_TOP = 10
+
+
+class Instrumentation:
+    """
+    Temporizadores, contadores y capturas opcionales de cProfile/tracemalloc de una ejecución
+
+    Etapas medidas por MonteCarloSimulation:
+        truck_construction: creación de TruckSimulator (motor de referencia,
+            incluida en trip_simulation)
+        trip_simulation: simulación de viajes de cada bloque
+        aggregation: resumen de muestras y combinación de bloques
+        statistics: cálculo de los resultados finales
+
+    Contadores: chunks, iterations, trips, breakdowns y sample_bytes (bytes de
+    los arrays de muestras creados por los motores).
+    """
+
+    def __init__(self, callback=None, profile=False, trace_memory=False):
+        """
+        Inicializar instrumentación
+
+        Args:
+            callback (callable): Función callback(evento, informe) llamada tras
+                cada bloque ('chunk') y al terminar ('complete')
+            profile (bool): Capturar un perfil cProfile de la ejecución
+            trace_memory (bool): Capturar asignaciones con tracemalloc
+        """
+        self.callback = callback
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.timers = {}
+        self.counters = {}
+        self._profiler = None
+        self._profile_stats = None
+        self._memory = None
+        self._started_tracing = False
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Acumular el tiempo de un bloque de código bajo `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timer = self.timers.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            timer['seconds'] += time.perf_counter() - start
+            timer['calls'] += 1
+
+    def count(self, name, value=1):
+        """Sumar `value` al contador `name`"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, report):
+        """
+        Incorporar temporizadores y contadores de otro informe (p. ej. de un proceso del pool)
+
+        Args:
+            report (dict): Informe generado por report()
+        """
+        for name, timer in report['timers'].items():
+            merged = self.timers.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            merged['seconds'] += timer['seconds']
+            merged['calls'] += timer['calls']
+        for name, value in report['counters'].items():
+            self.count(name, value)
+
+    def start(self):
+        """Comenzar las capturas de perfil y memoria solicitadas"""
+        if self.trace_memory:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        """Detener las capturas y guardar sus resúmenes"""
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profile_stats = self._summarize_profile(self._profiler)
+            self._profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:MEMORY_TOP]
+            self._memory = {
+                'current_bytes': current,
+                'peak_bytes': peak,
+                'top_allocations': [
+                    {'location': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+                    for stat in top
+                ]
+            }
+            if self._started_tracing:
+                tracemalloc.stop()
+
+    @staticmethod
+    def _summarize_profile(profiler):
+        """Funciones con mayor tiempo acumulado"""
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': f"{filename}:{line}({function})",
+                'calls': calls,
+                'total_seconds': total,
+                'cumulative_seconds': cumulative
+            })
+        rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+        return rows[:PROFILE_TOP]
+
+    def report(self):
+        """
+        Informe serializable de la instrumentación
+
+        Returns:
+            dict: Temporizadores, contadores y, si se capturaron, perfil y memoria
+        """
+        report = {
+            'timers': {name: dict(timer) for name, timer in self.timers.items()},
+            'counters': dict(self.counters)
+        }
+        if self._profile_stats is not None:
+            report['profile'] = self._profile_stats
+        if self._memory is not None:
+            report['memory'] = self._memory
+        return report
+
+    def notify(self, event):
+        """Enviar el informe actual al callback"""
+        if self.callback is not None:
+            self.callback(event, self.report())
@@ -1,8 +1,25 @@
-import random
+import math
+import logging
+import contextlib
 import numpy as np
 from truck_simulator import TruckSimulator
-from concurrent.futures import ThreadPoolExecutor
-import threading
+import vectorized_engine
+import truck_economics
+import samplers
+import profit_distribution
+from streaming_stats import RunningStats, BatchMeans, SimulationAggregate
+from result_cache import scenario_fingerprint
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from collections import Counter
+from collections.abc import Mapping
+
+# Mensajes de ejecución (inicio, avance por bloque, fin); ver logging
+logger = logging.getLogger(__name__)
+
+
+class SimulationCancelled(Exception):
+    """La simulación se canceló antes de terminar (ver el parámetro cancel de run_simulation)"""
+
 
 class MonteCarloSimulation:
     """
@@ -16,145 +33,1036 @@ class MonteCarloSimulation:
         '1_year': 365 * 24  # 8760 horas
     }
     
-    def __init__(self, fleet, use_repair_tool=False, referral_tier=0):
+    # Motores de simulación disponibles
+    # 'vectorized': arrays de NumPy por bloques de iteraciones
+    # 'binomial': número de averías por camión muestreado con binomiales
+    # 'reference': un TruckSimulator por camión y viaje (referencia para pruebas)
+    ENGINES = ('vectorized', 'binomial', 'reference')
+    
+    # Muestreadores de cada motor (ver samplers): el binomial invierte una
+    # binomial por rareza y segmento de viajes y admite todos; el vectorizado
+    # usa una uniforme por camión y viaje (demasiadas dimensiones para
+    # Sobol/Halton) y el de referencia solo números pseudoaleatorios
+    ENGINE_SAMPLERS = {
+        'vectorized': ('pseudo', 'antithetic'),
+        'binomial': samplers.SAMPLERS,
+        'reference': ('pseudo',)
+    }
+    
+    # Iteraciones por bloque; cada bloque recibe su propio flujo aleatorio
+    # (fijo, para que el resultado no dependa del número de procesos)
+    CHUNK_ITERATIONS = 1000
+    
+    # Nivel de confianza del intervalo de la ganancia media en los avisos de progreso
+    # (sin objetivo de precisión)
+    PROGRESS_CONFIDENCE = 0.95
+    
+    # Segundos entre comprobaciones de cancelación mientras se espera un bloque del pool
+    CANCEL_POLL_SECONDS = 0.1
+    
+    # Desviaciones estándar alrededor de la media que cubre el histograma de ganancias
+    HISTOGRAM_SIGMAS = 12
+    
+    # Intervalos del histograma y máximo de valores atípicos del diagrama de caja
+    # precalculados en los resultados (para graficar sin las muestras crudas)
+    SUMMARY_HISTOGRAM_BINS = 50
+    MAX_BOX_OUTLIERS = 200
+    
+    # Estadísticas escalares de los resultados (resúmenes tabulares de barridos y lotes)
+    SUMMARY_FIELDS = (
+        'iterations', 'seed', 'mean_profit', 'std_profit', 'min_profit', 'max_profit', 'median_profit',
+        'positive_probability', 'percentile_5', 'percentile_25', 'percentile_75', 'percentile_95',
+        'standard_error', 'variance_reduction'
+    )
+    
+    def __init__(self, fleet, use_repair_tool=False, referral_tier=0, engine='vectorized', seed=None,
+                 cache=None, sampler='pseudo'):
         """
         Inicializar simulación con flota de camiones
         
         Args:
-            fleet (list): Lista de rarezas de camiones
+            fleet (list | dict): Lista de rarezas de camiones o cantidad de camiones por rareza
             use_repair_tool (bool): Si usar herramienta de reducción de averías
             referral_tier (int): Tier de referido (0: ninguno, 1: -2%, 2: -3%, 3: -5%)
+            engine (str): Motor de simulación ('vectorized', 'binomial' o 'reference')
+            seed (int | np.random.Generator): Semilla o generador del que se derivan los
+                flujos de cada bloque (None usa entropía del sistema, registrada en los resultados)
+            cache (ResultCache): Caché donde buscar y guardar resultados de escenarios ya simulados
+            sampler (str): Muestreo de los números aleatorios ('pseudo', 'antithetic',
+                'stratified', 'sobol' o 'halton'; ver ENGINE_SAMPLERS). Cada bloque es
+                una réplica independiente y el error estándar se estima entre bloques;
+                los resultados incluyen el factor de reducción de varianza logrado
         """
-        self.fleet = fleet
+        if engine not in self.ENGINES:
+            raise ValueError(f"Motor {engine} no válido")
+        if sampler not in samplers.SAMPLERS:
+            raise ValueError(f"Muestreo {sampler} no válido")
+        if sampler not in self.ENGINE_SAMPLERS[engine]:
+            raise ValueError(f"El muestreo {sampler} no está disponible con el motor {engine}")
+        
+        # Flota agrupada por rareza: {rareza: cantidad}
+        self.fleet_counts = self.count_fleet(fleet)
+        self.engine = engine
+        self.sampler = sampler
         self.use_repair_tool = use_repair_tool
         self.referral_tier = referral_tier
-        self.lock = threading.Lock()
+        self.seed = seed
+        self.cache = cache
+        # Instrumentación, callback de progreso y evento de cancelación de la
+        # ejecución en curso (ver run_simulation)
+        self.instrumentation = None
+        self.progress = None
+        self.cancel = None
+        # Almacén donde se escriben las muestras de la ejecución en curso (ver run_simulation)
+        self.sample_writer = None
+    
+    @staticmethod
+    def count_fleet(fleet):
+        """
+        Agrupar una flota en cantidad de camiones por rareza
         
-    def simulate_single_run(self, time_period_hours):
+        Args:
+            fleet (list | dict): Lista de rarezas o cantidad de camiones por rareza
+            
+        Returns:
+            dict: {rareza: cantidad} en orden de aparición, sin grupos vacíos
+        """
+        if isinstance(fleet, Mapping):
+            return {int(rarity): int(count) for rarity, count in fleet.items() if count > 0}
+        return dict(Counter(fleet))
+    
+    def _timer(self, name):
+        """Temporizador de la instrumentación activa (sin efecto si no hay ninguna)"""
+        if self.instrumentation is None:
+            return contextlib.nullcontext()
+        return self.instrumentation.timer(name)
+    
+    @contextlib.contextmanager
+    def _observed(self, progress, cancel):
+        """Activar el callback de progreso y el evento de cancelación durante una ejecución"""
+        self.progress, self.cancel = progress, cancel
+        try:
+            yield
+        finally:
+            self.progress = self.cancel = None
+    
+    def _check_cancelled(self):
+        """Lanzar SimulationCancelled si se pidió cancelar la ejecución en curso"""
+        if self.cancel is not None and self.cancel.is_set():
+            raise SimulationCancelled("Simulación cancelada")
+    
+    @staticmethod
+    def fleet_label(fleet_counts):
+        """Etiqueta legible y canónica de una flota ("2×R1, 1×R3")"""
+        return ", ".join(f"{count}×R{rarity}" for rarity, count in sorted(fleet_counts.items()))
+    
+    @property
+    def fleet(self):
+        """Lista de rarezas de camiones (expandida desde los grupos)"""
+        return [rarity for rarity, count in self.fleet_counts.items() for _ in range(count)]
+    
+    @property
+    def fleet_size(self):
+        """Número total de camiones de la flota"""
+        return sum(self.fleet_counts.values())
+        
+    def simulate_single_run(self, time_period_hours, rng=None):
         """
         Ejecutar una simulación individual de la flota
         
         Args:
             time_period_hours (int): Horas del período a simular
+            rng (np.random.Generator): Generador del que se derivan los camiones
             
         Returns:
             dict: Resultados de la simulación individual
         """
         total_profit = 0
-        fleet_results = {}
         rarity_stats = {}
         
-        for truck_rarity in self.fleet:
-            # Crear nuevo camión para cada simulación
-            truck = TruckSimulator(truck_rarity, self.use_repair_tool, self.referral_tier)
+        for truck_rarity, count in self.fleet_counts.items():
+            # Un camión por rareza, reiniciado para cada unidad del grupo
+            with self._timer('truck_construction'):
+                truck = TruckSimulator(truck_rarity, self.use_repair_tool, self.referral_tier, seed=rng)
+            group_stats = {
+                'count': count,
+                'total_profit': 0,
+                'total_trips': 0,
+                'total_repairs': 0
+            }
             
-            # Simular el período
-            period_result = truck.simulate_period(time_period_hours)
+            for _ in range(count):
+                truck.reset()
+                
+                # Simular el período
+                period_result = truck.simulate_period(time_period_hours)
+                
+                group_stats['total_profit'] += period_result['net_profit']
+                group_stats['total_trips'] += period_result['total_trips']
+                group_stats['total_repairs'] += period_result['repairs_count']
             
-            total_profit += period_result['net_profit']
+            total_profit += group_stats['total_profit']
+            rarity_stats[truck_rarity] = group_stats
+        
+        return {
+            'total_profit': total_profit,
+            'rarity_stats': rarity_stats
+        }
+    
+    def _single_run_checkpoints(self, horizon_hours, rng=None):
+        """
+        Ejecutar una simulación individual tomando un resumen en cada horizonte
+        
+        Args:
+            horizon_hours (list): Horas acumuladas de cada horizonte
+            rng (np.random.Generator): Generador del que se derivan los camiones
             
-            # Acumular estadísticas por rareza
-            if truck_rarity not in rarity_stats:
-                rarity_stats[truck_rarity] = {
-                    'count': 0,
+        Returns:
+            list: Resultados (formato de simulate_single_run) por horizonte
+        """
+        runs = [{'total_profit': 0, 'rarity_stats': {}} for _ in horizon_hours]
+        
+        for truck_rarity, count in self.fleet_counts.items():
+            with self._timer('truck_construction'):
+                truck = TruckSimulator(truck_rarity, self.use_repair_tool, self.referral_tier, seed=rng)
+            for run in runs:
+                run['rarity_stats'][truck_rarity] = {
+                    'count': count,
                     'total_profit': 0,
                     'total_trips': 0,
                     'total_repairs': 0
                 }
             
-            rarity_stats[truck_rarity]['count'] += 1
-            rarity_stats[truck_rarity]['total_profit'] += period_result['net_profit']
-            rarity_stats[truck_rarity]['total_trips'] += period_result['total_trips']
-            rarity_stats[truck_rarity]['total_repairs'] += period_result['repairs_count']
+            for _ in range(count):
+                truck.reset()
+                for run, summary in zip(runs, truck.simulate_checkpoints(horizon_hours)):
+                    group_stats = run['rarity_stats'][truck_rarity]
+                    group_stats['total_profit'] += summary['net_profit']
+                    group_stats['total_trips'] += summary['total_trips']
+                    group_stats['total_repairs'] += summary['repairs_count']
+                    run['total_profit'] += summary['net_profit']
         
-        return {
-            'total_profit': total_profit,
-            'rarity_stats': rarity_stats
-        }
+        return runs
     
-    def run_simulation(self, time_period, iterations=10000):
+    def _simulate_reference(self, horizon_hours, iterations, rng=None):
         """
-        Ejecutar simulación Monte Carlo completa
+        Ejecutar las iteraciones con el motor de referencia (TruckSimulator)
         
         Args:
-            time_period (str): Período de tiempo ('1_week', '30_days', '1_year')
+            horizon_hours (list): Horas de cada horizonte a simular
             iterations (int): Número de iteraciones a ejecutar
+            rng (np.random.Generator): Generador del bloque
             
         Returns:
-            dict: Resultados completos de la simulación
+            list: Ganancia total por iteración y estadísticas por rareza de cada horizonte
         """
-        if time_period not in self.TIME_PERIODS:
-            raise ValueError(f"Período {time_period} no válido")
+        horizon_samples = [{'total_profit': [], 'rarity_stats': {}} for _ in horizon_hours]
+        
+        for _ in range(iterations):
+            # El motor de referencia es lento: atender la cancelación en cada iteración
+            self._check_cancelled()
+            if len(horizon_hours) == 1:
+                run_results = [self.simulate_single_run(horizon_hours[0], rng)]
+            else:
+                run_results = self._single_run_checkpoints(horizon_hours, rng)
+            
+            for samples, run_result in zip(horizon_samples, run_results):
+                samples['total_profit'].append(run_result['total_profit'])
+                combined_rarity_stats = samples['rarity_stats']
+                
+                # Combinar estadísticas por rareza
+                for rarity, stats in run_result['rarity_stats'].items():
+                    if rarity not in combined_rarity_stats:
+                        combined_rarity_stats[rarity] = {
+                            'profits': [],
+                            'trips': [],
+                            'repairs': [],
+                            'count': stats['count']
+                        }
+                    
+                    combined_rarity_stats[rarity]['profits'].append(stats['total_profit'])
+                    combined_rarity_stats[rarity]['trips'].append(stats['total_trips'])
+                    combined_rarity_stats[rarity]['repairs'].append(stats['total_repairs'])
+        
+        return horizon_samples
+    
+    def _simulate_chunk(self, horizon_hours, iterations, rng, scenarios):
+        """
+        Ejecutar un bloque de iteraciones con el motor configurado
         
-        if not self.fleet:
+        Todos los escenarios y horizontes del bloque usan los mismos números aleatorios.
+        
+        Args:
+            horizon_hours (list): Horas de cada horizonte a simular
+            iterations (int): Número de iteraciones del bloque
+            rng (np.random.Generator): Flujo aleatorio del bloque
+            scenarios (list): Tuplas (use_repair_tool, referral_tier)
+            
+        Returns:
+            list: Por escenario, muestras del bloque por horizonte como arrays compactos
+        """
+        if self.engine == 'reference':
+            # Cada escenario parte del mismo estado del generador: mismas semillas por camión
+            scenario_samples = []
+            for use_repair_tool, referral_tier in scenarios:
+                scenario_rng = np.random.Generator(type(rng.bit_generator)())
+                scenario_rng.bit_generator.state = rng.bit_generator.state
+                simulation = MonteCarloSimulation(self.fleet_counts, use_repair_tool, referral_tier, engine='reference')
+                simulation.instrumentation = self.instrumentation
+                simulation.cancel = self.cancel
+                scenario_samples.append(simulation._simulate_reference(horizon_hours, iterations, scenario_rng))
+        else:
+            trips = [hours // 12 for hours in horizon_hours]
+            if self.engine == 'binomial' and self.sampler != 'pseudo':
+                scenario_samples = vectorized_engine.simulate_paths_quasi(
+                    rng, self.fleet_counts, trips, iterations, scenarios, self.sampler,
+                    check=self._check_cancelled
+                )
+            elif self.engine == 'vectorized':
+                # La cancelación se atiende en cada bloque de sorteos, no solo entre bloques de iteraciones
+                scenario_samples = vectorized_engine.simulate_paths(
+                    rng, self.fleet_counts, trips, iterations, scenarios, antithetic=self.sampler == 'antithetic',
+                    check=self._check_cancelled
+                )
+            else:
+                scenario_samples = vectorized_engine.simulate_paths_binomial(
+                    rng, self.fleet_counts, trips, iterations, scenarios, check=self._check_cancelled
+                )
+        
+        return [
+            [
+                {
+                    'total_profit': np.asarray(samples['total_profit'], dtype=np.int64),
+                    'rarity_stats': {
+                        rarity: {
+                            'count': stats['count'],
+                            'profits': np.asarray(stats['profits'], dtype=np.int64),
+                            'trips': np.asarray(stats['trips'], dtype=np.int64),
+                            'repairs': np.asarray(stats['repairs'], dtype=np.int64)
+                        }
+                        for rarity, stats in samples['rarity_stats'].items()
+                    }
+                }
+                for samples in horizon_samples
+            ]
+            for horizon_samples in scenario_samples
+        ]
+    
+    def resolve_seed(self):
+        """
+        Obtener la semilla entera de la próxima ejecución
+        
+        Returns:
+            int: Semilla explícita, derivada del generador o entropía nueva del sistema
+        """
+        if self.seed is None:
+            return int(np.random.SeedSequence().entropy)
+        if isinstance(self.seed, np.random.Generator):
+            return int(self.seed.integers(2**63))
+        return int(self.seed)
+    
+    def _chunk_tasks(self, horizon_hours, iterations, seed, scenarios, first_chunk=0, keep_samples=False):
+        """
+        Dividir las iteraciones en bloques con flujos aleatorios independientes
+        
+        El bloque i usa siempre el i-ésimo hijo de SeedSequence(seed), así que
+        una misma semilla reproduce los mismos bloques en cualquier modo.
+        
+        Args:
+            horizon_hours (list): Horas de cada horizonte a simular
+            iterations (int): Número de iteraciones de estos bloques
+            seed (int): Semilla de la ejecución
+            scenarios (list): Tuplas (use_repair_tool, referral_tier)
+            first_chunk (int): Índice del primer bloque
+            keep_samples (bool): Conservar las muestras crudas de cada bloque
+            
+        Returns:
+            list: Tareas serializables para _run_chunk
+        """
+        sizes = [
+            min(self.CHUNK_ITERATIONS, iterations - start)
+            for start in range(0, iterations, self.CHUNK_ITERATIONS)
+        ]
+        seed_sequences = [
+            np.random.SeedSequence(seed, spawn_key=(first_chunk + index,))
+            for index in range(len(sizes))
+        ]
+        
+        return [
+            {
+                'fleet_counts': self.fleet_counts,
+                'scenarios': scenarios,
+                'engine': self.engine,
+                'sampler': self.sampler,
+                'horizon_hours': horizon_hours,
+                'iterations': size,
+                'seed_sequence': seed_sequence,
+                'keep_samples': keep_samples,
+                'instrument': self.instrumentation is not None,
+                'store_samples': self.sample_writer is not None
+            }
+            for size, seed_sequence in zip(sizes, seed_sequences)
+        ]
+    
+    def _histogram_range(self, time_period_hours, use_repair_tool, referral_tier):
+        """
+        Rango del histograma de ganancias: media exacta ± HISTOGRAM_SIGMAS desviaciones
+        
+        Returns:
+            tuple: (mínimo, máximo) dentro del rango posible de ganancias
+        """
+        moments = vectorized_engine.profit_moments(
+            self.fleet_counts, time_period_hours // 12, use_repair_tool, referral_tier
+        )
+        spread = self.HISTOGRAM_SIGMAS * np.sqrt(moments['variance'])
+        return (max(moments['min'], moments['mean'] - spread),
+                min(moments['max'], moments['mean'] + spread))
+    
+    def _aggregate_chunk(self, horizon_hours, scenarios, scenario_samples, keep_samples):
+        """
+        Resumir las muestras de un bloque en agregados combinables
+        
+        Args:
+            horizon_hours (list): Horas de cada horizonte simulado
+            scenarios (list): Tuplas (use_repair_tool, referral_tier)
+            scenario_samples (list): Muestras del bloque por escenario y horizonte
+            keep_samples (bool): Conservar las muestras crudas
+            
+        Returns:
+            dict: Agregados por escenario y horizonte, y estadísticas y media del
+                bloque de la diferencia primero - último por horizonte
+        """
+        aggregates = []
+        for (use_repair_tool, referral_tier), horizon_samples in zip(scenarios, scenario_samples):
+            scenario_aggregates = []
+            for hours, samples in zip(horizon_hours, horizon_samples):
+                aggregate = SimulationAggregate(
+                    self.fleet_counts, self._histogram_range(hours, use_repair_tool, referral_tier),
+                    keep_samples
+                )
+                aggregate.update(samples)
+                scenario_aggregates.append(aggregate)
+            aggregates.append(scenario_aggregates)
+        
+        delta = delta_batches = None
+        delta_samples = [[] for _ in horizon_hours]
+        if len(scenario_samples) > 1:
+            delta, delta_batches = [], []
+            for index in range(len(horizon_hours)):
+                profit_delta = (scenario_samples[0][index]['total_profit']
+                                - scenario_samples[-1][index]['total_profit'])
+                horizon_delta = RunningStats()
+                horizon_delta.update(profit_delta)
+                delta.append(horizon_delta)
+                horizon_batches = BatchMeans()
+                horizon_batches.update(profit_delta)
+                delta_batches.append(horizon_batches)
+                if keep_samples:
+                    delta_samples[index].append(profit_delta)
+        
+        return {'aggregates': aggregates, 'delta': delta, 'delta_batches': delta_batches,
+                'delta_samples': delta_samples}
+    
+    @staticmethod
+    def _merge_chunk(merged, chunk):
+        """
+        Combinar el agregado de un bloque con el acumulado (en el orden de los bloques)
+        
+        Args:
+            merged (dict): Agregado acumulado o None
+            chunk (dict): Agregado del bloque
+            
+        Returns:
+            dict: Agregado acumulado
+        """
+        if merged is None:
+            return chunk
+        for scenario_aggregates, other_aggregates in zip(merged['aggregates'], chunk['aggregates']):
+            for aggregate, other in zip(scenario_aggregates, other_aggregates):
+                aggregate.merge(other)
+        if merged['delta'] is not None:
+            for index, horizon_delta in enumerate(merged['delta']):
+                horizon_delta.merge(chunk['delta'][index])
+                merged['delta_batches'][index].merge(chunk['delta_batches'][index])
+                merged['delta_samples'][index].extend(chunk['delta_samples'][index])
+        return merged
+    
+    def _resolve_horizon(self, horizon):
+        """
+        Convertir un horizonte en horas
+        
+        Args:
+            horizon: Clave de TIME_PERIODS o número entero de horas
+            
+        Returns:
+            int: Horas del horizonte
+        """
+        if isinstance(horizon, str):
+            if horizon not in self.TIME_PERIODS:
+                raise ValueError(f"Período {horizon} no válido")
+            return self.TIME_PERIODS[horizon]
+        if isinstance(horizon, (int, np.integer)) and not isinstance(horizon, bool) and horizon >= 0:
+            return int(horizon)
+        raise ValueError(f"Horizonte {horizon} no válido")
+    
+    def _run_scenarios(self, horizons, iterations, workers, scenarios, precision=None, keep_samples=False):
+        """
+        Ejecutar las iteraciones de uno o más escenarios con números aleatorios comunes
+        
+        Cada bloque se resume en agregados combinables, así que la memoria no
+        crece con el número de iteraciones (salvo con keep_samples). Todos los
+        horizontes salen de las mismas trayectorias de viajes.
+        
+        Args:
+            horizons (list): Períodos ('1_week', '30_days', '1_year') u horas a simular
+            iterations (int): Número de iteraciones (máximo si hay objetivo de precisión)
+            workers (int): Procesos en paralelo (1 ejecuta en el proceso actual)
+            scenarios (list): Tuplas (use_repair_tool, referral_tier)
+            precision (PrecisionTarget): Detener al alcanzar esta precisión en todos los horizontes
+            keep_samples (bool): Conservar las muestras crudas
+            
+        Returns:
+            tuple: (semilla usada, agregado combinado, convergencia por horizonte o None)
+        """
+        horizon_hours = [self._resolve_horizon(horizon) for horizon in horizons]
+        
+        if not self.fleet_counts:
             raise ValueError("La flota no puede estar vacía")
         
-        time_period_hours = self.TIME_PERIODS[time_period]
-        all_profits = []
-        combined_rarity_stats = {}
+        if iterations < 1:
+            raise ValueError("El número de iteraciones debe ser positivo")
+        
+        seed = self.resolve_seed()
         
         # Ejecutar simulaciones
-        print(f"Ejecutando {iterations} simulaciones para período de {time_period}...")
-        
-        for i in range(iterations):
-            if i % 1000 == 0:
-                print(f"Progreso: {i}/{iterations} simulaciones completadas")
-            
-            run_result = self.simulate_single_run(time_period_hours)
-            all_profits.append(run_result['total_profit'])
-            
-            # Combinar estadísticas por rareza
-            for rarity, stats in run_result['rarity_stats'].items():
-                if rarity not in combined_rarity_stats:
-                    combined_rarity_stats[rarity] = {
-                        'profits': [],
-                        'trips': [],
-                        'repairs': [],
-                        'count': stats['count']
-                    }
+        label = ', '.join(str(horizon) for horizon in horizons)
+        logger.info("Ejecutando %d simulaciones para período de %s...", iterations, label)
+        
+        executor = None
+        if workers > 1:
+            # El módulo del pool solo se carga si se usa (arranque en frío de la aplicación)
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=workers)
+        merged = None
+        chunk_count = 0
+        completed = 0
+        convergence = None
+        
+        try:
+            batch = iterations if precision is None else min(iterations, precision.min_iterations)
+            while batch > 0:
+                tasks = self._chunk_tasks(
+                    horizon_hours, batch, seed, scenarios, first_chunk=chunk_count, keep_samples=keep_samples
+                )
+                chunk_count += len(tasks)
+                if executor and len(tasks) > 1:
+                    futures = [executor.submit(_run_chunk, task) for task in tasks]
+                    results = map(self._chunk_result, futures)
+                else:
+                    results = (_run_chunk(task, self.cancel) for task in tasks)
+                for chunk in results:
+                    self._check_cancelled()
+                    chunk_report = chunk.pop('instrumentation', None)
+                    chunk_samples = chunk.pop('samples', None)
+                    with self._timer('aggregation'):
+                        merged = self._merge_chunk(merged, chunk)
+                    if chunk_samples is not None:
+                        # Los bloques llegan en orden: las filas quedan en el orden de las semillas
+                        self.sample_writer.append(chunk_samples)
+                    completed = merged['aggregates'][0][0].count
+                    logger.debug("Progreso: %d/%d simulaciones completadas", completed, iterations)
+                    if chunk_report is not None:
+                        self.instrumentation.merge(chunk_report)
+                        self.instrumentation.notify('chunk')
+                    if self.progress is not None:
+                        confidence = self.PROGRESS_CONFIDENCE if precision is None else precision.confidence
+                        self.progress(self._progress_report(merged, iterations, confidence))
+                
+                if precision is None:
+                    break
                 
-                combined_rarity_stats[rarity]['profits'].append(stats['total_profit'])
-                combined_rarity_stats[rarity]['trips'].append(stats['total_trips'])
-                combined_rarity_stats[rarity]['repairs'].append(stats['total_repairs'])
+                # Evaluar la convergencia (diferencia frente al último escenario si hay varios)
+                convergence = []
+                for index, aggregate in enumerate(merged['aggregates'][0]):
+                    benefit = aggregate.profit
+                    if merged['delta']:
+                        mean_stats = self._effective_stats(merged['delta'][index], merged['delta_batches'][index])
+                    else:
+                        mean_stats = self._effective_stats(benefit, aggregate.batches)
+                    convergence.append(precision.evaluate(mean_stats, benefit))
+                required_iterations = max(horizon['required_iterations'] for horizon in convergence)
+                
+                # Próximo lote: lo que falta según la proyección, en bloques completos
+                if all(horizon['converged'] for horizon in convergence) or completed >= iterations:
+                    batch = 0
+                else:
+                    batch = max(required_iterations - completed, self.CHUNK_ITERATIONS)
+                    batch = min(-(-batch // self.CHUNK_ITERATIONS) * self.CHUNK_ITERATIONS, iterations - completed)
+        except SimulationCancelled:
+            # Liberar el hilo de inmediato: los bloques pendientes no llegan a ejecutarse
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = None
+            logger.info("Simulación cancelada: %d/%d iteraciones", completed, iterations)
+            raise
+        finally:
+            if executor:
+                executor.shutdown()
+        
+        logger.info("Simulación completada: %d iteraciones", completed)
+        return seed, merged, convergence
+    
+    def _chunk_result(self, future):
+        """Esperar el resultado de un bloque del pool atendiendo la cancelación"""
+        while True:
+            self._check_cancelled()
+            try:
+                return future.result(timeout=self.CANCEL_POLL_SECONDS)
+            except FutureTimeoutError:
+                continue
+    
+    def _mean_variance(self, stats, batches):
+        """
+        Varianza estimada de una media
+
+        Con muestreo pseudoaleatorio las iteraciones son independientes; con los
+        demás muestreadores solo lo son los bloques, y se usan las medias por lotes.
+
+        Args:
+            stats (RunningStats): Estadísticas de las iteraciones
+            batches (BatchMeans): Medias de los bloques
+
+        Returns:
+            float: Varianza de la media (la de iteraciones independientes con menos de 2 bloques)
+        """
+        if self.sampler == 'pseudo' or batches.count < 2:
+            return stats.sample_variance / stats.count
+        return batches.variance_of_mean
+    
+    def _effective_stats(self, stats, batches):
+        """Copia de stats con la varianza de iteraciones independientes equivalente a la de las medias por lotes"""
+        if self.sampler == 'pseudo' or batches.count < 2:
+            return stats
+        effective = RunningStats().merge(stats)
+        effective.m2 = batches.variance_of_mean * stats.count * (stats.count - 1)
+        return effective
+    
+    def _sampling_summary(self, stats, batches):
+        """
+        Error estándar de la media y factor de reducción de varianza del muestreador
+
+        El factor es la varianza de la media con iteraciones independientes
+        (varianza muestral / iteraciones) dividida por la lograda: cuántas veces
+        más iteraciones pseudoaleatorias harían falta para la misma precisión.
+
+        Returns:
+            dict: 'standard_error' y 'variance_reduction' (NaN con menos de 2 bloques)
+        """
+        variance = self._mean_variance(stats, batches)
+        if self.sampler == 'pseudo':
+            reduction = 1.0
+        elif batches.count < 2:
+            reduction = math.nan
+        elif variance > 0:
+            reduction = stats.sample_variance / stats.count / variance
+        else:
+            reduction = math.inf if stats.sample_variance > 0 else 1.0
+        return {'standard_error': math.sqrt(variance), 'variance_reduction': reduction}
+    
+    def _progress_report(self, merged, iterations, confidence):
+        """
+        Estadísticas parciales tras combinar un bloque
         
-        # Calcular estadísticas finales
-        all_profits = np.array(all_profits)
+        Args:
+            merged (dict): Agregado combinado hasta el momento
+            iterations (int): Iteraciones solicitadas (máximo si hay objetivo de precisión)
+            confidence (float): Nivel de confianza de los intervalos
+            
+        Returns:
+            dict: Iteraciones completadas y media, error estándar e intervalo de la
+                ganancia del primer escenario y horizonte (y de la diferencia si hay varios escenarios)
+        """
+        from statistics import NormalDist
         
-        results = {
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        
+        def interval(stats, batches):
+            standard_error = math.sqrt(self._mean_variance(stats, batches))
+            return float(stats.mean), standard_error, stats.mean - z * standard_error, stats.mean + z * standard_error
+        
+        aggregate = merged['aggregates'][0][0]
+        profit = aggregate.profit
+        completed = profit.count
+        mean, standard_error, low, high = interval(profit, aggregate.batches)
+        report = {
+            'completed': completed,
             'iterations': iterations,
+            'fraction': min(completed / iterations, 1.0),
+            'confidence': confidence,
+            'mean_profit': mean,
+            'std_profit': float(profit.std),
+            'standard_error': standard_error,
+            'ci_low': low,
+            'ci_high': high,
+            'positive_probability': profit.positives / completed * 100
+        }
+        if merged['delta']:
+            mean, standard_error, low, high = interval(merged['delta'][0], merged['delta_batches'][0])
+            report.update({
+                'mean_delta': mean,
+                'delta_standard_error': standard_error,
+                'delta_ci_low': low,
+                'delta_ci_high': high
+            })
+        return report
+    
+    def _build_results(self, time_period, seed, aggregate):
+        """
+        Calcular las estadísticas finales de un escenario
+        
+        Args:
+            time_period (str): Período de tiempo
+            seed (int): Semilla usada
+            aggregate (SimulationAggregate): Agregado de todas las iteraciones
+            
+        Returns:
+            dict: Resultados completos de la simulación
+        """
+        profit = aggregate.profit
+        
+        results = {
+            'iterations': profit.count,
             'time_period': time_period,
-            'fleet_size': len(self.fleet),
-            'all_profits': all_profits.tolist(),
-            'mean_profit': float(np.mean(all_profits)),
-            'std_profit': float(np.std(all_profits)),
-            'min_profit': float(np.min(all_profits)),
-            'max_profit': float(np.max(all_profits)),
-            'median_profit': float(np.median(all_profits)),
-            'positive_probability': float(np.sum(all_profits > 0) / len(all_profits) * 100),
-            'percentile_25': float(np.percentile(all_profits, 25)),
-            'percentile_75': float(np.percentile(all_profits, 75)),
+            'fleet_size': self.fleet_size,
+            'seed': seed,
+            'mean_profit': float(profit.mean),
+            'std_profit': float(profit.std),
+            'min_profit': float(profit.min),
+            'max_profit': float(profit.max),
+            'median_profit': aggregate.quantile(0.50),
+            'positive_probability': float(profit.positives / profit.count * 100),
+            'percentile_5': aggregate.quantile(0.05),
+            'percentile_25': aggregate.quantile(0.25),
+            'percentile_75': aggregate.quantile(0.75),
+            'percentile_95': aggregate.quantile(0.95),
+            'histogram': aggregate.histogram_summary(self.SUMMARY_HISTOGRAM_BINS),
+            'box': aggregate.box_summary(self.MAX_BOX_OUTLIERS),
+            'sampler': self.sampler,
+            **self._sampling_summary(profit, aggregate.batches),
             'rarity_breakdown': {}
         }
+        if aggregate.keep_samples:
+            results['all_profits'] = np.concatenate(aggregate.samples['total_profit']).tolist()
         
         # Calcular estadísticas por rareza
-        for rarity, stats in combined_rarity_stats.items():
-            profits = np.array(stats['profits'])
-            trips = np.array(stats['trips'])
-            repairs = np.array(stats['repairs'])
+        for rarity, stats in aggregate.rarity.items():
+            count = stats['count']
             
             results['rarity_breakdown'][rarity] = {
-                'count': stats['count'],
-                'avg_profit': float(np.mean(profits)) / stats['count'],  # Profit per truck
-                'total_profit': float(np.mean(profits)),  # Total profit for all trucks of this rarity
-                'std_profit': float(np.std(profits)),
-                'avg_trips': float(np.mean(trips)) / stats['count'],  # Trips per truck
-                'avg_repairs': float(np.mean(repairs)) / stats['count'],  # Repairs per truck
-                'profit_per_truck': profits.tolist()
+                'count': count,
+                'avg_profit': float(stats['profits'].mean) / count,  # Profit per truck
+                'total_profit': float(stats['profits'].mean),  # Total profit for all trucks of this rarity
+                'std_profit': float(stats['profits'].std),
+                'avg_trips': float(stats['trips'].mean) / count,  # Trips per truck
+                'avg_repairs': float(stats['repairs'].mean) / count  # Repairs per truck
             }
+            if aggregate.keep_samples:
+                results['rarity_breakdown'][rarity]['profit_per_truck'] = np.concatenate(
+                    aggregate.samples['profits'][rarity]
+                ).tolist()
         
-        print(f"Simulación completada: {iterations} iteraciones")
         return results
     
+    def _scenario_key(self, kind, use_repair_tool, referral_tier, **fields):
+        """
+        Huella en la caché de una ejecución
+        
+        El número de procesos no forma parte de la huella porque no cambia el
+        resultado; la huella de la configuración de camiones sí, para que un
+        parche de balance no reutilice resultados de la configuración anterior.
+        
+        Returns:
+            str: Huella o None si no hay caché o la semilla es un generador (no reproducible)
+        """
+        if self.cache is None or isinstance(self.seed, np.random.Generator):
+            return None
+        return scenario_fingerprint(
+            kind=kind, fleet_counts=self.fleet_counts, engine=self.engine,
+            use_repair_tool=bool(use_repair_tool), referral_tier=int(referral_tier),
+            seed=self.seed, sampler=self.sampler, economics=truck_economics.ECONOMICS.fingerprint, **fields
+        )
+    
+    def _cached(self, key, compute):
+        """Devolver el resultado de la caché o calcularlo y guardarlo"""
+        if key is None:
+            return compute()
+        return self.cache.get_or_compute(key, compute)
+    
+    def _instrumented(self, instrumentation, compute):
+        """
+        Ejecutar con instrumentación (sin caché: siempre se mide una ejecución real)
+        
+        Args:
+            instrumentation (Instrumentation): Instrumentación de la ejecución
+            compute (callable): Función sin argumentos que ejecuta la simulación
+            
+        Returns:
+            dict: Resultados con el informe en 'instrumentation'
+        """
+        self.instrumentation = instrumentation
+        instrumentation.start()
+        try:
+            results = compute()
+        finally:
+            instrumentation.stop()
+            self.instrumentation = None
+        results['instrumentation'] = instrumentation.report()
+        instrumentation.notify('complete')
+        return results
+    
+    def _stored(self, directory, time_period, iterations, compute):
+        """
+        Ejecutar escribiendo las muestras de cada bloque en un almacén en disco
+        
+        Args:
+            directory (str): Directorio del almacén (ver sample_store.SampleStore)
+            time_period (str): Período simulado
+            iterations (int): Máximo de iteraciones (capacidad del almacén)
+            compute (callable): Función sin argumentos que ejecuta la simulación
+            
+        Returns:
+            dict: Resultados con el directorio del almacén en 'sample_store'
+        """
+        from sample_store import SampleStoreWriter
+        
+        self.sample_writer = SampleStoreWriter(directory, self.fleet_counts, iterations, {
+            'engine': self.engine,
+            'sampler': self.sampler,
+            'use_repair_tool': bool(self.use_repair_tool),
+            'referral_tier': int(self.referral_tier),
+            'time_period': time_period
+        })
+        complete = False
+        try:
+            results = compute()
+            complete = True
+        finally:
+            writer, self.sample_writer = self.sample_writer, None
+            writer.close(complete, **({'seed': results['seed']} if complete else {}))
+        results['sample_store'] = writer.directory
+        return results
+    
+    def run_simulation(self, time_period, iterations=10000, workers=1, precision=None, keep_samples=False,
+                       instrumentation=None, progress=None, cancel=None, sample_store=None):
+        """
+        Ejecutar simulación Monte Carlo completa
+        
+        Con caché, un escenario ya simulado (misma flota, beneficios, período,
+        iteraciones, semilla y precisión) se devuelve sin volver a simular.
+        
+        Args:
+            time_period (str): Período de tiempo ('1_week', '30_days', '1_year')
+            iterations (int): Número de iteraciones a ejecutar (máximo si hay precision)
+            workers (int): Procesos en paralelo (1 ejecuta en el proceso actual)
+            precision (PrecisionTarget): Ejecutar por lotes hasta alcanzar esta precisión
+            keep_samples (bool): Incluir las muestras crudas ('all_profits' y 'profit_per_truck')
+            instrumentation (Instrumentation): Medir tiempos por etapa y contadores; el
+                informe se añade en 'instrumentation' (con workers > 1 el perfil y la
+                memoria solo cubren el proceso actual)
+            progress (callable): Función progress(informe) llamada tras cada bloque con las
+                iteraciones completadas y la media, el error estándar y el intervalo de
+                confianza parciales de la ganancia
+            cancel (threading.Event): Al activarse, la ejecución se detiene con
+                SimulationCancelled tras el bloque de sorteos en curso (o, con workers > 1,
+                sin esperar a los bloques pendientes del pool)
+            sample_store (str): Directorio donde escribir por bloques las muestras crudas
+                (ganancia de la flota y ganancia, viajes y reparaciones por rareza) en
+                columnas .npy; se leen después con sample_store.SampleStore
+            
+        Returns:
+            dict: Resultados completos de la simulación
+        """
+        if time_period not in self.TIME_PERIODS:
+            raise ValueError(f"Período {time_period} no válido")
+        
+        compute = lambda: self._simulate_results(time_period, iterations, workers, precision, keep_samples)
+        if sample_store is not None:
+            simulate = compute
+            compute = lambda: self._stored(sample_store, time_period, iterations, simulate)
+        
+        with self._observed(progress, cancel):
+            if instrumentation is not None:
+                return self._instrumented(instrumentation, compute)
+            if sample_store is not None:
+                # Las muestras solo existen si se simula: sin caché
+                return compute()
+            
+            key = self._scenario_key(
+                'simulation', self.use_repair_tool, self.referral_tier, time_period=time_period,
+                iterations=iterations, precision=precision, keep_samples=keep_samples
+            )
+            return self._cached(key, compute)
+    
+    def _simulate_results(self, time_period, iterations, workers, precision, keep_samples):
+        """Ejecutar run_simulation sin pasar por la caché"""
+        seed, merged, convergence = self._run_scenarios(
+            [time_period], iterations, workers, [(self.use_repair_tool, self.referral_tier)],
+            precision, keep_samples
+        )
+        with self._timer('statistics'):
+            results = self._build_results(time_period, seed, merged['aggregates'][0][0])
+        if convergence is not None:
+            results['convergence'] = convergence[0]
+        return results
+    
+    def run_multi_horizon(self, horizons=None, iterations=10000, workers=1, precision=None, keep_samples=False,
+                          instrumentation=None, progress=None, cancel=None):
+        """
+        Simular varios horizontes de tiempo en una sola pasada
+        
+        Cada iteración recorre los viajes una vez hasta el horizonte más largo y
+        registra la ganancia acumulada al llegar a cada horizonte, así que los
+        horizontes comparten trayectorias y se simulan al costo del más largo.
+        
+        Args:
+            horizons (list): Períodos ('1_week', '30_days', '1_year') u horas enteras
+                (por defecto todos los de TIME_PERIODS)
+            iterations (int): Número de iteraciones a ejecutar (máximo si hay precision)
+            workers (int): Procesos en paralelo (1 ejecuta en el proceso actual)
+            precision (PrecisionTarget): Ejecutar por lotes hasta alcanzar esta precisión en todos los horizontes
+            keep_samples (bool): Incluir las muestras crudas ('all_profits' y 'profit_per_truck')
+            instrumentation (Instrumentation): Medir tiempos por etapa y contadores (el
+                informe se añade en 'instrumentation' de cada horizonte)
+            progress (callable): Como en run_simulation (estadísticas del primer horizonte)
+            cancel (threading.Event): Como en run_simulation
+            
+        Returns:
+            dict: Resultados completos (como run_simulation) por horizonte
+        """
+        if horizons is None:
+            horizons = list(self.TIME_PERIODS)
+        horizons = list(dict.fromkeys(horizons))
+        if not horizons:
+            raise ValueError("Debe indicarse al menos un horizonte")
+        
+        with self._observed(progress, cancel):
+            if instrumentation is not None:
+                results = self._instrumented(instrumentation, lambda: self._multi_horizon_results(
+                    horizons, iterations, workers, precision, keep_samples
+                ))
+                report = results.pop('instrumentation')
+                for horizon_results in results.values():
+                    horizon_results['instrumentation'] = report
+                return results
+            return self._multi_horizon_results(horizons, iterations, workers, precision, keep_samples)
+    
+    def _multi_horizon_results(self, horizons, iterations, workers, precision, keep_samples):
+        """Ejecutar run_multi_horizon"""
+        seed, merged, convergence = self._run_scenarios(
+            horizons, iterations, workers, [(self.use_repair_tool, self.referral_tier)],
+            precision, keep_samples
+        )
+        
+        results = {}
+        for index, horizon in enumerate(horizons):
+            with self._timer('statistics'):
+                horizon_results = self._build_results(horizon, seed, merged['aggregates'][0][index])
+            horizon_results['time_period_hours'] = self._resolve_horizon(horizon)
+            if convergence is not None:
+                horizon_results['convergence'] = convergence[index]
+            results[horizon] = horizon_results
+        return results
+    
+    def run_comparison(self, time_period, iterations=10000, workers=1,
+                       baseline_repair_tool=False, baseline_referral_tier=0, precision=None,
+                       keep_samples=False, instrumentation=None, progress=None, cancel=None):
+        """
+        Comparar los beneficios configurados contra una línea base en una sola pasada
+        
+        Ambos escenarios se simulan con los mismos números aleatorios, así que la
+        diferencia de ganancia por iteración solo refleja el efecto de los
+        beneficios y su estimación es mucho más precisa que con corridas independientes.
+        
+        Args:
+            time_period (str): Período de tiempo ('1_week', '30_days', '1_year')
+            iterations (int): Número de iteraciones a ejecutar (máximo si hay precision)
+            workers (int): Procesos en paralelo (1 ejecuta en el proceso actual)
+            baseline_repair_tool (bool): Herramienta en la línea base
+            baseline_referral_tier (int): Tier de referido de la línea base
+            precision (PrecisionTarget): Ejecutar por lotes hasta alcanzar esta precisión
+                (evaluada sobre la diferencia media de ganancia)
+            keep_samples (bool): Incluir las muestras crudas y la diferencia por iteración
+            instrumentation (Instrumentation): Medir tiempos por etapa y contadores
+            progress (callable): Como en run_simulation, con la diferencia media parcial
+                ('mean_delta' y su intervalo) además de la ganancia con beneficios
+            cancel (threading.Event): Como en run_simulation
+            
+        Returns:
+            dict: Resultados con beneficios, línea base y diferencia por iteración
+        """
+        if time_period not in self.TIME_PERIODS:
+            raise ValueError(f"Período {time_period} no válido")
+        
+        with self._observed(progress, cancel):
+            if instrumentation is not None:
+                return self._instrumented(instrumentation, lambda: self._compare_results(
+                    time_period, iterations, workers, baseline_repair_tool, baseline_referral_tier,
+                    precision, keep_samples
+                ))
+            
+            key = self._scenario_key(
+                'comparison', self.use_repair_tool, self.referral_tier, time_period=time_period,
+                iterations=iterations, precision=precision, keep_samples=keep_samples,
+                baseline_repair_tool=bool(baseline_repair_tool), baseline_referral_tier=int(baseline_referral_tier)
+            )
+            return self._cached(key, lambda: self._compare_results(
+                time_period, iterations, workers, baseline_repair_tool, baseline_referral_tier, precision, keep_samples
+            ))
+    
+    def _compare_results(self, time_period, iterations, workers, baseline_repair_tool, baseline_referral_tier,
+                         precision, keep_samples):
+        """Ejecutar run_comparison sin pasar por la caché"""
+        seed, merged, convergence = self._run_scenarios(
+            [time_period], iterations, workers,
+            [(self.use_repair_tool, self.referral_tier), (baseline_repair_tool, baseline_referral_tier)],
+            precision, keep_samples
+        )
+        
+        (benefit,), (baseline,) = merged['aggregates']
+        delta = merged['delta'][0]
+        delta_sampling = self._sampling_summary(delta, merged['delta_batches'][0])
+        
+        with self._timer('statistics'):
+            comparison = {
+                'benefit': self._build_results(time_period, seed, benefit),
+                'baseline': self._build_results(time_period, seed, baseline),
+                'mean_delta': float(delta.mean),
+                'std_delta': float(delta.std),
+                'delta_standard_error': (float(delta.std / np.sqrt(delta.count)) if self.sampler == 'pseudo'
+                                         else delta_sampling['standard_error']),
+                'delta_variance_reduction': delta_sampling['variance_reduction'],
+                'seed': seed
+            }
+        if keep_samples:
+            comparison['profit_delta'] = np.concatenate(merged['delta_samples'][0]).tolist()
+        if convergence is not None:
+            comparison['convergence'] = convergence[0]
+        
+        # Sin semilla fija ni parada adaptativa cada escenario de la comparación
+        # también es una simulación válida por sí solo: compartirlo con run_simulation
+        if self.cache is not None and self.seed is None and precision is None:
+            for (use_repair_tool, referral_tier), results in (
+                ((self.use_repair_tool, self.referral_tier), comparison['benefit']),
+                ((baseline_repair_tool, baseline_referral_tier), comparison['baseline'])
+            ):
+                key = self._scenario_key(
+                    'simulation', use_repair_tool, referral_tier, time_period=time_period,
+                    iterations=iterations, precision=precision, keep_samples=keep_samples
+                )
+                if key not in self.cache:
+                    self.cache.put(key, results)
+        return comparison
+    
     def get_fleet_summary(self):
         """
         Obtener resumen de la flota actual
@@ -162,12 +1070,9 @@ class MonteCarloSimulation:
         Returns:
             dict: Resumen de la flota
         """
-        from collections import Counter
-        fleet_count = Counter(self.fleet)
-        
         return {
-            'total_trucks': len(self.fleet),
-            'by_rarity': dict(fleet_count),
+            'total_trucks': self.fleet_size,
+            'by_rarity': dict(self.fleet_counts),
             'fleet_composition': self.fleet
         }
     
@@ -187,47 +1092,276 @@ class MonteCarloSimulation:
         time_period_hours = self.TIME_PERIODS[time_period]
         trips_per_truck = time_period_hours // 12
         
+        economics = truck_economics.ECONOMICS
+        tier = economics.tier_column(self.referral_tier)
+        trips_with_tool = min(economics.tool_trips, trips_per_truck) if self.use_repair_tool else 0
         total_expected_profit = 0
         
-        for truck_rarity in self.fleet:
-            config = TruckSimulator.TRUCK_CONFIG[truck_rarity]
-            
-            # Ganancias esperadas
-            expected_earnings = trips_per_truck * config['earnings_per_trip']
+        for truck_rarity, count in self.fleet_counts.items():
+            economics.validate(truck_rarity)
+            row = economics.table[truck_rarity]
             
-            # Costos esperados
-            fuel_costs = (trips_per_truck // config['fuel_frequency']) * config['fuel_cost']
-            tire_costs = (trips_per_truck // config['tire_frequency']) * config['tire_cost']
+            # Probabilidades de avería de la tabla (reducidas por tier de referido y herramienta)
+            breakdown_prob, reduced_prob = (float(p) for p in row['effective_breakdown'][tier])
+            expected_repairs = trips_with_tool * reduced_prob + (trips_per_truck - trips_with_tool) * breakdown_prob
             
-            # Calcular probabilidad de avería considerando tier de referido y herramienta
-            breakdown_prob = config['breakdown_probability']
-            
-            # Aplicar reducción por tier de referido
-            referral_reduction = {
-                0: 0.0, 1: 0.02, 2: 0.03, 3: 0.05
-            }.get(self.referral_tier, 0.0)
-            breakdown_prob = max(0, breakdown_prob - referral_reduction)
+            # Ganancias menos combustible, gomas y herramienta, menos reparaciones esperadas
+            fixed_profit = economics.fixed_profit(truck_rarity, trips_per_truck, self.use_repair_tool)
+            expected_profit = fixed_profit - expected_repairs * int(row['repair_cost'])
+            total_expected_profit += count * expected_profit
+        
+        return {
+            'expected_profit': total_expected_profit,
+            'trips_per_truck': trips_per_truck,
+            'time_period_hours': time_period_hours
+        }
+    
+    def exact_distribution(self, time_period):
+        """
+        Calcular la distribución exacta de la ganancia de la flota sin muestreo
+        
+        La ganancia es una función afín de una suma de binomiales independientes
+        (una por rareza y ventana de herramienta), así que su función de masa se
+        obtiene convolucionando esas binomiales.
+        
+        Args:
+            time_period (str): Período de tiempo
             
-            if self.use_repair_tool and trips_per_truck > 0:
-                # Reducir probabilidad en 5% para los primeros 2 viajes
-                trips_with_tool = min(2, trips_per_truck)
-                reduced_prob = max(0, breakdown_prob - 0.05)
-                repair_costs = (trips_with_tool * reduced_prob + 
-                               (trips_per_truck - trips_with_tool) * breakdown_prob) * config['repair_cost']
-            else:
-                repair_costs = trips_per_truck * breakdown_prob * config['repair_cost']
+        Returns:
+            dict: Función de masa, percentiles exactos y probabilidad de ganancia positiva
+        """
+        if time_period not in self.TIME_PERIODS:
+            raise ValueError(f"Período {time_period} no válido")
+        
+        if not self.fleet_counts:
+            raise ValueError("La flota no puede estar vacía")
+        
+        time_period_hours = self.TIME_PERIODS[time_period]
+        trips_per_truck = time_period_hours // 12
+        economics = truck_economics.ECONOMICS
+        tier = economics.tier_column(self.referral_tier)
+        tool_trips = min(economics.tool_trips, trips_per_truck) if self.use_repair_tool else 0
+        
+        fixed_profit = 0
+        groups = []
+        rarity_breakdown = {}
+        
+        for rarity, count in self.fleet_counts.items():
+            economics.validate(rarity)
             
-            expected_costs = fuel_costs + tire_costs + repair_costs
+            row = economics.table[rarity]
+            repair_cost = int(row['repair_cost'])
+            base_prob, tool_prob = (float(p) for p in row['effective_breakdown'][tier])
+            truck_fixed = economics.fixed_profit(rarity, trips_per_truck, self.use_repair_tool)
             
-            # Añadir costo de herramienta si está activa
-            if self.use_repair_tool:
-                expected_costs += 1  # Costo de la herramienta
+            fixed_profit += count * truck_fixed
+            groups.append((count * tool_trips, tool_prob, repair_cost))
+            groups.append((count * (trips_per_truck - tool_trips), base_prob, repair_cost))
             
-            expected_profit = expected_earnings - expected_costs
-            total_expected_profit += expected_profit
+            # Momentos exactos por rareza
+            expected_repairs = tool_trips * tool_prob + (trips_per_truck - tool_trips) * base_prob
+            repairs_variance = (tool_trips * tool_prob * (1 - tool_prob) +
+                                (trips_per_truck - tool_trips) * base_prob * (1 - base_prob))
+            rarity_breakdown[rarity] = {
+                'count': count,
+                'avg_profit': truck_fixed - expected_repairs * repair_cost,
+                'total_profit': count * (truck_fixed - expected_repairs * repair_cost),
+                'std_profit': float(np.sqrt(count * repairs_variance)) * repair_cost,
+                'avg_trips': float(trips_per_truck),
+                'avg_repairs': expected_repairs
+            }
+        
+        # Ganancia = fija - costo de reparaciones (orden creciente de ganancia)
+        costs, probabilities = profit_distribution.repair_cost_distribution(groups)
+        profits = (fixed_profit - costs)[::-1]
+        probabilities = probabilities[::-1] / probabilities.sum()
+        
+        mean_profit = float(np.dot(profits, probabilities))
+        variance = float(np.dot((profits - mean_profit) ** 2, probabilities))
+        max_repair_cost = sum(
+            count * trips_per_truck * int(economics.table['repair_cost'][rarity])
+            for rarity, count in self.fleet_counts.items()
+        )
         
         return {
-            'expected_profit': total_expected_profit,
-            'trips_per_truck': trips_per_truck,
-            'time_period_hours': time_period_hours
+            'time_period': time_period,
+            'fleet_size': self.fleet_size,
+            'profit_values': profits.tolist(),
+            'probabilities': probabilities.tolist(),
+            'mean_profit': mean_profit,
+            'std_profit': float(np.sqrt(variance)),
+            'min_profit': float(fixed_profit - max_repair_cost),
+            'max_profit': float(fixed_profit),
+            'median_profit': profit_distribution.quantile(profits, probabilities, 0.50),
+            'positive_probability': float(min(probabilities[profits > 0].sum(), 1.0) * 100),
+            'percentile_5': profit_distribution.quantile(profits, probabilities, 0.05),
+            'percentile_25': profit_distribution.quantile(profits, probabilities, 0.25),
+            'percentile_75': profit_distribution.quantile(profits, probabilities, 0.75),
+            'percentile_95': profit_distribution.quantile(profits, probabilities, 0.95),
+            'rarity_breakdown': rarity_breakdown
+        }
+    
+    def run_tail_risk(self, time_period, iterations=10000, levels=None, confidence=0.95):
+        """
+        Estimar el riesgo de cola de la ganancia por muestreo de importancia
+        
+        Las iteraciones se reparten entre la probabilidad de pérdida y cada nivel
+        de VaR/CVaR. Cada parte muestrea las averías de cada grupo con
+        probabilidades inclinadas hacia su región (ganancia 0, o el cuantil que
+        da la aproximación normal con los momentos exactos) y repondera con la
+        razón de verosimilitudes (ver tail_risk), así que los eventos raros se
+        observan miles de veces en lugar de un puñado. No depende del motor ni
+        del muestreador configurados.
+        
+        Args:
+            time_period (str): Período de tiempo ('1_week', '30_days', '1_year')
+            iterations (int): Iteraciones totales (costo comparable a run_simulation)
+            levels (tuple): Niveles de VaR y CVaR (por defecto tail_risk.DEFAULT_LEVELS: 1% y 5%)
+            confidence (float): Nivel de confianza de los intervalos
+            
+        Returns:
+            dict: Probabilidad de pérdida (%) y VaR y CVaR por nivel (pérdidas en RON,
+                negativas si incluso el peor caso del nivel gana dinero), cada uno con
+                intervalo de confianza, error estándar, factor de reducción de varianza
+                frente a `iterations` iteraciones directas, iteraciones e inclinación usadas
+        """
+        import tail_risk
+        
+        if time_period not in self.TIME_PERIODS:
+            raise ValueError(f"Período {time_period} no válido")
+        if not self.fleet_counts:
+            raise ValueError("La flota no puede estar vacía")
+        levels = tuple(tail_risk.DEFAULT_LEVELS if levels is None else sorted(set(levels)))
+        if not levels or not all(0 < level < 1 for level in levels):
+            raise ValueError("Los niveles de VaR deben estar entre 0 y 1")
+        if not 0 < confidence < 1:
+            raise ValueError("El nivel de confianza debe estar entre 0 y 1")
+        
+        key = self._scenario_key(
+            'tail_risk', self.use_repair_tool, self.referral_tier, time_period=time_period,
+            iterations=iterations, levels=list(levels), confidence=confidence
+        )
+        return self._cached(key, lambda: self._tail_risk_results(time_period, iterations, levels, confidence))
+    
+    def _tail_risk_results(self, time_period, iterations, levels, confidence):
+        """Ejecutar run_tail_risk sin pasar por la caché"""
+        import tail_risk
+        from statistics import NormalDist
+        
+        trips_per_truck = self.TIME_PERIODS[time_period] // 12
+        fixed_profit, trials, probabilities, costs = tail_risk.repair_groups(
+            self.fleet_counts, trips_per_truck, self.use_repair_tool, self.referral_tier
+        )
+        bounds = (fixed_profit - int(np.dot(trials, costs)), fixed_profit)
+        moments = vectorized_engine.profit_moments(
+            self.fleet_counts, trips_per_truck, self.use_repair_tool, self.referral_tier
+        )
+        
+        # Ganancia en la que se centra cada parte: 0 para la pérdida (si es posible) y el
+        # cuantil aproximado de cada nivel
+        targets = [('loss', 0.0)] if bounds[0] < 0 else []
+        targets += [(level, moments['mean'] + NormalDist().inv_cdf(level) * math.sqrt(moments['variance']))
+                    for level in levels]
+        if iterations < 2 * len(targets):
+            raise ValueError(f"Se necesitan al menos {2 * len(targets)} iteraciones")
+        shares = [iterations // len(targets) + (index < iterations % len(targets)) for index in range(len(targets))]
+        
+        seed = self.resolve_seed()
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        results = {
+            'time_period': time_period,
+            'fleet_size': self.fleet_size,
+            'iterations': iterations,
+            'seed': seed,
+            'confidence': confidence,
+            'levels': list(levels),
+            'min_profit': float(bounds[0]),
+            'max_profit': float(bounds[1]),
+            # Sin pérdidas posibles (ni siquiera con todas las averías) la probabilidad es exactamente 0
+            'loss_probability': {
+                'estimate': 0.0, 'standard_error': 0.0, 'ci_low': 0.0, 'ci_high': 0.0,
+                'variance_reduction': math.nan, 'iterations': 0, 'tilt': 0.0
+            },
+            'value_at_risk': {},
+            'expected_shortfall': {}
         }
+        
+        logger.info("Estimando riesgo de cola con %d simulaciones para período de %s...", iterations, time_period)
+        for index, ((target, target_profit), share) in enumerate(zip(targets, shares)):
+            rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+            tilt = tail_risk.solve_tilt(trials, probabilities, costs, fixed_profit - target_profit)
+            profits, weights = tail_risk.sample_tilted(
+                rng, fixed_profit, trials, probabilities, costs, tilt, share
+            )
+            usage = {'iterations': share, 'tilt': tilt}
+            
+            if target == 'loss':
+                loss = tail_risk.weighted_mean((profits < 0).astype(float), weights, iterations)
+                estimate, standard_error = loss['estimate'] * 100, loss['standard_error'] * 100
+                results['loss_probability'] = {
+                    'estimate': estimate,
+                    'standard_error': standard_error,
+                    'ci_low': max(estimate - z * standard_error, 0.0),
+                    'ci_high': min(estimate + z * standard_error, 100.0),
+                    'variance_reduction': loss['variance_reduction'],
+                    **usage
+                }
+            else:
+                value_at_risk, expected_shortfall = tail_risk.tail_estimates(
+                    profits, weights, target, confidence, bounds, iterations
+                )
+                results['value_at_risk'][target] = {**value_at_risk, **usage}
+                results['expected_shortfall'][target] = {**expected_shortfall, **usage}
+        
+        return results
+
+
+def _run_chunk(task, cancel=None):
+    """
+    Ejecutar un bloque de iteraciones (nivel de módulo para poder enviarlo a otro proceso)
+    
+    Args:
+        task (dict): Tarea generada por MonteCarloSimulation._chunk_tasks
+        cancel (threading.Event): Evento de cancelación (solo en el proceso actual)
+        
+    Returns:
+        dict: Agregados combinables del bloque por escenario
+    """
+    simulation = MonteCarloSimulation(task['fleet_counts'], engine=task['engine'], sampler=task['sampler'])
+    simulation.cancel = cancel
+    if task.get('instrument'):
+        from instrumentation import Instrumentation
+        simulation.instrumentation = Instrumentation()
+    rng = np.random.default_rng(task['seed_sequence'])
+    
+    with simulation._timer('trip_simulation'):
+        scenario_samples = simulation._simulate_chunk(
+            task['horizon_hours'], task['iterations'], rng, task['scenarios']
+        )
+    with simulation._timer('aggregation'):
+        chunk = simulation._aggregate_chunk(
+            task['horizon_hours'], task['scenarios'], scenario_samples, task['keep_samples']
+        )
+    
+    instrumentation = simulation.instrumentation
+    if instrumentation is not None:
+        # Viajes y averías hasta el horizonte más largo, sumados en todos los escenarios
+        longest = max(range(len(task['horizon_hours'])), key=lambda index: task['horizon_hours'][index])
+        trips_per_truck = task['horizon_hours'][longest] // 12
+        instrumentation.count('chunks')
+        instrumentation.count('iterations', task['iterations'])
+        instrumentation.count('trips', task['iterations'] * simulation.fleet_size * trips_per_truck * len(task['scenarios']))
+        for horizon_samples in scenario_samples:
+            for samples in horizon_samples:
+                instrumentation.count('sample_bytes', samples['total_profit'].nbytes + sum(
+                    stats[key].nbytes for stats in samples['rarity_stats'].values()
+                    for key in ('profits', 'trips', 'repairs')
+                ))
+            instrumentation.count('breakdowns', int(sum(
+                stats['repairs'].sum() for stats in horizon_samples[longest]['rarity_stats'].values()
+            )))
+        chunk['instrumentation'] = instrumentation.report()
+    if task.get('store_samples'):
+        # Muestras crudas del primer escenario y horizonte para el almacén en disco
+        chunk['samples'] = scenario_samples[0][0]
+    return chunk
@@ -0,0 +1,126 @@
+import math
+from functools import reduce
+import numpy as np
+
+# Probabilidades por debajo de este umbral se descartan en las colas
+PMF_TOLERANCE = 1e-15
+
+# Desviaciones estándar alrededor de la media que cubre cada binomial
+TAIL_SIGMAS = 12
+
+# A partir de este tamaño se convoluciona con FFT
+FFT_THRESHOLD = 1 << 16
+
+
+def binomial_pmf(n, p):
+    """
+    Función de masa de una binomial truncada a su soporte relevante
+
+    Args:
+        n (int): Número de ensayos
+        p (float): Probabilidad de éxito
+
+    Returns:
+        tuple: (primer valor del soporte, array de probabilidades)
+    """
+    if n == 0 or p <= 0:
+        return 0, np.ones(1)
+    if p >= 1:
+        return n, np.ones(1)
+
+    mean = n * p
+    sd = math.sqrt(n * p * (1 - p))
+    low = max(0, int(math.floor(mean - TAIL_SIGMAS * sd)) - 1)
+    high = min(n, int(math.ceil(mean + TAIL_SIGMAS * sd)) + 1)
+
+    k = np.arange(low, high + 1)
+    lgamma = np.frompyfunc(math.lgamma, 1, 1)
+    log_pmf = (
+        math.lgamma(n + 1)
+        - lgamma(k + 1).astype(float)
+        - lgamma(n - k + 1).astype(float)
+        + k * math.log(p)
+        + (n - k) * math.log1p(-p)
+    )
+    pmf = np.exp(log_pmf - log_pmf.max())
+
+    keep = np.flatnonzero(pmf >= PMF_TOLERANCE * pmf.max())
+    pmf = pmf[keep[0]:keep[-1] + 1]
+    return low + int(keep[0]), pmf / pmf.sum()
+
+
+def convolve(a, b):
+    """
+    Convolución de dos funciones de masa (directa o por FFT según tamaño)
+
+    Returns:
+        np.ndarray: Función de masa de la suma
+    """
+    if min(len(a), len(b)) < 64 or len(a) * len(b) < FFT_THRESHOLD:
+        return np.convolve(a, b)
+
+    size = len(a) + len(b) - 1
+    fft_size = 1 << (size - 1).bit_length()
+    result = np.fft.irfft(np.fft.rfft(a, fft_size) * np.fft.rfft(b, fft_size), fft_size)[:size]
+    np.clip(result, 0, None, out=result)
+    return result / result.sum()
+
+
+def repair_cost_distribution(groups):
+    """
+    Distribución exacta del costo total de reparaciones
+
+    Cada grupo aporta costo × Binomial(ensayos, probabilidad). Los grupos con
+    el mismo costo se suman en unidades de averías y luego se combinan en la
+    retícula del máximo común divisor de los costos.
+
+    Args:
+        groups (list): Tuplas (ensayos, probabilidad, costo de reparación)
+
+    Returns:
+        tuple: (valores de costo, probabilidades) ordenados por costo creciente
+    """
+    by_cost = {}
+    for trials, probability, cost in groups:
+        offset, pmf = binomial_pmf(trials, probability)
+        if cost in by_cost:
+            prev_offset, prev_pmf = by_cost[cost]
+            by_cost[cost] = (prev_offset + offset, convolve(prev_pmf, pmf))
+        else:
+            by_cost[cost] = (offset, pmf)
+
+    costs = [cost for cost in by_cost if cost > 0]
+    if not costs:
+        return np.zeros(1), np.ones(1)
+    unit = reduce(math.gcd, costs)
+
+    offset_units = 0
+    total = np.ones(1)
+    for cost in sorted(costs):
+        offset, pmf = by_cost[cost]
+        step = cost // unit
+        stretched = np.zeros((len(pmf) - 1) * step + 1)
+        stretched[::step] = pmf
+        offset_units += offset * step
+        total = convolve(total, stretched)
+
+    values = (offset_units + np.arange(len(total))) * unit
+    support = total > 0
+    return values[support].astype(float), total[support]
+
+
+def quantile(values, probabilities, q):
+    """
+    Cuantil exacto de una distribución discreta
+
+    Args:
+        values (np.ndarray): Valores ordenados de forma creciente
+        probabilities (np.ndarray): Probabilidad de cada valor
+        q (float): Nivel del cuantil (0-1)
+
+    Returns:
+        float: Menor valor cuya probabilidad acumulada alcanza q
+    """
+    cdf = np.cumsum(probabilities)
+    index = min(int(np.searchsorted(cdf, q * cdf[-1])), len(values) - 1)
+    return float(values[index])
@@ -0,0 +1,185 @@
+import copy
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+
+# Versión del formato de las claves; cambiarla invalida los resultados guardados
+CACHE_VERSION = 1
+
+
+def scenario_fingerprint(**fields):
+    """
+    Huella canónica de un escenario de simulación
+
+    La flota se normaliza como multiconjunto de rarezas (el orden de los
+    camiones no cambia el resultado) y los campos se serializan con claves
+    ordenadas, así que escenarios equivalentes producen la misma huella.
+
+    Args:
+        **fields: Campos que determinan el resultado (flota, beneficios, período, semilla...)
+
+    Returns:
+        str: Huella hexadecimal SHA-256
+    """
+    canonical = {'version': CACHE_VERSION}
+    for name, value in fields.items():
+        if name == 'fleet_counts':
+            value = sorted((int(rarity), int(count)) for rarity, count in value.items() if count > 0)
+        canonical[name] = value
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=_canonical_value)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _canonical_value(value):
+    """Representación JSON de valores no nativos (enteros de NumPy, objetivos de precisión)"""
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, '__dict__'):
+        return {type(value).__name__: vars(value)}
+    raise TypeError(f"Valor {value!r} no admitido en la huella")
+
+
+class ResultCache:
+    """
+    Caché de resultados de simulación: LRU en memoria y almacén opcional en disco
+    """
+
+    def __init__(self, max_entries=128, directory=None, max_disk_bytes=256 * 1024 * 1024):
+        """
+        Inicializar caché
+
+        Args:
+            max_entries (int): Resultados que se conservan en memoria
+            directory (str): Carpeta del almacén en disco (None lo desactiva)
+            max_disk_bytes (int): Tamaño máximo del almacén en disco; al superarlo
+                se eliminan los resultados usados hace más tiempo
+        """
+        if max_entries < 0:
+            raise ValueError("El número de entradas no puede ser negativo")
+
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries or (self.directory is not None and os.path.exists(self._path(key)))
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _remember(self, key, value):
+        """Guardar en la LRU en memoria y descartar la entrada menos reciente si sobra"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Buscar un resultado
+
+        Args:
+            key (str): Huella del escenario
+
+        Returns:
+            dict: Copia del resultado guardado o None si no existe
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(self._entries[key])
+
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as file:
+                    value = pickle.load(file)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                value = None
+            if value is not None:
+                # Marcar como usado recientemente para la expulsión por tamaño
+                os.utime(path)
+                self._remember(key, value)
+                self.hits += 1
+                return copy.deepcopy(value)
+
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """
+        Guardar un resultado
+
+        Args:
+            key (str): Huella del escenario
+            value (dict): Resultado a guardar (se almacena una copia)
+        """
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+
+        if self.directory is not None:
+            path = self._path(key)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, 'wb') as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+            self._evict_disk()
+
+    def get_or_compute(self, key, compute):
+        """
+        Devolver el resultado guardado o calcularlo y guardarlo
+
+        Args:
+            key (str): Huella del escenario
+            compute (callable): Función sin argumentos que calcula el resultado
+
+        Returns:
+            dict: Resultado
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _evict_disk(self):
+        """Eliminar los resultados usados hace más tiempo hasta respetar max_disk_bytes"""
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """Vaciar la memoria y el almacén en disco"""
+        self._entries.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.directory, name))
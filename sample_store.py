@@ -0,0 +1,263 @@
+"""
+Almacén en disco de las muestras crudas de una simulación
+
+Cada columna es un archivo .npy de enteros de 64 bits que se escribe por
+bloques mientras avanza la simulación y se lee con memoria mapeada, así que
+las muestras nunca tienen que caber enteras en RAM:
+
+    simulation.run_simulation('1_year', iterations=1_000_000, sample_store='muestras/')
+    store = SampleStore('muestras/')
+    store.percentile('total_profit', [5, 50, 95])
+    store.stats('rarity_1_profit', where=lambda chunk: chunk['total_profit'] < 0)
+
+Columnas: total_profit (ganancia de la flota por iteración) y, por cada
+rareza r de la flota, rarity_r_profit, rarity_r_trips y rarity_r_repairs
+(sumas sobre los camiones de esa rareza).
+"""
+import json
+import os
+import numpy as np
+from numpy.lib.format import open_memmap
+from streaming_stats import RunningStats, ProfitHistogram
+
+STORE_VERSION = 1
+
+# Archivo con la descripción del almacén (columnas, filas escritas y escenario)
+METADATA_FILE = 'store.json'
+
+# Filas por bloque al recorrer el almacén
+READ_CHUNK_ROWS = 1 << 16
+
+# Campos por rareza: nombre de la columna y clave en las muestras de los motores
+RARITY_FIELDS = (('profit', 'profits'), ('trips', 'trips'), ('repairs', 'repairs'))
+
+
+def rarity_column(rarity, field):
+    """Nombre de la columna de un campo ('profit', 'trips' o 'repairs') de una rareza"""
+    return f"rarity_{rarity}_{field}"
+
+
+def _write_metadata(directory, metadata):
+    """Escribir la descripción de forma atómica"""
+    path = os.path.join(directory, METADATA_FILE)
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as stream:
+        json.dump(metadata, stream, indent=2)
+    os.replace(temporary, path)
+
+
+class SampleStoreWriter:
+    """
+    Escritura por bloques de las muestras de una simulación en columnas .npy
+    """
+
+    def __init__(self, directory, fleet_counts, capacity, metadata=None):
+        """
+        Crear el almacén (reemplaza uno anterior en el mismo directorio)
+
+        Args:
+            directory (str): Directorio del almacén
+            fleet_counts (dict): Cantidad de camiones por rareza
+            capacity (int): Máximo de filas (iteraciones) a escribir
+            metadata (dict): Descripción del escenario a guardar junto a las columnas
+        """
+        if capacity < 1:
+            raise ValueError("La capacidad del almacén debe ser positiva")
+
+        self.directory = os.fspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._remove_previous()
+        self.columns = ['total_profit'] + [
+            rarity_column(rarity, field) for rarity in sorted(fleet_counts) for field, _ in RARITY_FIELDS
+        ]
+        self.capacity = capacity
+        self.rows = 0
+        self.metadata = {
+            'version': STORE_VERSION,
+            'columns': self.columns,
+            'rows': 0,
+            'capacity': capacity,
+            'complete': False,
+            'fleet_counts': {str(rarity): count for rarity, count in sorted(fleet_counts.items())},
+            **(metadata or {})
+        }
+
+        # La descripción primero: un almacén a medio escribir se reconoce como incompleto
+        _write_metadata(self.directory, self.metadata)
+        self._arrays = {
+            column: open_memmap(os.path.join(self.directory, f"{column}.npy"), mode='w+',
+                                dtype=np.int64, shape=(capacity,))
+            for column in self.columns
+        }
+
+    def _remove_previous(self):
+        """Borrar las columnas de un almacén anterior en el mismo directorio"""
+        path = os.path.join(self.directory, METADATA_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as stream:
+            columns = json.load(stream).get('columns', [])
+        for column in columns:
+            column_path = os.path.join(self.directory, f"{column}.npy")
+            if os.path.exists(column_path):
+                os.remove(column_path)
+        os.remove(path)
+
+    def append(self, samples):
+        """
+        Escribir las muestras de un bloque a continuación de las anteriores
+
+        Args:
+            samples (dict): Ganancia total por iteración y estadísticas por rareza
+                (formato de MonteCarloSimulation._simulate_chunk)
+        """
+        size = len(samples['total_profit'])
+        if self.rows + size > self.capacity:
+            raise ValueError("El bloque excede la capacidad del almacén")
+
+        rows = slice(self.rows, self.rows + size)
+        self._arrays['total_profit'][rows] = samples['total_profit']
+        for rarity, stats in samples['rarity_stats'].items():
+            for field, key in RARITY_FIELDS:
+                self._arrays[rarity_column(rarity, field)][rows] = stats[key]
+        self.rows += size
+
+    def close(self, complete=True, **metadata):
+        """
+        Volcar las columnas a disco y registrar las filas escritas
+
+        Args:
+            complete (bool): Si la simulación terminó (False si se canceló o falló)
+            **metadata: Datos adicionales del escenario (p. ej. la semilla usada)
+        """
+        for array in self._arrays.values():
+            array.flush()
+        self._arrays = {}
+        self.metadata.update(metadata, rows=self.rows, complete=complete)
+        _write_metadata(self.directory, self.metadata)
+
+
+class SampleStore:
+    """
+    Lectura con memoria mapeada de un almacén de muestras
+
+    Las estadísticas se calculan recorriendo las columnas por bloques de
+    READ_CHUNK_ROWS filas, con memoria constante.
+    """
+
+    def __init__(self, directory):
+        """
+        Abrir un almacén existente
+
+        Args:
+            directory (str): Directorio del almacén
+        """
+        self.directory = os.fspath(directory)
+        path = os.path.join(self.directory, METADATA_FILE)
+        if not os.path.exists(path):
+            raise ValueError(f"No hay un almacén de muestras en {self.directory}")
+        with open(path, encoding='utf-8') as stream:
+            self.metadata = json.load(stream)
+        if self.metadata.get('version') != STORE_VERSION:
+            raise ValueError(f"Versión de almacén {self.metadata.get('version')} no compatible")
+
+        self.columns = list(self.metadata['columns'])
+        self.rows = self.metadata['rows']
+        self._arrays = {}
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, column):
+        """Columna completa como array de solo lectura mapeado en memoria"""
+        if column not in self.columns:
+            raise ValueError(f"Columna {column} no válida")
+        if column not in self._arrays:
+            self._arrays[column] = np.load(os.path.join(self.directory, f"{column}.npy"), mmap_mode='r')
+        return self._arrays[column][:self.rows]
+
+    def iter_chunks(self, columns=None, chunk_size=READ_CHUNK_ROWS):
+        """
+        Recorrer el almacén por bloques de filas
+
+        Args:
+            columns (list): Columnas a leer (por defecto todas)
+            chunk_size (int): Filas por bloque
+
+        Yields:
+            dict: Array de cada columna para las filas del bloque
+        """
+        columns = self.columns if columns is None else list(columns)
+        arrays = {column: self[column] for column in columns}
+        for start in range(0, self.rows, chunk_size):
+            yield {column: np.asarray(array[start:start + chunk_size]) for column, array in arrays.items()}
+
+    def _values(self, column, where):
+        """Valores de una columna por bloques, filtrados por where(bloque) si se indica"""
+        for chunk in self.iter_chunks(None if where is not None else [column]):
+            values = chunk[column]
+            yield values if where is None else values[np.asarray(where(chunk), dtype=bool)]
+
+    def _running_stats(self, column, where):
+        """Estadísticas en línea de una columna"""
+        if column not in self.columns:
+            raise ValueError(f"Columna {column} no válida")
+        stats = RunningStats()
+        for values in self._values(column, where):
+            stats.update(values)
+        return stats
+
+    def stats(self, column, where=None):
+        """
+        Estadísticas de una columna
+
+        Args:
+            column (str): Columna a resumir
+            where (callable): Función where(bloque) que devuelve la máscara de filas a
+                incluir; recibe un dict con todas las columnas del bloque
+
+        Returns:
+            dict: Filas, media, desviación estándar, mínimo, máximo y % de valores positivos
+        """
+        stats = self._running_stats(column, where)
+        if stats.count == 0:
+            return {'count': 0, 'mean': np.nan, 'std': np.nan, 'min': np.nan, 'max': np.nan,
+                    'positive_probability': np.nan}
+        return {
+            'count': stats.count,
+            'mean': float(stats.mean),
+            'std': float(stats.std),
+            'min': float(stats.min),
+            'max': float(stats.max),
+            'positive_probability': float(stats.positives / stats.count * 100)
+        }
+
+    def percentile(self, column, q, where=None):
+        """
+        Percentiles de una columna (misma convención que np.percentile)
+
+        Se recorre el almacén dos veces: una para el rango y otra para un
+        histograma de enteros, exacto mientras el rango no supere
+        MAX_HISTOGRAM_BINS valores.
+
+        Args:
+            column (str): Columna
+            q (float | list): Percentil o percentiles (0-100)
+            where (callable): Filtro de filas como en stats()
+
+        Returns:
+            float | list: Percentil o lista de percentiles
+        """
+        levels = np.atleast_1d(np.asarray(q, dtype=float))
+        if np.any((levels < 0) | (levels > 100)):
+            raise ValueError("Los percentiles deben estar entre 0 y 100")
+
+        stats = self._running_stats(column, where)
+        if stats.count == 0:
+            values = [np.nan] * len(levels)
+        else:
+            histogram = ProfitHistogram(stats.min, stats.max)
+            for chunk_values in self._values(column, where):
+                histogram.update(chunk_values)
+            values = [histogram.quantile(level / 100, stats.min, stats.max) for level in levels]
+        return values if np.ndim(q) else values[0]
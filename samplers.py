@@ -0,0 +1,214 @@
+"""
+Fuentes de uniformes para el muestreo por bloques de la simulación
+
+Cada bloque de iteraciones es una réplica independiente: una aleatorización
+propia (a partir del generador del bloque) de los primeros puntos de la
+secuencia, así que las medias de los bloques son independientes entre sí y
+el error estándar de la media se estima entre bloques (medias por lotes).
+
+Muestreadores:
+    'pseudo': números pseudoaleatorios independientes
+    'antithetic': pares (u, 1 - u) de variables antitéticas
+    'stratified': hipercubo latino (una muestra por estrato en cada dimensión)
+    'sobol': secuencia de Sobol con mezcla lineal aleatoria y desplazamiento digital
+    'halton': secuencia de Halton con permutaciones aleatorias de dígitos
+"""
+import math
+import numpy as np
+
+SAMPLERS = ('pseudo', 'antithetic', 'stratified', 'sobol', 'halton')
+
+# Bits de los puntos de Sobol (resolución 2^-32)
+SOBOL_BITS = 32
+
+# Polinomios primitivos y números de dirección iniciales de Joe y Kuo
+# (new-joe-kuo-6.21201) de las primeras dimensiones de Sobol
+SOBOL_DIRECTIONS = (
+    (1, ()), (3, (1,)), (7, (1, 3)), (11, (1, 3, 1)), (13, (1, 1, 1)), (19, (1, 1, 3, 3)),
+    (25, (1, 3, 5, 13)), (37, (1, 1, 5, 5, 17)), (41, (1, 1, 5, 5, 5)), (47, (1, 1, 7, 11, 19)),
+    (55, (1, 1, 5, 1, 1)), (59, (1, 1, 1, 3, 11)), (61, (1, 3, 5, 5, 31)),
+    (67, (1, 3, 3, 9, 7, 49)), (91, (1, 1, 1, 15, 21, 21)), (97, (1, 3, 1, 13, 27, 49)),
+    (103, (1, 1, 1, 15, 7, 5)), (109, (1, 3, 1, 15, 13, 25)), (115, (1, 1, 5, 5, 19, 61)),
+    (131, (1, 3, 7, 11, 23, 15, 103)), (137, (1, 3, 7, 13, 13, 15, 69)),
+    (143, (1, 1, 3, 13, 7, 35, 63)), (145, (1, 3, 5, 9, 1, 25, 53)),
+    (157, (1, 3, 1, 13, 9, 35, 107)), (167, (1, 3, 1, 5, 27, 61, 31)),
+    (171, (1, 1, 5, 11, 19, 41, 61)), (185, (1, 3, 5, 3, 3, 13, 69)),
+    (191, (1, 1, 7, 13, 1, 19, 1)), (193, (1, 3, 7, 5, 13, 19, 59)),
+    (203, (1, 1, 3, 9, 25, 29, 41)), (211, (1, 3, 5, 13, 23, 1, 55)),
+    (213, (1, 3, 7, 3, 13, 59, 17)), (229, (1, 3, 1, 3, 5, 53, 69)),
+    (239, (1, 1, 5, 5, 23, 33, 13)), (241, (1, 1, 7, 7, 1, 61, 123)),
+    (247, (1, 1, 7, 9, 13, 61, 49)), (253, (1, 3, 3, 5, 3, 55, 33)),
+    (285, (1, 3, 1, 15, 31, 13, 49, 245)), (299, (1, 3, 5, 15, 31, 59, 63, 97)),
+    (301, (1, 3, 1, 11, 11, 11, 77, 249)), (333, (1, 3, 1, 11, 27, 43, 71, 9)),
+    (351, (1, 1, 7, 15, 21, 11, 81, 45)), (355, (1, 3, 7, 3, 25, 31, 65, 79)),
+    (357, (1, 3, 1, 1, 19, 11, 3, 205)), (361, (1, 1, 5, 9, 19, 21, 29, 157)),
+    (369, (1, 3, 7, 11, 1, 33, 89, 185)), (391, (1, 3, 3, 3, 15, 9, 79, 71)),
+    (397, (1, 3, 7, 11, 15, 39, 119, 27)), (425, (1, 1, 3, 1, 11, 31, 97, 225)),
+    (451, (1, 1, 1, 3, 23, 43, 57, 177)), (463, (1, 3, 7, 7, 17, 17, 37, 71)),
+    (487, (1, 3, 1, 5, 27, 63, 123, 213)), (501, (1, 1, 3, 5, 11, 43, 53, 133)),
+    (529, (1, 3, 5, 5, 29, 17, 47, 173, 479)), (539, (1, 3, 3, 11, 3, 1, 109, 9, 69)),
+    (545, (1, 1, 1, 5, 17, 39, 23, 5, 343)), (557, (1, 3, 1, 5, 25, 15, 31, 103, 499)),
+    (563, (1, 1, 1, 11, 11, 17, 63, 105, 183)), (601, (1, 1, 5, 11, 9, 29, 97, 231, 363)),
+    (607, (1, 1, 5, 15, 19, 45, 41, 7, 383)), (617, (1, 3, 7, 7, 31, 19, 83, 137, 221)),
+    (623, (1, 1, 1, 3, 23, 15, 111, 223, 83)), (631, (1, 1, 5, 13, 31, 15, 55, 25, 161)),
+    (637, (1, 1, 3, 13, 25, 47, 39, 87, 257))
+
+)
+
+# Dígitos de cada punto de Halton (los que quedan por encima de la precisión de un float)
+HALTON_PRECISION_BITS = 53
+
+
+def _sobol_directions(dimension, bits):
+    """
+    Números de dirección de una dimensión de Sobol
+
+    Args:
+        dimension (int): Dimensión (desde 0)
+        bits (int): Números de dirección a calcular
+
+    Returns:
+        list: Enteros de SOBOL_BITS bits, uno por bit del índice del punto
+    """
+    poly, initial = SOBOL_DIRECTIONS[dimension]
+    degree = poly.bit_length() - 1
+    m = list(initial) if degree else [1] * bits
+    for k in range(len(m), bits):
+        # m_k = 2^s m_{k-s} xor m_{k-s} xor sum_i 2^i a_i m_{k-i}
+        value = m[k - degree] ^ (m[k - degree] << degree)
+        for i in range(1, degree):
+            if (poly >> (degree - i)) & 1:
+                value ^= m[k - i] << i
+        m.append(value)
+    return [m[k] << (SOBOL_BITS - 1 - k) for k in range(bits)]
+
+
+def _linear_scramble(rng, directions):
+    """
+    Multiplicar (en GF(2)) los números de dirección por una matriz triangular inferior aleatoria
+
+    Args:
+        rng (np.random.Generator): Generador de la matriz
+        directions (np.ndarray): Números de dirección de una dimensión (uint64)
+
+    Returns:
+        np.ndarray: Números de dirección mezclados
+    """
+    # Columna c de la matriz: bit c (de mayor a menor) y bits aleatorios por debajo
+    bits = np.uint64(1) << np.arange(SOBOL_BITS - 1, -1, -1, dtype=np.uint64)
+    columns = bits | (rng.integers(1 << SOBOL_BITS, size=SOBOL_BITS, dtype=np.uint64) & (bits - np.uint64(1)))
+    scrambled = np.zeros_like(directions)
+    for bit, column in zip(bits, columns):
+        scrambled ^= np.where(directions & bit, column, np.uint64(0))
+    return scrambled
+
+
+def sobol(rng, size, dimensions):
+    """
+    Primeros `size` puntos de Sobol aleatorizados
+
+    La mezcla lineal de Matoušek y el desplazamiento digital se sortean con
+    `rng`, así que cada llamada es una réplica independiente e insesgada.
+
+    Args:
+        rng (np.random.Generator): Generador de la aleatorización
+        size (int): Número de puntos
+        dimensions (int): Dimensiones de cada punto
+
+    Returns:
+        np.ndarray: Puntos en [0, 1) por (punto, dimensión)
+    """
+    if dimensions > len(SOBOL_DIRECTIONS):
+        raise ValueError(
+            f"El muestreo 'sobol' admite hasta {len(SOBOL_DIRECTIONS)} dimensiones ({dimensions} pedidas); "
+            "use 'halton'"
+        )
+    bits = max(1, (size - 1).bit_length())
+    index = np.arange(size, dtype=np.uint64)
+    points = np.empty((size, dimensions))
+    for dimension in range(dimensions):
+        directions = _linear_scramble(rng, np.array(_sobol_directions(dimension, bits), dtype=np.uint64))
+        values = np.full(size, rng.integers(1 << SOBOL_BITS), dtype=np.uint64)
+        for k, direction in enumerate(directions):
+            values ^= np.where((index >> np.uint64(k)) & np.uint64(1), direction, np.uint64(0))
+        points[:, dimension] = values / float(1 << SOBOL_BITS)
+    return points
+
+
+def _primes(count):
+    """Primeros `count` números primos"""
+    primes = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % prime for prime in primes if prime * prime <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+def halton(rng, size, dimensions):
+    """
+    Primeros `size` puntos de Halton aleatorizados
+
+    Cada dígito de cada dimensión pasa por una permutación aleatoria de la
+    base (sorteada con `rng`), lo que rompe las correlaciones entre bases
+    primas grandes y hace insesgado cada punto.
+
+    Args:
+        rng (np.random.Generator): Generador de la aleatorización
+        size (int): Número de puntos
+        dimensions (int): Dimensiones de cada punto
+
+    Returns:
+        np.ndarray: Puntos en [0, 1) por (punto, dimensión)
+    """
+    index = np.arange(size)
+    points = np.empty((size, dimensions))
+    for dimension, base in enumerate(_primes(dimensions)):
+        digits = math.ceil(HALTON_PRECISION_BITS / math.log2(base))
+        values = np.zeros(size)
+        remaining = index.copy()
+        scale = 1.0 / base
+        for _ in range(digits):
+            values += rng.permutation(base)[remaining % base] * scale
+            remaining //= base
+            scale /= base
+        points[:, dimension] = values
+    return np.minimum(points, np.nextafter(1.0, 0.0))
+
+
+def latin_hypercube(rng, size, dimensions):
+    """Hipercubo latino: en cada dimensión, un punto en cada intervalo [i/size, (i+1)/size)"""
+    strata = np.argsort(rng.random((dimensions, size)), axis=1).T
+    return (strata + rng.random((size, dimensions))) / size
+
+
+def antithetic(rng, size, dimensions):
+    """Pares antitéticos: los puntos de la segunda mitad son 1 - u de los de la primera"""
+    half = rng.random((-(-size // 2), dimensions))
+    return np.concatenate([half, 1.0 - half])[:size]
+
+
+def uniforms(sampler, rng, size, dimensions):
+    """
+    Uniformes de una réplica del muestreador
+
+    Args:
+        sampler (str): Muestreador (ver SAMPLERS)
+        rng (np.random.Generator): Generador del bloque
+        size (int): Número de puntos (iteraciones del bloque)
+        dimensions (int): Dimensiones de cada punto
+
+    Returns:
+        np.ndarray: Uniformes por (punto, dimensión)
+    """
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Muestreo {sampler} no válido")
+    if sampler == 'pseudo':
+        return rng.random((size, dimensions))
+    return {
+        'antithetic': antithetic,
+        'stratified': latin_hypercube,
+        'sobol': sobol,
+        'halton': halton
+    }[sampler](rng, size, dimensions)
@@ -0,0 +1,150 @@
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from monte_carlo import MonteCarloSimulation
+
+
+def _cell_key(simulation, scenario, time_period, iterations, grid):
+    """
+    Huella en la caché de una celda del barrido
+
+    Sin semilla fija cualquier simulación del escenario es válida, así que la
+    celda comparte la huella de run_simulation. Con semilla, el resultado
+    depende de los demás escenarios y horizontes simulados a la vez (grid).
+    """
+    if simulation.seed is None:
+        return simulation._scenario_key(
+            'simulation', *scenario, time_period=time_period, iterations=iterations,
+            precision=None, keep_samples=False
+        )
+    return simulation._scenario_key(
+        'sweep', *scenario, time_period=time_period, iterations=iterations, grid=grid
+    )
+
+
+def _sweep_fleet(task):
+    """
+    Simular todos los escenarios y períodos pendientes de una flota en una pasada
+
+    Args:
+        task (dict): Flota, motor, semilla, iteraciones, escenarios y períodos
+
+    Returns:
+        dict: Resultados por (escenario, período)
+    """
+    simulation = MonteCarloSimulation(task['fleet_counts'], engine=task['engine'], seed=task['seed'])
+    seed, merged, _ = simulation._run_scenarios(
+        task['periods'], task['iterations'], 1, task['scenarios']
+    )
+
+    results = {}
+    for scenario, scenario_aggregates in zip(task['scenarios'], merged['aggregates']):
+        for time_period, aggregate in zip(task['periods'], scenario_aggregates):
+            results[(scenario, time_period)] = simulation._build_results(time_period, seed, aggregate)
+    return results
+
+
+def run_sweep(fleets, referral_tiers=(0, 1, 2, 3), repair_tools=(False, True), periods=None,
+              iterations=10000, engine='binomial', seed=None, workers=1, cache=None):
+    """
+    Evaluar una rejilla de flotas × tier de referido × herramienta × período
+
+    Cada flota se simula una sola vez para todos sus escenarios y períodos:
+    los escenarios comparten los números aleatorios y los períodos las
+    trayectorias de viajes. Las flotas repetidas (como multiconjunto de
+    rarezas) y las celdas ya guardadas en la caché no se vuelven a simular.
+
+    Args:
+        fleets (list): Flotas (lista de rarezas o {rareza: cantidad})
+        referral_tiers (iterable): Tiers de referido a evaluar
+        repair_tools (iterable): Valores de use_repair_tool a evaluar
+        periods (iterable): Períodos ('1_week', '30_days', '1_year'; por defecto todos)
+        iterations (int): Iteraciones por flota
+        engine (str): Motor de simulación ('binomial' no depende del número de viajes)
+        seed (int): Semilla común a todas las flotas (None usa entropía nueva por flota)
+        workers (int): Procesos en paralelo (se reparten flotas)
+        cache (ResultCache): Caché de resultados
+
+    Returns:
+        pd.DataFrame: Una fila por flota, escenario y período con sus estadísticas
+    """
+    periods = list(dict.fromkeys(periods or MonteCarloSimulation.TIME_PERIODS))
+    scenarios = [
+        (bool(use_repair_tool), int(referral_tier))
+        for use_repair_tool in dict.fromkeys(repair_tools)
+        for referral_tier in dict.fromkeys(referral_tiers)
+    ]
+    if not scenarios or not periods:
+        raise ValueError("La rejilla de escenarios no puede estar vacía")
+    for time_period in periods:
+        if time_period not in MonteCarloSimulation.TIME_PERIODS:
+            raise ValueError(f"Período {time_period} no válido")
+
+    # Flotas únicas en forma canónica, en orden de aparición
+    fleet_list = list({
+        MonteCarloSimulation.fleet_label(fleet_counts): dict(sorted(fleet_counts.items()))
+        for fleet_counts in map(MonteCarloSimulation.count_fleet, fleets)
+    }.values())
+    if any(not fleet_counts for fleet_counts in fleet_list):
+        raise ValueError("La flota no puede estar vacía")
+
+    grid = [periods, scenarios]
+    cells = {}
+    tasks = []
+    for fleet_index, fleet_counts in enumerate(fleet_list):
+        simulation = MonteCarloSimulation(fleet_counts, engine=engine, seed=seed, cache=cache)
+        missing = []
+        for scenario in scenarios:
+            for time_period in periods:
+                key = _cell_key(simulation, scenario, time_period, iterations, grid)
+                results = cache.get(key) if key is not None else None
+                cells[(fleet_index, scenario, time_period)] = (key, results, results is not None)
+                if results is None:
+                    missing.append((scenario, time_period))
+
+        if missing:
+            if seed is None:
+                # Solo la sub-rejilla con celdas pendientes
+                task_scenarios = [s for s in scenarios if any(s == scenario for scenario, _ in missing)]
+                task_periods = [p for p in periods if any(p == time_period for _, time_period in missing)]
+            else:
+                task_scenarios, task_periods = scenarios, periods
+            tasks.append((fleet_index, {
+                'fleet_counts': fleet_counts,
+                'engine': engine,
+                'seed': seed,
+                'iterations': iterations,
+                'scenarios': task_scenarios,
+                'periods': task_periods
+            }))
+
+    task_list = [task for _, task in tasks]
+    if workers > 1 and len(task_list) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            fleet_results = list(executor.map(_sweep_fleet, task_list))
+    else:
+        fleet_results = list(map(_sweep_fleet, task_list))
+
+    for (fleet_index, _), results in zip(tasks, fleet_results):
+        for (scenario, time_period), cell_results in results.items():
+            key, cached_results, _ = cells[(fleet_index, scenario, time_period)]
+            if cached_results is None:
+                cells[(fleet_index, scenario, time_period)] = (key, cell_results, False)
+                if key is not None:
+                    cache.put(key, cell_results)
+
+    rows = []
+    for (fleet_index, (use_repair_tool, referral_tier), time_period), (_, results, cached) in cells.items():
+        fleet_counts = fleet_list[fleet_index]
+        row = {
+            'fleet': MonteCarloSimulation.fleet_label(fleet_counts),
+            'fleet_size': sum(fleet_counts.values()),
+            'use_repair_tool': use_repair_tool,
+            'referral_tier': referral_tier,
+            'time_period': time_period,
+            'time_period_hours': MonteCarloSimulation.TIME_PERIODS[time_period]
+        }
+        row.update({field: results[field] for field in MonteCarloSimulation.SUMMARY_FIELDS})
+        row['cached'] = cached
+        rows.append(row)
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,114 @@
+import threading
+from monte_carlo import SimulationCancelled
+
+
+class SimulationRunner:
+    """
+    Ejecutar una simulación de MonteCarloSimulation en un hilo en segundo plano
+
+    El hilo que lanza la ejecución (p. ej. el script de Streamlit) consulta el
+    último informe de progreso con `progress` y puede abandonar la ejecución
+    con cancel() sin esperar a que termine.
+    """
+
+    # Estados de la ejecución
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    CANCELLED = 'cancelled'
+    FAILED = 'failed'
+
+    def __init__(self, simulation, method='run_simulation', *args, **kwargs):
+        """
+        Inicializar y lanzar la ejecución
+
+        Args:
+            simulation (MonteCarloSimulation): Simulación a ejecutar
+            method (str): Método a llamar ('run_simulation', 'run_comparison' o 'run_multi_horizon')
+            *args: Argumentos posicionales del método
+            **kwargs: Argumentos con nombre del método (sin progress ni cancel)
+        """
+        if method not in ('run_simulation', 'run_comparison', 'run_multi_horizon'):
+            raise ValueError(f"Método {method} no válido")
+
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._progress = None
+        self._result = None
+        self._error = None
+        self.status = self.RUNNING
+
+        target = getattr(simulation, method)
+        self._thread = threading.Thread(
+            target=self._run, args=(target, args, kwargs), name=f"simulation-{method}", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, target, args, kwargs):
+        """Cuerpo del hilo: ejecutar y registrar el resultado o el error"""
+        try:
+            result = target(*args, progress=self._update, cancel=self._cancel, **kwargs)
+        except SimulationCancelled:
+            status, result, error = self.CANCELLED, None, None
+        except Exception as exception:
+            status, result, error = self.FAILED, None, exception
+        else:
+            status, error = self.COMPLETED, None
+
+        with self._lock:
+            # Una cancelación pedida mientras terminaba el último bloque descarta el resultado
+            if status == self.COMPLETED and self._cancel.is_set():
+                status, result = self.CANCELLED, None
+            self._result, self._error, self.status = result, error, status
+
+    def _update(self, report):
+        """Guardar el último informe de progreso"""
+        with self._lock:
+            self._progress = report
+
+    @property
+    def progress(self):
+        """Último informe de progreso (None hasta completar el primer bloque)"""
+        with self._lock:
+            return None if self._progress is None else dict(self._progress)
+
+    @property
+    def running(self):
+        """Si la ejecución sigue en curso y no se ha cancelado"""
+        return self.status == self.RUNNING and not self._cancel.is_set()
+
+    def cancel(self):
+        """Pedir la cancelación (no bloquea; el hilo termina tras el bloque de sorteos en curso)"""
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """
+        Esperar a que termine el hilo
+
+        Args:
+            timeout (float): Segundos máximos de espera (None espera indefinidamente)
+
+        Returns:
+            bool: Si el hilo terminó
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def result(self):
+        """
+        Resultados de la ejecución terminada
+
+        Returns:
+            dict: Resultados del método llamado
+
+        Raises:
+            SimulationCancelled: Si la ejecución se canceló
+            ValueError: Si la ejecución sigue en curso
+        """
+        with self._lock:
+            if self.status == self.RUNNING:
+                raise ValueError("La simulación sigue en curso")
+            if self.status == self.CANCELLED:
+                raise SimulationCancelled("Simulación cancelada")
+            if self.status == self.FAILED:
+                raise self._error
+            return self._result
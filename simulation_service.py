@@ -0,0 +1,620 @@
+"""
+Servicio HTTP local de simulación (solo biblioteca estándar + NumPy)
+
+    python simulation_service.py serve --port 8765 --workers 4
+    python simulation_service.py load --serve --requests 500 --concurrency 32
+
+Rutas:
+    GET  /health           Estado del servicio
+    GET  /stats            Peticiones, lotes, aciertos de caché y coalescencias
+    POST /simulate         Escenario JSON (como batch_runner) -> resultados de run_simulation
+                           ("stream": true devuelve NDJSON con el progreso por bloques)
+    POST /expected         {"fleet", "tier", "tool", "period"} -> estimate_expected_profit
+
+Las peticiones concurrentes se agrupan en microlotes que se reparten en un
+pool de procesos; las peticiones idénticas en curso comparten un mismo cálculo
+y los resultados se guardan en la caché de resultados. Las peticiones con
+progreso ("stream") comparten la caché y los cálculos en curso, pero no entran
+en los microlotes: sus bloques se envían uno a uno al pool para poder informar
+el avance de cada bloque.
+
+Las peticiones inválidas reciben un 400; los fallos del servicio (p. ej. un
+proceso del pool que termina de forma inesperada, tras lo cual el pool se
+vuelve a crear) reciben un 500.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from monte_carlo import MonteCarloSimulation, _run_chunk
+from result_cache import ResultCache
+from batch_runner import FIELD_ALIASES
+import truck_economics
+
+# Espera máxima para completar un microlote (segundos)
+BATCH_WINDOW = 0.005
+
+# Peticiones máximas por microlote
+MAX_BATCH = 64
+
+# Tamaño máximo del cuerpo de una petición
+MAX_BODY_BYTES = 1 << 20
+
+# Errores de la petición (respuesta 400); cualquier otro es un fallo del servicio (500)
+REQUEST_ERRORS = (ValueError, TypeError, KeyError)
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceError(Exception):
+    """Fallo del servicio y no de la petición (respuesta 500)"""
+
+
+def parse_request(payload):
+    """
+    Normalizar el cuerpo JSON de una petición de simulación
+
+    Args:
+        payload (dict): Cuerpo de la petición
+
+    Returns:
+        dict: Flota, beneficios, período, iteraciones, semilla, motor, muestreador y si
+            transmitir progreso
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON")
+
+    request = {
+        'referral_tier': 0,
+        'use_repair_tool': False,
+        'time_period': '30_days',
+        'iterations': 10000,
+        'seed': None,
+        'engine': 'vectorized',
+        'sampler': 'pseudo',
+        'stream': False
+    }
+    for name, value in payload.items():
+        request[FIELD_ALIASES.get(name, name)] = value
+
+    if 'fleet' not in request:
+        raise ValueError("La petición debe incluir la flota ('fleet')")
+    fleet_counts = MonteCarloSimulation.count_fleet(request['fleet'])
+    if not fleet_counts:
+        raise ValueError("La flota no puede estar vacía")
+    for rarity in fleet_counts:
+        truck_economics.ECONOMICS.validate(rarity)
+    if request['time_period'] not in MonteCarloSimulation.TIME_PERIODS:
+        raise ValueError(f"Período {request['time_period']} no válido")
+    if request['seed'] is not None and not isinstance(request['seed'], int):
+        raise ValueError("La semilla debe ser un entero")
+    if not isinstance(request['iterations'], int) or request['iterations'] < 1:
+        raise ValueError("El número de iteraciones debe ser positivo")
+    return request
+
+
+def _build_simulation(request, cache=None):
+    """Crear la simulación de una petición normalizada"""
+    return MonteCarloSimulation(
+        request['fleet'], bool(request['use_repair_tool']), int(request['referral_tier']),
+        engine=request['engine'], seed=request['seed'], sampler=request['sampler'], cache=cache
+    )
+
+
+def _simulate_batch(requests):
+    """
+    Ejecutar un microlote de simulaciones (nivel de módulo para el pool de procesos)
+
+    Args:
+        requests (list): Peticiones normalizadas
+
+    Returns:
+        list: Por petición, (resultados, None) o (None, excepción): ValueError si la
+            petición no es válida o ServiceError si falló la simulación
+    """
+    outcomes = []
+    for request in requests:
+        try:
+            results = _build_simulation(request).run_simulation(
+                request['time_period'], iterations=request['iterations']
+            )
+            outcomes.append((results, None))
+        except REQUEST_ERRORS as error:
+            outcomes.append((None, ValueError(str(error))))
+        except Exception as error:
+            outcomes.append((None, ServiceError(f"Error interno: {error!r}")))
+    return outcomes
+
+
+class SimulationService:
+    """
+    Servicio asyncio que agrupa peticiones de simulación en microlotes
+    """
+
+    def __init__(self, workers=1, cache=None, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        """
+        Inicializar servicio
+
+        Args:
+            workers (int): Procesos del pool de simulación
+            cache (ResultCache): Caché de resultados (por defecto una LRU en memoria)
+            batch_window (float): Espera máxima para completar un microlote (segundos)
+            max_batch (int): Peticiones máximas por microlote
+        """
+        self.workers = max(1, workers)
+        self.cache = cache if cache is not None else ResultCache(max_entries=1024)
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.executor = None
+        self.queue = None
+        self.in_flight = {}
+        self.stats = {'requests': 0, 'simulations': 0, 'batches': 0, 'cache_hits': 0, 'coalesced': 0, 'errors': 0,
+                      'internal_errors': 0, 'pool_restarts': 0}
+        self._batcher = None
+
+    def _new_executor(self):
+        """Crear el pool de simulación"""
+        # Procesos nuevos (spawn): con fork heredarían los sockets abiertos y las
+        # conexiones no se cerrarían hasta que terminara el proceso hijo
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _replace_broken_pool(self, executor):
+        """Sustituir un pool roto (un proceso terminó de forma inesperada) si sigue en uso"""
+        if self.executor is executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._new_executor()
+            self.stats['pool_restarts'] += 1
+
+    def _internal_error(self, error, executor):
+        """Convertir un fallo de la ejecución en ServiceError, recreando el pool si se rompió"""
+        if isinstance(error, BrokenProcessPool):
+            self._replace_broken_pool(executor)
+        return error if isinstance(error, ServiceError) else ServiceError(f"Error interno: {error!r}")
+
+    async def start(self, host='127.0.0.1', port=8765):
+        """Arrancar el pool, el agrupador de lotes y el servidor HTTP"""
+        self.executor = self._new_executor()
+        self.queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batcher())
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server
+
+    async def close(self):
+        """Detener el servidor, el agrupador y el pool"""
+        self.server.close()
+        await self.server.wait_closed()
+        self._batcher.cancel()
+        self.executor.shutdown(cancel_futures=True)
+
+    def _prepare(self, request):
+        """
+        Crear la simulación de una petición y su clave de caché
+
+        Valida los beneficios y el motor (ValueError, TypeError o KeyError si la
+        petición no es válida); la flota ya la validó parse_request.
+
+        Args:
+            request (dict): Petición normalizada
+
+        Returns:
+            tuple: (simulación, clave de caché)
+        """
+        simulation = _build_simulation(request, self.cache)
+        key = simulation._scenario_key(
+            'simulation', simulation.use_repair_tool, simulation.referral_tier,
+            time_period=request['time_period'], iterations=request['iterations'],
+            precision=None, keep_samples=False
+        )
+        return simulation, key
+
+    async def simulate(self, request):
+        """
+        Obtener los resultados de una simulación (caché, cálculo en curso o nuevo lote)
+
+        Args:
+            request (dict): Petición normalizada
+
+        Returns:
+            tuple: (resultados, si vinieron de la caché)
+        """
+        _, key = self._prepare(request)
+
+        results = self.cache.get(key)
+        if results is not None:
+            self.stats['cache_hits'] += 1
+            return results, True
+
+        # Peticiones idénticas en curso comparten el mismo cálculo
+        if key in self.in_flight:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(self.in_flight[key]), False
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        await self.queue.put((key, request, future))
+        try:
+            return await asyncio.shield(future), False
+        finally:
+            self.in_flight.pop(key, None)
+
+    async def _run_batcher(self):
+        """Reunir peticiones durante batch_window y repartirlas entre los procesos"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.stats['batches'] += 1
+            slices = [batch[index::self.workers] for index in range(min(self.workers, len(batch)))]
+            for items in slices:
+                asyncio.create_task(self._run_slice(items))
+
+    async def _run_slice(self, items):
+        """Ejecutar parte de un microlote en un proceso y resolver sus peticiones"""
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            outcomes = await loop.run_in_executor(
+                executor, _simulate_batch, [request for _, request, _ in items]
+            )
+        except Exception as error:  # el proceso pudo terminar de forma inesperada
+            outcomes = [(None, self._internal_error(error, executor))] * len(items)
+
+        for (key, _, future), (results, error) in zip(items, outcomes):
+            self.stats['simulations'] += 1
+            if error is None:
+                self.cache.put(key, results)
+                future.set_result(results)
+            else:
+                future.set_exception(error)
+
+    async def stream_simulation(self, request, send, prepared=None):
+        """
+        Ejecutar una simulación por bloques informando el progreso
+
+        Usa los mismos bloques y semillas que run_simulation, así que el
+        resultado coincide con el de una petición sin progreso. Comparte la
+        caché y los cálculos en curso con simulate (una petición idéntica en
+        curso se espera sin eventos de progreso), pero sus bloques van al pool
+        uno a uno en lugar de en microlotes.
+
+        Args:
+            request (dict): Petición normalizada
+            send (callable): Corrutina que envía un evento (dict)
+            prepared (tuple): (simulación, clave) de _prepare si ya se validó la petición
+
+        Returns:
+            dict: Resultados de la simulación
+        """
+        simulation, key = prepared or self._prepare(request)
+        results = self.cache.get(key)
+        if results is not None:
+            self.stats['cache_hits'] += 1
+            return results
+
+        if key in self.in_flight:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        loop = asyncio.get_running_loop()
+        shared = loop.create_future()
+        self.in_flight[key] = shared
+        executor = self.executor
+        futures = []
+        try:
+            seed = simulation.resolve_seed()
+            hours = MonteCarloSimulation.TIME_PERIODS[request['time_period']]
+            tasks = simulation._chunk_tasks(
+                [hours], request['iterations'], seed, [(simulation.use_repair_tool, simulation.referral_tier)]
+            )
+            futures = [loop.run_in_executor(executor, _run_chunk, task) for task in tasks]
+
+            merged = None
+            for future in futures:
+                merged = simulation._merge_chunk(merged, await future)
+                await send({
+                    'event': 'progress',
+                    'completed': merged['aggregates'][0][0].count,
+                    'iterations': request['iterations']
+                })
+
+            results = simulation._build_results(request['time_period'], seed, merged['aggregates'][0][0])
+        except BaseException as error:
+            # Las peticiones que esperaban este cálculo reciben el mismo error (también
+            # si se cancela o se corta la conexión: nadie debe quedar esperando)
+            if isinstance(error, REQUEST_ERRORS):
+                shared.set_exception(ValueError(str(error)))
+            else:
+                shared.set_exception(self._internal_error(error, executor))
+            shared.exception()
+            # Descartar los bloques restantes (y sus errores, que ya no se esperan)
+            for future in futures:
+                if not future.cancel():
+                    future.exception()
+            raise
+        finally:
+            self.in_flight.pop(key, None)
+
+        self.stats['simulations'] += 1
+        self.cache.put(key, results)
+        shared.set_result(results)
+        return results
+
+    async def _handle_connection(self, reader, writer):
+        """Atender una petición HTTP/1.1 (una por conexión)"""
+        try:
+            method, path, body = await self._read_request(reader)
+            await self._dispatch(method, path, body, writer)
+        except REQUEST_ERRORS as error:
+            self.stats['errors'] += 1
+            await self._respond(writer, HTTPStatus.BAD_REQUEST, {'error': str(error)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as error:
+            self.stats['internal_errors'] += 1
+            logger.exception("Error interno atendiendo una petición")
+            with contextlib.suppress(ConnectionError):
+                await self._respond(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(error)})
+        finally:
+            with contextlib.suppress(ConnectionError):
+                writer.close()
+                await writer.wait_closed()
+
+    @staticmethod
+    async def _read_request(reader):
+        """Leer línea de petición, cabeceras y cuerpo"""
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) != 3:
+            raise ValueError("Petición HTTP mal formada")
+        method, path, _ = request_line
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Cuerpo de la petición demasiado grande")
+        body = await reader.readexactly(length) if length else b''
+        return method, path.split('?')[0], body
+
+    async def _dispatch(self, method, path, body, writer):
+        """Enviar la petición a la ruta correspondiente"""
+        if method == 'GET' and path == '/health':
+            await self._respond(writer, HTTPStatus.OK, {'status': 'ok', 'workers': self.workers})
+        elif method == 'GET' and path == '/stats':
+            await self._respond(writer, HTTPStatus.OK, dict(self.stats, cache_entries=len(self.cache)))
+        elif method == 'POST' and path in ('/simulate', '/expected'):
+            try:
+                payload = json.loads(body or b'{}')
+            except json.JSONDecodeError:
+                raise ValueError("El cuerpo no es JSON válido")
+            self.stats['requests'] += 1
+            if path == '/expected':
+                request = parse_request(payload)
+                estimate = _build_simulation(request).estimate_expected_profit(request['time_period'])
+                await self._respond(writer, HTTPStatus.OK, estimate)
+            else:
+                request = parse_request(payload)
+                if request['stream']:
+                    await self._respond_stream(writer, request)
+                else:
+                    results, cached = await self.simulate(request)
+                    await self._respond(writer, HTTPStatus.OK, dict(results, cached=cached))
+        else:
+            await self._respond(writer, HTTPStatus.NOT_FOUND, {'error': f"Ruta {method} {path} no encontrada"})
+
+    @staticmethod
+    async def _respond(writer, status, payload):
+        """Enviar una respuesta JSON completa"""
+        body = json.dumps(payload).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def _respond_stream(self, writer, request):
+        """Enviar eventos NDJSON por bloques (transferencia fragmentada)"""
+        # Validar antes de las cabeceras: una petición inválida recibe un 400 completo
+        prepared = self._prepare(request)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+
+        async def send(event):
+            data = (json.dumps(event) + "\n").encode('utf-8')
+            writer.write(f"{len(data):x}\r\n".encode('latin-1') + data + b"\r\n")
+            await writer.drain()
+
+        # Con las cabeceras enviadas los errores llegan como evento y no como estado HTTP
+        try:
+            results = await self.stream_simulation(request, send, prepared)
+            await send({'event': 'result', 'result': results})
+        except REQUEST_ERRORS as error:
+            self.stats['errors'] += 1
+            await send({'event': 'error', 'error': str(error)})
+        except ConnectionError:
+            raise
+        except Exception as error:
+            self.stats['internal_errors'] += 1
+            logger.exception("Error interno en una simulación con progreso")
+            failure = error if isinstance(error, ServiceError) else ServiceError(f"Error interno: {error!r}")
+            await send({'event': 'error', 'error': str(failure), 'internal': True})
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+async def _post(host, port, path, payload):
+    """Cliente HTTP mínimo: enviar un POST JSON y devolver (estado, cuerpo)"""
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), content
+
+
+async def run_load(host, port, requests=200, concurrency=16, distinct=20, iterations=10000, seed=0):
+    """
+    Generador de carga local: medir latencia y rendimiento del servicio
+
+    Las peticiones se eligen entre `distinct` escenarios aleatorios, así que
+    con distinct < requests también se mide el efecto de caché y coalescencia.
+
+    Args:
+        host (str): Dirección del servicio
+        port (int): Puerto del servicio
+        requests (int): Peticiones totales
+        concurrency (int): Peticiones simultáneas
+        distinct (int): Escenarios distintos entre los que se eligen las peticiones
+        iterations (int): Iteraciones por simulación
+        seed (int): Semilla de la elección de escenarios
+
+    Returns:
+        dict: Peticiones, errores, tiempo total, peticiones/s y percentiles de latencia (ms)
+    """
+    chooser = random.Random(seed)
+    scenarios = [
+        {
+            'fleet': {rarity: chooser.randint(0, 5) for rarity in range(1, 6)} | {chooser.randint(1, 5): 1},
+            'tier': chooser.randint(0, 3),
+            'tool': chooser.random() < 0.5,
+            'period': chooser.choice(list(MonteCarloSimulation.TIME_PERIODS)),
+            'iterations': iterations,
+            'seed': index
+        }
+        for index in range(distinct)
+    ]
+    payloads = [chooser.choice(scenarios) for _ in range(requests)]
+
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(payload):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status, _ = await _post(host, port, '/simulate', payload)
+            except OSError:
+                status = None
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(payload) for payload in payloads))
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+
+    def percentile(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'requests': requests,
+        'errors': errors,
+        'concurrency': concurrency,
+        'elapsed_seconds': elapsed,
+        'requests_per_second': requests / elapsed if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'p50': percentile(0.50),
+            'p90': percentile(0.90),
+            'p99': percentile(0.99),
+            'max': ordered[-1] * 1000
+        }
+    }
+
+
+async def _serve(args):
+    cache = ResultCache(max_entries=args.cache_entries, directory=args.cache_dir)
+    service = SimulationService(args.workers, cache)
+    server = await service.start(args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port} with {service.workers} workers", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+async def _load(args):
+    service = None
+    if args.serve:
+        service = SimulationService(args.workers)
+        await service.start(args.host, args.port)
+    try:
+        summary = await run_load(
+            args.host, args.port, args.requests, args.concurrency, args.distinct, args.iterations
+        )
+        if service is not None:
+            summary['service'] = dict(service.stats)
+    finally:
+        if service is not None:
+            await service.close()
+    print(json.dumps(summary, indent=2))
+
+
+def build_parser():
+    """Analizador de argumentos de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Local HTTP service for Mavis Road simulations.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve = subparsers.add_parser('serve', help="Run the HTTP service")
+    load = subparsers.add_parser('load', help="Measure latency and throughput under concurrent load")
+    for command in (serve, load):
+        command.add_argument('--host', default='127.0.0.1')
+        command.add_argument('--port', type=int, default=8765)
+        command.add_argument('--workers', type=int, default=1, help="Simulation processes")
+
+    serve.add_argument('--cache-entries', type=int, default=1024, help="In-memory cached results")
+    serve.add_argument('--cache-dir', default=None, help="Persist cached results in this directory")
+
+    load.add_argument('--serve', action='store_true', help="Start a service in this process first")
+    load.add_argument('--requests', type=int, default=200)
+    load.add_argument('--concurrency', type=int, default=16)
+    load.add_argument('--distinct', type=int, default=20, help="Distinct scenarios among the requests")
+    load.add_argument('--iterations', type=int, default=10000)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(_serve(args) if args.command == 'serve' else _load(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
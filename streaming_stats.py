@@ -0,0 +1,432 @@
+import math
+import numpy as np
+
+# Número máximo de intervalos del histograma de ganancias
+MAX_HISTOGRAM_BINS = 1 << 16
+
+# Número máximo de medias por bloque que guarda BatchMeans
+MAX_BATCHES = 1024
+
+
+class RunningStats:
+    """
+    Estadísticas en línea combinables: media/varianza de Welford, mínimo, máximo y positivos
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.positives = 0
+
+    def update(self, values):
+        """
+        Incorporar un lote de valores
+
+        El lote se resume con NumPy y se combina con la actualización por
+        pares de Chan, equivalente a aplicar Welford valor por valor.
+
+        Args:
+            values (np.ndarray): Valores del lote
+        """
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+
+        batch = RunningStats()
+        batch.count = values.size
+        batch.mean = float(values.mean())
+        batch.m2 = float(np.square(values - batch.mean).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        batch.positives = int(np.count_nonzero(values > 0))
+        self.merge(batch)
+
+    def merge(self, other):
+        """
+        Combinar con otras estadísticas (el orden de combinación fija el resultado exacto)
+
+        Args:
+            other (RunningStats): Estadísticas a incorporar
+
+        Returns:
+            RunningStats: self
+        """
+        if other.count == 0:
+            return self
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.positives += other.positives
+        return self
+
+    @property
+    def variance(self):
+        """Varianza poblacional (como np.var)"""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def sample_variance(self):
+        """Varianza muestral (ddof=1)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        """Desviación estándar poblacional (como np.std)"""
+        return math.sqrt(self.variance)
+
+
+class BatchMeans:
+    """
+    Medias por bloque combinables para estimar el error estándar entre bloques
+
+    Con muestreo cuasi-aleatorio o estratificado las iteraciones de un bloque
+    no son independientes, pero los bloques sí (cada uno es una réplica con su
+    propia aleatorización): la varianza de la media global se estima con la
+    dispersión de las medias de los bloques (medias por lotes).
+
+    Al superar max_batches medias se combinan por parejas (lotes del doble de
+    tamaño, que siguen siendo independientes), así que la memoria está acotada
+    por max_batches sea cual sea el número de bloques.
+    """
+
+    def __init__(self, max_batches=MAX_BATCHES):
+        if max_batches < 2:
+            raise ValueError("max_batches debe ser al menos 2")
+        self.max_batches = max_batches
+        self.sizes = []
+        self.means = []
+
+    @property
+    def count(self):
+        """Número de lotes guardados"""
+        return len(self.sizes)
+
+    def _compact(self):
+        """Combinar lotes consecutivos por parejas hasta no superar max_batches"""
+        while self.count > self.max_batches:
+            paired = self.count - self.count % 2
+            sizes = np.asarray(self.sizes[:paired], dtype=np.int64).reshape(-1, 2)
+            means = np.asarray(self.means[:paired]).reshape(-1, 2)
+            merged_sizes = sizes.sum(axis=1)
+            merged_means = (sizes * means).sum(axis=1) / merged_sizes
+            # Un lote sin pareja se conserva tal cual
+            self.sizes = merged_sizes.tolist() + self.sizes[paired:]
+            self.means = merged_means.tolist() + self.means[paired:]
+
+    def update(self, values):
+        """Registrar la media de los valores de un bloque"""
+        values = np.asarray(values, dtype=float)
+        if values.size:
+            self.sizes.append(values.size)
+            self.means.append(float(values.mean()))
+            self._compact()
+
+    def merge(self, other):
+        """
+        Combinar con las medias de otros bloques
+
+        Args:
+            other (BatchMeans): Medias a incorporar
+
+        Returns:
+            BatchMeans: self
+        """
+        self.sizes.extend(other.sizes)
+        self.means.extend(other.means)
+        self._compact()
+        return self
+
+    @property
+    def variance_of_mean(self):
+        """Varianza estimada de la media global ponderada (NaN con menos de 2 bloques)"""
+        if self.count < 2:
+            return math.nan
+        weights = np.asarray(self.sizes, dtype=float) / sum(self.sizes)
+        means = np.asarray(self.means)
+        deviations = means - np.dot(weights, means)
+        return float(self.count / (self.count - 1) * np.dot(weights ** 2, deviations ** 2))
+
+
+class ProfitHistogram:
+    """
+    Histograma de intervalos fijos y combinable para estimar cuantiles en memoria constante
+
+    Con intervalos de ancho 1 sobre ganancias enteras los cuantiles son exactos.
+    """
+
+    def __init__(self, low, high, max_bins=MAX_HISTOGRAM_BINS):
+        """
+        Inicializar histograma sobre el rango [low, high]
+
+        Args:
+            low (float): Valor mínimo esperado
+            high (float): Valor máximo esperado
+            max_bins (int): Número máximo de intervalos
+        """
+        self.low = math.floor(low)
+        span = math.ceil(high) - self.low + 1
+        self.width = max(1, math.ceil(span / max_bins))
+        self.counts = np.zeros(math.ceil(span / self.width), dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    @property
+    def bin_edges(self):
+        """Bordes de los intervalos"""
+        return self.low + self.width * np.arange(len(self.counts) + 1)
+
+    @property
+    def total(self):
+        """Número de valores registrados"""
+        return int(self.counts.sum()) + self.underflow + self.overflow
+
+    def update(self, values):
+        """
+        Incorporar un lote de valores
+
+        Args:
+            values (np.ndarray): Valores del lote
+        """
+        index = np.floor_divide(np.asarray(values) - self.low, self.width).astype(np.int64)
+        below = index < 0
+        above = index >= len(self.counts)
+        self.underflow += int(np.count_nonzero(below))
+        self.overflow += int(np.count_nonzero(above))
+        self.counts += np.bincount(index[~(below | above)], minlength=len(self.counts))
+
+    def merge(self, other):
+        """
+        Combinar con otro histograma del mismo rango
+
+        Args:
+            other (ProfitHistogram): Histograma a incorporar
+
+        Returns:
+            ProfitHistogram: self
+        """
+        if other.low != self.low or other.width != self.width or len(other.counts) != len(self.counts):
+            raise ValueError("Los histogramas deben tener el mismo rango para combinarse")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def _order_statistic(self, k, minimum, maximum):
+        """Valor aproximado (exacto con ancho 1) del k-ésimo menor valor"""
+        if k < self.underflow:
+            return minimum
+        k -= self.underflow
+
+        cumulative = np.cumsum(self.counts)
+        if cumulative.size == 0 or k >= cumulative[-1]:
+            return maximum
+
+        index = int(np.searchsorted(cumulative, k, side='right'))
+        if self.width == 1:
+            return float(self.low + index)
+
+        # Repartir los valores del intervalo de forma uniforme
+        before = int(cumulative[index - 1]) if index > 0 else 0
+        position = (k - before + 0.5) / self.counts[index]
+        value = self.low + index * self.width + position * self.width - 0.5
+        return float(min(max(value, minimum), maximum))
+
+    def _values(self):
+        """Valor representativo de cada intervalo (exacto con ancho 1)"""
+        return self.low + self.width * np.arange(len(self.counts)) + (self.width - 1) / 2
+
+    def _with_tails(self, minimum, maximum):
+        """Valores y cuentas de los intervalos con los valores fuera de rango en el mínimo y el máximo"""
+        values = np.concatenate(([minimum], self._values(), [maximum]))
+        counts = np.concatenate(([self.underflow], self.counts, [self.overflow]))
+        return values, counts
+
+    def rebin(self, bins, minimum, maximum):
+        """
+        Histograma de como máximo `bins` intervalos de ancho entero entre el mínimo y el máximo
+
+        Los intervalos están centrados en ganancias enteras, así que cada uno
+        agrupa el mismo número de valores posibles.
+
+        Args:
+            bins (int): Número máximo de intervalos
+            minimum (float): Mínimo observado
+            maximum (float): Máximo observado
+
+        Returns:
+            tuple: (bordes, cuentas) como np.histogram
+        """
+        width = max(1, math.ceil((maximum - minimum + 1) / bins))
+        count = max(1, math.ceil((maximum - minimum + 1) / width))
+        edges = minimum - 0.5 + width * np.arange(count + 1)
+        values, counts = self._with_tails(minimum, maximum)
+        counts, _ = np.histogram(np.clip(values, minimum, maximum), bins=edges, weights=counts)
+        return edges, counts.astype(np.int64)
+
+    def box(self, minimum, maximum, max_outliers):
+        """
+        Resumen de diagrama de caja (bigotes a 1.5 × rango intercuartílico)
+
+        Args:
+            minimum (float): Mínimo observado
+            maximum (float): Máximo observado
+            max_outliers (int): Máximo de valores atípicos a devolver (repartidos
+                uniformemente por rango, incluidos los extremos)
+
+        Returns:
+            dict: Cuartiles, bigotes, número de atípicos y muestra de atípicos
+        """
+        q1 = self.quantile(0.25, minimum, maximum)
+        median = self.quantile(0.50, minimum, maximum)
+        q3 = self.quantile(0.75, minimum, maximum)
+        low_fence = q1 - 1.5 * (q3 - q1)
+        high_fence = q3 + 1.5 * (q3 - q1)
+
+        values, counts = self._with_tails(minimum, maximum)
+        occupied = counts > 0
+        inside = occupied & (values >= low_fence) & (values <= high_fence)
+        outside = occupied & ~inside
+
+        outlier_values = values[outside]
+        outlier_counts = counts[outside]
+        outlier_count = int(outlier_counts.sum())
+        if outlier_count > max_outliers:
+            ranks = np.linspace(0, outlier_count - 1, max_outliers).round()
+            outlier_values = outlier_values[np.searchsorted(np.cumsum(outlier_counts), ranks, side='right')]
+        else:
+            outlier_values = np.repeat(outlier_values, outlier_counts)
+
+        return {
+            'q1': q1,
+            'median': median,
+            'q3': q3,
+            'lower_whisker': float(values[inside].min()) if inside.any() else q1,
+            'upper_whisker': float(values[inside].max()) if inside.any() else q3,
+            'outlier_count': outlier_count,
+            'outliers': outlier_values.astype(float).tolist()
+        }
+
+    def quantile(self, q, minimum, maximum):
+        """
+        Cuantil con interpolación lineal (misma convención que np.percentile)
+
+        Args:
+            q (float): Nivel del cuantil (0-1)
+            minimum (float): Mínimo observado (para valores bajo el rango)
+            maximum (float): Máximo observado (para valores sobre el rango)
+
+        Returns:
+            float: Cuantil estimado
+        """
+        total = self.total
+        if total == 0:
+            return math.nan
+
+        position = (total - 1) * q
+        lower = int(math.floor(position))
+        fraction = position - lower
+        value = self._order_statistic(lower, minimum, maximum)
+        if fraction > 0:
+            upper = self._order_statistic(lower + 1, minimum, maximum)
+            value += fraction * (upper - value)
+        return float(value)
+
+
+class SimulationAggregate:
+    """
+    Agregado combinable de las iteraciones de un escenario (ganancia de flota y por rareza)
+    """
+
+    def __init__(self, fleet_counts, profit_range, keep_samples=False):
+        """
+        Inicializar agregado vacío
+
+        Args:
+            fleet_counts (dict): Cantidad de camiones por rareza
+            profit_range (tuple): (mínimo, máximo) del histograma de ganancias
+            keep_samples (bool): Conservar también las muestras crudas
+        """
+        self.profit = RunningStats()
+        # Una media por bloque (cada update incorpora un bloque)
+        self.batches = BatchMeans()
+        self.histogram = ProfitHistogram(*profit_range)
+        self.rarity = {
+            rarity: {
+                'count': count,
+                'profits': RunningStats(),
+                'trips': RunningStats(),
+                'repairs': RunningStats()
+            }
+            for rarity, count in fleet_counts.items()
+        }
+        self.keep_samples = keep_samples
+        self.samples = {'total_profit': [], 'profits': {rarity: [] for rarity in fleet_counts}}
+
+    @property
+    def count(self):
+        """Número de iteraciones agregadas"""
+        return self.profit.count
+
+    def update(self, samples):
+        """
+        Incorporar las muestras de un bloque
+
+        Args:
+            samples (dict): Ganancia total por iteración y estadísticas por rareza
+        """
+        self.profit.update(samples['total_profit'])
+        self.batches.update(samples['total_profit'])
+        self.histogram.update(samples['total_profit'])
+        for rarity, stats in samples['rarity_stats'].items():
+            self.rarity[rarity]['profits'].update(stats['profits'])
+            self.rarity[rarity]['trips'].update(stats['trips'])
+            self.rarity[rarity]['repairs'].update(stats['repairs'])
+
+        if self.keep_samples:
+            self.samples['total_profit'].append(np.asarray(samples['total_profit']))
+            for rarity, stats in samples['rarity_stats'].items():
+                self.samples['profits'][rarity].append(np.asarray(stats['profits']))
+
+    def merge(self, other):
+        """
+        Combinar con el agregado de otro bloque
+
+        Args:
+            other (SimulationAggregate): Agregado a incorporar
+
+        Returns:
+            SimulationAggregate: self
+        """
+        self.profit.merge(other.profit)
+        self.batches.merge(other.batches)
+        self.histogram.merge(other.histogram)
+        for rarity, stats in other.rarity.items():
+            for key in ('profits', 'trips', 'repairs'):
+                self.rarity[rarity][key].merge(stats[key])
+
+        if self.keep_samples:
+            self.samples['total_profit'].extend(other.samples['total_profit'])
+            for rarity, chunks in other.samples['profits'].items():
+                self.samples['profits'][rarity].extend(chunks)
+        return self
+
+    def quantile(self, q):
+        """Cuantil de la ganancia de la flota"""
+        return self.histogram.quantile(q, self.profit.min, self.profit.max)
+
+    def histogram_summary(self, bins):
+        """Histograma compacto de la ganancia de la flota (ver ProfitHistogram.rebin)"""
+        edges, counts = self.histogram.rebin(bins, self.profit.min, self.profit.max)
+        return {'bin_edges': edges.tolist(), 'counts': counts.tolist()}
+
+    def box_summary(self, max_outliers):
+        """Resumen de diagrama de caja de la ganancia de la flota (ver ProfitHistogram.box)"""
+        return self.histogram.box(self.profit.min, self.profit.max, max_outliers)
@@ -0,0 +1,288 @@
+"""
+Riesgo de cola de la ganancia por muestreo de importancia
+
+La ganancia de la flota es la ganancia fija menos el costo de reparaciones
+C = sum_g c_g K_g, con K_g ~ Binomial(n_g, p_g) por rareza y ventana de
+herramienta. Para estimar eventos raros (pérdidas, cuantiles extremos) se
+muestrea con la inclinación exponencial de C,
+
+    q_g(theta) = p_g e^(theta c_g) / (1 - p_g + p_g e^(theta c_g)),
+
+eligiendo theta para que el costo medio inclinado caiga en la región de
+interés, y cada iteración se repondera con la razón de verosimilitudes
+
+    w = exp(-theta C + sum_g n_g log(1 - p_g + p_g e^(theta c_g))),
+
+así que los estimadores siguen siendo insesgados con muchas más muestras
+en la cola que el muestreo directo.
+
+VaR y CVaR se expresan como pérdidas (positivas si se pierde dinero):
+VaR_a = -q_a y CVaR_a = -q_a + E[(q_a - X)^+] / a (Rockafellar-Uryasev),
+con q_a el cuantil a de la ganancia X.
+"""
+import math
+from statistics import NormalDist
+import numpy as np
+import truck_economics
+
+# Niveles de VaR y CVaR por defecto
+DEFAULT_LEVELS = (0.01, 0.05)
+
+# Pasos de bisección al resolver la inclinación
+TILT_BISECTION_STEPS = 100
+
+# Fracción máxima del recorrido entre el costo medio y el máximo a la que se
+# lleva el costo medio inclinado (la inclinación crece sin límite hacia el máximo)
+MAX_TILT_FRACTION = 0.99
+
+
+def repair_groups(fleet_counts, trips, use_repair_tool=False, referral_tier=0):
+    """
+    Grupos binomiales de averías de la flota
+
+    Args:
+        fleet_counts (dict): Cantidad de camiones por rareza
+        trips (int): Viajes por camión en el período
+        use_repair_tool (bool): Si usar herramienta de reducción de averías
+        referral_tier (int): Tier de referido
+
+    Returns:
+        tuple: (ganancia sin averías aleatorias, ensayos, probabilidades, costos) con
+            solo los grupos de probabilidad entre 0 y 1 (las averías seguras se descuentan
+            de la ganancia)
+    """
+    economics = truck_economics.ECONOMICS
+    tier = economics.tier_column(referral_tier)
+    tool_trips = min(economics.tool_trips, trips) if use_repair_tool else 0
+    fixed_profit = 0
+    trials, probabilities, costs = [], [], []
+
+    for rarity, count in fleet_counts.items():
+        economics.validate(rarity)
+        row = economics.table[rarity]
+        base_prob, tool_prob = (float(p) for p in row['effective_breakdown'][tier])
+        repair_cost = int(row['repair_cost'])
+        fixed_profit += count * economics.fixed_profit(rarity, trips, use_repair_tool)
+        for group_trials, probability in ((count * tool_trips, tool_prob), (count * (trips - tool_trips), base_prob)):
+            if group_trials == 0 or probability <= 0:
+                continue
+            if probability >= 1:
+                fixed_profit -= group_trials * repair_cost
+                continue
+            trials.append(group_trials)
+            probabilities.append(probability)
+            costs.append(repair_cost)
+
+    return (fixed_profit, np.array(trials, dtype=np.int64), np.array(probabilities, dtype=float),
+            np.array(costs, dtype=np.int64))
+
+
+def tilted_probabilities(probabilities, costs, theta):
+    """Probabilidades de avería inclinadas q_g(theta)"""
+    logits = np.log(probabilities) - np.log1p(-probabilities) + theta * costs
+    return 0.5 * (1 + np.tanh(logits / 2))
+
+
+def log_moment_generating(trials, probabilities, costs, theta):
+    """Logaritmo de E[e^(theta C)] (normalizador de la inclinación)"""
+    return float(np.dot(trials, np.logaddexp(np.log1p(-probabilities), np.log(probabilities) + theta * costs)))
+
+
+def solve_tilt(trials, probabilities, costs, target_cost):
+    """
+    Inclinación cuyo costo medio de reparaciones es target_cost
+
+    Args:
+        trials, probabilities, costs (np.ndarray): Grupos de repair_groups
+        target_cost (float): Costo medio buscado
+
+    Returns:
+        float: theta >= 0 (0 si target_cost no supera el costo medio)
+    """
+    if len(trials) == 0:
+        return 0.0
+    mean_cost = float(np.dot(trials * costs, probabilities))
+    max_cost = float(np.dot(trials, costs))
+    if target_cost <= mean_cost:
+        return 0.0
+    target_cost = min(target_cost, mean_cost + MAX_TILT_FRACTION * (max_cost - mean_cost))
+
+    def tilted_mean(theta):
+        return float(np.dot(trials * costs, tilted_probabilities(probabilities, costs, theta)))
+
+    low, high = 0.0, 1.0 / costs.min()
+    while tilted_mean(high) < target_cost:
+        low, high = high, 2 * high
+    for _ in range(TILT_BISECTION_STEPS):
+        middle = (low + high) / 2
+        if tilted_mean(middle) < target_cost:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+def sample_tilted(rng, fixed_profit, trials, probabilities, costs, theta, iterations):
+    """
+    Muestrear ganancias con las averías inclinadas
+
+    Args:
+        rng (np.random.Generator): Generador de números aleatorios
+        fixed_profit (int): Ganancia sin averías aleatorias
+        trials, probabilities, costs (np.ndarray): Grupos de repair_groups
+        theta (float): Inclinación (0 es el muestreo directo)
+        iterations (int): Número de iteraciones
+
+    Returns:
+        tuple: (ganancias, razones de verosimilitud) por iteración
+    """
+    if len(trials) == 0:
+        return np.full(iterations, fixed_profit, dtype=np.int64), np.ones(iterations)
+    tilted = tilted_probabilities(probabilities, costs, theta)
+    repairs = rng.binomial(trials[:, None], tilted[:, None], size=(len(trials), iterations))
+    repair_costs = costs @ repairs
+    log_weights = -theta * repair_costs + log_moment_generating(trials, probabilities, costs, theta)
+    return fixed_profit - repair_costs, np.exp(log_weights)
+
+
+def weighted_mean(values, weights, reference_iterations):
+    """
+    Media ponderada por importancia de una cantidad y su eficiencia
+
+    Args:
+        values (np.ndarray): Cantidad por iteración
+        weights (np.ndarray): Razones de verosimilitud
+        reference_iterations (int): Iteraciones de un muestreo directo del mismo costo
+
+    Returns:
+        dict: Estimación, error estándar y factor de reducción de varianza frente al
+            muestreo directo con reference_iterations iteraciones. El factor es NaN si la
+            estimación o su varianza son 0 (ninguna muestra resolvió la cantidad, p. ej.
+            porque sus razones de verosimilitud se anulan por desbordamiento inferior) o si
+            el muestreo directo esperaría menos de una muestra no nula: entonces no
+            observaría nada y no hay varianza con la que comparar
+    """
+    weighted = weights * values
+    estimate = float(weighted.mean())
+    iterations = len(values)
+    # Varianzas relativas a la mayor contribución: con razones de verosimilitud
+    # de 1e-150 sus cuadrados se anularían por desbordamiento inferior
+    scale = float(np.max(np.abs(weighted))) if iterations else 0.0
+    if iterations < 2 or scale == 0:
+        return {
+            'estimate': estimate,
+            'standard_error': 0.0 if iterations > 1 else math.nan,
+            'variance_reduction': math.nan
+        }
+    relative_variance = float((weighted / scale).var(ddof=1))
+    # Varianza por iteración del muestreo directo (relativa a scale²), estimada con
+    # las mismas muestras
+    naive_relative = max((float(np.mean(weighted * values)) / scale - estimate * (estimate / scale)) / scale, 0.0)
+    naive_hits = float(np.mean(weights * (values != 0))) * reference_iterations
+    reduction = math.nan
+    if estimate > 0 and relative_variance > 0 and naive_hits >= 1:
+        reduction = (naive_relative / reference_iterations) / (relative_variance / iterations)
+        if not math.isfinite(reduction):
+            reduction = math.nan
+    return {
+        'estimate': estimate,
+        'standard_error': scale * math.sqrt(relative_variance / iterations),
+        'variance_reduction': reduction
+    }
+
+
+def weighted_quantile(profits, weights, level, bounds):
+    """
+    Cuantil de la distribución ponderada F(x) = media(w 1{X <= x})
+
+    Args:
+        profits (np.ndarray): Ganancias muestreadas
+        weights (np.ndarray): Razones de verosimilitud
+        level (float): Nivel del cuantil
+        bounds (tuple): (mínimo, máximo) posible de la ganancia, para niveles fuera
+            del rango cubierto por las muestras
+
+    Returns:
+        float: Menor ganancia muestreada con F(x) >= level
+    """
+    if level <= 0:
+        return float(bounds[0])
+    order = np.argsort(profits, kind='stable')
+    cumulative = np.cumsum(weights[order]) / len(profits)
+    index = np.searchsorted(cumulative, level, side='left')
+    if index >= len(profits):
+        return float(bounds[1])
+    return float(profits[order][index])
+
+
+def adjacent_support(profits, value, bounds, direction):
+    """
+    Ganancia muestreada contigua a un valor
+
+    Args:
+        profits (np.ndarray): Ganancias muestreadas
+        value (float): Valor de referencia
+        bounds (tuple): (mínimo, máximo) posible de la ganancia, si no hay muestras más allá
+        direction (int): -1 para la mayor ganancia menor que value, 1 para la menor mayor
+
+    Returns:
+        float: Punto contiguo del soporte observado (o el límite correspondiente)
+    """
+    if direction < 0:
+        below = profits[profits < value]
+        return float(below.max()) if len(below) else float(min(bounds[0], value))
+    above = profits[profits > value]
+    return float(above.min()) if len(above) else float(max(bounds[1], value))
+
+
+def tail_estimates(profits, weights, level, confidence, bounds, reference_iterations):
+    """
+    VaR y CVaR de un nivel con sus intervalos de confianza
+
+    El intervalo del VaR invierte las bandas de la distribución ponderada en el
+    cuantil estimado y se extiende a los puntos contiguos del soporte: con
+    ganancias discretas las bandas suelen caer en el mismo punto y el intervalo
+    tendría ancho 0. El del CVaR usa el error estándar de la fórmula de
+    Rockafellar-Uryasev con el cuantil fijo (su derivada en el cuantil es nula).
+
+    Args:
+        profits (np.ndarray): Ganancias muestreadas (inclinadas hacia el cuantil)
+        weights (np.ndarray): Razones de verosimilitud
+        level (float): Nivel (0.01 = peor 1%)
+        confidence (float): Nivel de confianza de los intervalos
+        bounds (tuple): (mínimo, máximo) posible de la ganancia
+        reference_iterations (int): Iteraciones de un muestreo directo del mismo costo
+
+    Returns:
+        tuple: (VaR, CVaR) como dicts con estimación, intervalo, error estándar y
+            factor de reducción de varianza
+    """
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    quantile = weighted_quantile(profits, weights, level, bounds)
+
+    cdf = weighted_mean((profits <= quantile).astype(float), weights, reference_iterations)
+    low = adjacent_support(
+        profits, weighted_quantile(profits, weights, level - z * cdf['standard_error'], bounds), bounds, -1
+    )
+    high = adjacent_support(
+        profits, weighted_quantile(profits, weights, level + z * cdf['standard_error'], bounds), bounds, 1
+    )
+    value_at_risk = {
+        'estimate': -quantile,
+        'ci_low': -high,
+        'ci_high': -low,
+        'standard_error': (high - low) / (2 * z),
+        'variance_reduction': cdf['variance_reduction']
+    }
+
+    shortfall = weighted_mean(np.maximum(quantile - profits, 0).astype(float), weights, reference_iterations)
+    estimate = -quantile + shortfall['estimate'] / level
+    standard_error = shortfall['standard_error'] / level
+    expected_shortfall = {
+        'estimate': estimate,
+        'ci_low': estimate - z * standard_error,
+        'ci_high': estimate + z * standard_error,
+        'standard_error': standard_error,
+        'variance_reduction': shortfall['variance_reduction']
+    }
+    return value_at_risk, expected_shortfall
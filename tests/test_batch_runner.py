@@ -0,0 +1,55 @@
+import io
+import json
+
+from batch_runner import DEFAULT_FIELDS, JsonlWriter, build_parser, parse_scenario, run_batch
+
+
+class _Output(io.StringIO):
+    """Flujo que conserva el texto al cerrarse"""
+
+    def close(self):
+        pass
+
+
+def _defaults(**changes):
+    arguments = build_parser().parse_args([])
+    return dict({name: getattr(arguments, name) for name in DEFAULT_FIELDS}, **changes)
+
+
+def test_parse_scenario_applies_defaults_and_aliases():
+    scenario = parse_scenario('{"fleet": [1, 2], "tier": 2, "period": "1_week"}', _defaults())
+
+    assert scenario['referral_tier'] == 2
+    assert scenario['time_period'] == '1_week'
+    assert isinstance(scenario['seed'], int)
+
+
+def test_rows_are_written_in_input_order_with_errors():
+    lines = [
+        '{"id": "a", "fleet": [1, 3], "seed": 1, "iterations": 1000}',
+        'not json',
+        '{"id": "b", "fleet": {"9": 1}, "seed": 1}',
+        '',
+        '{"id": "c", "fleet": {"2": 2}, "period": "1_week", "seed": 2, "iterations": 1000}',
+    ]
+    output = _Output()
+    summary = run_batch(io.StringIO("\n".join(lines)), JsonlWriter(output), defaults=_defaults())
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert [row['id'] for row in rows] == ['a', 'line 2', 'b', 'c']
+    assert [row['error'] is None for row in rows] == [True, False, False, True]
+    assert summary['scenarios'] == 4 and summary['failed'] == 2
+    assert summary['iterations'] == 2000
+    assert rows[3]['fleet_size'] == 2 and rows[3]['time_period'] == '1_week'
+
+
+def test_parallel_batch_matches_serial_batch():
+    lines = "\n".join(json.dumps({'id': index, 'fleet': [1, index % 5 + 1], 'seed': index, 'iterations': 1000})
+                      for index in range(6))
+
+    def run(workers):
+        output = _Output()
+        run_batch(io.StringIO(lines), JsonlWriter(output), workers=workers, defaults=_defaults())
+        return output.getvalue()
+
+    assert run(1) == run(2)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from benchmark import compare, ks_exact, ks_two_sample
+from monte_carlo import MonteCarloSimulation
+
+# (flota, período, herramienta, tier) con rarezas, ventanas de herramienta y tiers distintos
+SCENARIOS = [
+    ({1: 2}, '1_week', False, 0),
+    ({1: 1, 3: 2}, '30_days', True, 1),
+    ({2: 1, 4: 1, 5: 1}, '1_week', True, 3),
+]
+
+
+@pytest.mark.parametrize('engine', MonteCarloSimulation.ENGINES)
+@pytest.mark.parametrize('fleet, time_period, use_repair_tool, referral_tier', SCENARIOS)
+def test_engine_matches_exact_distribution(engine, fleet, time_period, use_repair_tool, referral_tier):
+    iterations = 2000 if engine == 'reference' else 20000
+    simulation = MonteCarloSimulation(fleet, use_repair_tool, referral_tier, engine=engine, seed=11)
+    results = simulation.run_simulation(time_period, iterations=iterations, keep_samples=True)
+    exact = simulation.exact_distribution(time_period)
+
+    _, p_value = ks_exact(results['all_profits'], exact['profit_values'], exact['probabilities'])
+    assert p_value > 1e-3
+
+
+def test_ks_two_sample_separates_shifted_samples():
+    rng = np.random.default_rng(0)
+    same = ks_two_sample(rng.normal(size=2000), rng.normal(size=2000))
+    shifted = ks_two_sample(rng.normal(size=2000), rng.normal(0.3, 1, size=2000))
+
+    assert same[1] > 1e-3
+    assert shifted[1] < 1e-6
+
+
+def test_compare_flags_regressions():
+    def report(trips_per_second):
+        return {'cases': [{'id': 'case', 'trips_per_second': trips_per_second, 'peak_memory_bytes': None}]}
+
+    rows = compare(report(100.0), report(80.0))
+    assert rows[0]['speedup'] == pytest.approx(0.8)
+    assert rows[0]['regression']
+    assert not compare(report(100.0), report(95.0))[0]['regression']
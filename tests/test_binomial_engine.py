@@ -0,0 +1,24 @@
+import math
+
+import pytest
+
+from monte_carlo import MonteCarloSimulation
+
+
+@pytest.mark.parametrize('fleet, time_period, use_repair_tool, referral_tier', [
+    ([1, 1, 1], '1_week', False, 0),
+    ([1, 3, 3, 5], '30_days', True, 2),
+    ([2, 2, 4], '1_year', True, 3),
+])
+def test_binomial_matches_vectorized_engine(fleet, time_period, use_repair_tool, referral_tier):
+    iterations = 20000
+    binomial = MonteCarloSimulation(fleet, use_repair_tool, referral_tier, engine='binomial')
+    vectorized = MonteCarloSimulation(fleet, use_repair_tool, referral_tier, engine='vectorized')
+    fast = binomial.run_simulation(time_period, iterations=iterations)
+    slow = vectorized.run_simulation(time_period, iterations=iterations)
+
+    standard_error = math.hypot(fast['std_profit'], slow['std_profit']) / math.sqrt(iterations)
+    assert abs(fast['mean_profit'] - slow['mean_profit']) < 5 * standard_error
+    assert fast['std_profit'] == pytest.approx(slow['std_profit'], rel=0.05)
+    for rarity, breakdown in fast['rarity_breakdown'].items():
+        assert breakdown['avg_trips'] == slow['rarity_breakdown'][rarity]['avg_trips']
@@ -0,0 +1,32 @@
+import math
+
+import pytest
+
+from monte_carlo import MonteCarloSimulation
+
+
+def test_comparison_delta_is_benefit_minus_baseline():
+    comparison = MonteCarloSimulation({1: 2, 3: 1}, True, 2, seed=8).run_comparison('30_days', iterations=4000)
+
+    assert comparison['mean_delta'] == pytest.approx(
+        comparison['benefit']['mean_profit'] - comparison['baseline']['mean_profit']
+    )
+    assert comparison['seed'] == 8
+
+
+def test_common_random_numbers_reduce_the_delta_error():
+    comparison = MonteCarloSimulation({1: 3, 2: 1}, True, 3, seed=5).run_comparison('30_days', iterations=6000)
+    independent = math.hypot(comparison['benefit']['std_profit'], comparison['baseline']['std_profit'])
+
+    assert comparison['std_delta'] < independent
+    assert comparison['delta_standard_error'] == pytest.approx(comparison['std_delta'] / math.sqrt(6000), rel=1e-3)
+
+
+def test_comparison_worker_count_does_not_change_results():
+    def run(workers):
+        return MonteCarloSimulation({1: 3}, True, 2, seed=4).run_comparison('1_week', iterations=3000, workers=workers)
+
+    serial, parallel = run(1), run(2)
+    assert serial['mean_delta'] == parallel['mean_delta']
+    assert serial['std_delta'] == parallel['std_delta']
+    assert serial['benefit']['mean_profit'] == parallel['benefit']['mean_profit']
@@ -0,0 +1,43 @@
+import math
+
+import numpy as np
+import pytest
+
+from convergence import PrecisionTarget
+from monte_carlo import MonteCarloSimulation
+from streaming_stats import RunningStats
+
+
+def test_required_iterations_follow_the_half_width():
+    stats = RunningStats()
+    stats.update(np.random.default_rng(0).normal(100, 10, size=5000))
+    target = PrecisionTarget(half_width=0.2, min_iterations=100)
+    evaluation = target.evaluate(stats)
+
+    assert evaluation['required_iterations'] == math.ceil((target.z * math.sqrt(stats.sample_variance) / 0.2) ** 2)
+    assert not evaluation['converged']
+    assert PrecisionTarget(half_width=1.0, min_iterations=100).evaluate(stats)['converged']
+
+
+def test_run_stops_once_the_target_is_met():
+    target = PrecisionTarget(relative_half_width=0.01, min_iterations=2000)
+    results = MonteCarloSimulation([1, 3], True, 1, seed=2).run_simulation(
+        '30_days', iterations=200000, precision=target
+    )
+
+    assert results['iterations'] < 200000
+    assert results['convergence']['converged']
+    assert results['convergence']['mean_half_width'] <= 0.01 * abs(results['mean_profit'])
+
+
+def test_run_stops_at_the_iteration_cap():
+    target = PrecisionTarget(half_width=0.001, min_iterations=1000)
+    results = MonteCarloSimulation([1, 3], seed=2).run_simulation('30_days', iterations=3000, precision=target)
+
+    assert results['iterations'] == 3000
+    assert not results['convergence']['converged']
+
+
+def test_invalid_confidence_is_rejected():
+    with pytest.raises(ValueError):
+        PrecisionTarget(confidence=1.5)
@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+import pytest
+
+from monte_carlo import MonteCarloSimulation
+
+SCENARIOS = [
+    ([1, 1], '1_week', False, 0),
+    ([1, 3, 3], '30_days', True, 1),
+    ([2, 4, 5], '1_week', True, 3),
+]
+
+
+def test_exact_distribution_is_normalized():
+    exact = MonteCarloSimulation([1, 1, 1, 5, 5], True, 1).exact_distribution('30_days')
+    probabilities = np.array(exact['probabilities'])
+
+    assert probabilities.sum() == pytest.approx(1.0)
+    assert np.all(np.diff(exact['profit_values']) > 0)
+    assert exact['min_profit'] <= exact['profit_values'][0]
+    assert exact['profit_values'][-1] <= exact['max_profit']
+    assert exact['percentile_5'] <= exact['median_profit'] <= exact['percentile_95']
+
+
+@pytest.mark.parametrize('fleet, time_period, use_repair_tool, referral_tier', SCENARIOS)
+def test_exact_moments_match_expected_profit(fleet, time_period, use_repair_tool, referral_tier):
+    simulation = MonteCarloSimulation(fleet, use_repair_tool, referral_tier)
+    exact = simulation.exact_distribution(time_period)
+    values = np.array(exact['profit_values'])
+    probabilities = np.array(exact['probabilities'])
+
+    assert exact['mean_profit'] == pytest.approx(simulation.estimate_expected_profit(time_period)['expected_profit'])
+    assert exact['mean_profit'] == pytest.approx(np.dot(values, probabilities))
+    assert exact['positive_probability'] == pytest.approx(probabilities[values > 0].sum() * 100)
+
+
+@pytest.mark.parametrize('engine', MonteCarloSimulation.ENGINES)
+@pytest.mark.parametrize('fleet, time_period, use_repair_tool, referral_tier', SCENARIOS)
+def test_engines_match_exact_moments(engine, fleet, time_period, use_repair_tool, referral_tier):
+    iterations = 2000 if engine == 'reference' else 20000
+    simulation = MonteCarloSimulation(fleet, use_repair_tool, referral_tier, engine=engine)
+    results = simulation.run_simulation(time_period, iterations=iterations)
+    exact = simulation.exact_distribution(time_period)
+
+    assert abs(results['mean_profit'] - exact['mean_profit']) < 5 * exact['std_profit'] / math.sqrt(iterations)
+    assert results['std_profit'] == pytest.approx(exact['std_profit'], rel=0.15)
+    assert exact['min_profit'] <= results['min_profit'] <= results['max_profit'] <= exact['max_profit']
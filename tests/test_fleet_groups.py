@@ -0,0 +1,22 @@
+import pytest
+
+from monte_carlo import MonteCarloSimulation
+
+
+def test_count_fleet_accepts_lists_and_dicts():
+    assert MonteCarloSimulation.count_fleet([3, 1, 1]) == {1: 2, 3: 1}
+    assert MonteCarloSimulation.count_fleet({1: 2, 3: 1, 4: 0}) == {1: 2, 3: 1}
+
+
+def test_fleet_list_is_expanded_from_groups():
+    simulation = MonteCarloSimulation({2: 2, 1: 1})
+
+    assert sorted(simulation.fleet) == [1, 2, 2]
+    assert simulation.fleet_size == 3
+
+
+def test_large_fleet_runs_per_rarity_group():
+    results = MonteCarloSimulation({1: 500, 5: 500}, engine='binomial').run_simulation('1_year', iterations=200)
+
+    assert results['fleet_size'] == 1000
+    assert {rarity: breakdown['count'] for rarity, breakdown in results['rarity_breakdown'].items()} == {1: 500, 5: 500}
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from fleet_optimizer import FleetOptimizer
+from monte_carlo import MonteCarloSimulation
+
+PRICES = {1: 100, 3: 400, 5: 900}
+
+
+def test_candidate_purchases_fit_the_budget():
+    optimizer = FleetOptimizer(PRICES, '30_days')
+    purchases = optimizer.candidate_purchases(1000, max_trucks=4)
+    cost = purchases @ np.array(list(PRICES.values()))
+
+    assert (cost <= 1000).all()
+    assert (purchases.sum(axis=1) <= 4).all()
+    assert len({tuple(row) for row in purchases}) == len(purchases)
+    assert [10, 0, 0] not in purchases.tolist()
+
+
+def test_screen_matches_exact_distribution():
+    optimizer = FleetOptimizer(PRICES, '30_days', fleet=[2])
+    purchases = np.array([[0, 0, 0], [1, 1, 0], [3, 0, 1]])
+    scores = optimizer.screen(purchases, exact_candidates=2)
+
+    assert scores['exact_percentile_5'].sum() == 2
+    for row, exact in zip(purchases, scores['exact_percentile_5']):
+        fleet = {2: 1, **{rarity: int(quantity) for rarity, quantity in zip(PRICES, row) if quantity}}
+        distribution = MonteCarloSimulation(fleet).exact_distribution('30_days')
+        index = purchases.tolist().index(row.tolist())
+        assert scores['expected_profit'][index] == pytest.approx(distribution['mean_profit'])
+        if exact:
+            assert scores['percentile_5'][index] == distribution['percentile_5']
+
+
+def test_optimize_ranks_within_budget():
+    optimizer = FleetOptimizer(PRICES, '30_days', fleet=[1], seed=2)
+    result = optimizer.optimize(2000, objective='percentile_5', top_k=3, iterations=2000)
+
+    assert result['best']['cost'] <= 2000
+    assert result['best']['fleet'][1] >= 1
+    scores = [candidate['score'] for candidate in result['candidates']]
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize('arguments', [
+    ({9: 100}, '30_days', None),
+    ({1: 0}, '30_days', None),
+    ({1: 100}, '2_days', None),
+    ({1: 100}, '30_days', {9: 1}),
+])
+def test_invalid_configuration_is_rejected(arguments):
+    prices, time_period, fleet = arguments
+    with pytest.raises(ValueError):
+        FleetOptimizer(prices, time_period, fleet=fleet)
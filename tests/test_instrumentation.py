@@ -0,0 +1,46 @@
+from instrumentation import Instrumentation
+from monte_carlo import MonteCarloSimulation
+
+
+def test_merge_adds_timers_and_counters():
+    first, second = Instrumentation(), Instrumentation()
+    first.count('chunks', 2)
+    with first.timer('aggregation'):
+        pass
+    second.count('chunks')
+    second.count('trips', 10)
+    with second.timer('aggregation'):
+        pass
+
+    first.merge(second.report())
+    report = first.report()
+    assert report['counters'] == {'chunks': 3, 'trips': 10}
+    assert report['timers']['aggregation']['calls'] == 2
+
+
+def _instrumented_run(workers):
+    events = []
+    instrumentation = Instrumentation(callback=lambda event, report: events.append(event))
+    simulation = MonteCarloSimulation({1: 2, 3: 1}, seed=1)
+    results = simulation.run_simulation('30_days', iterations=3000, workers=workers, instrumentation=instrumentation)
+    return results['instrumentation'], events
+
+
+def test_counters_do_not_depend_on_the_worker_count():
+    serial, events = _instrumented_run(1)
+    parallel, _ = _instrumented_run(2)
+
+    assert serial['counters'] == parallel['counters']
+    assert serial['counters']['iterations'] == 3000
+    assert serial['counters']['chunks'] == 3
+    assert serial['counters']['trips'] == 3000 * 3 * 60
+    assert events == ['chunk'] * 3 + ['complete']
+
+
+def test_profile_and_memory_captures_are_reported():
+    instrumentation = Instrumentation(profile=True, trace_memory=True)
+    results = MonteCarloSimulation([1], seed=1).run_simulation('1_week', iterations=1000,
+                                                               instrumentation=instrumentation)
+
+    assert results['instrumentation']['profile']
+    assert results['instrumentation']['memory']['peak_bytes'] > 0
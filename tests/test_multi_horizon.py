@@ -0,0 +1,20 @@
+import pytest
+
+from monte_carlo import MonteCarloSimulation
+
+
+def test_multi_horizon_matches_single_horizon_runs():
+    simulation = MonteCarloSimulation({1: 2, 4: 1}, True, 1, seed=6)
+    horizons = simulation.run_multi_horizon(iterations=3000)
+
+    assert list(horizons) == list(MonteCarloSimulation.TIME_PERIODS)
+    for time_period, results in horizons.items():
+        exact = simulation.exact_distribution(time_period)
+        assert results['time_period'] == time_period
+        assert results['iterations'] == 3000
+        assert abs(results['mean_profit'] - exact['mean_profit']) < 5 * results['std_profit'] / 3000 ** 0.5
+
+
+def test_invalid_horizon_is_rejected():
+    with pytest.raises(ValueError):
+        MonteCarloSimulation([1]).run_multi_horizon(['2_days'])
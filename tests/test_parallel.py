@@ -0,0 +1,18 @@
+import math
+
+from monte_carlo import MonteCarloSimulation
+
+
+def test_process_pool_runs_every_iteration():
+    simulation = MonteCarloSimulation({1: 2, 4: 1}, True, 2)
+    results = simulation.run_simulation('30_days', iterations=4500, workers=3)
+    exact = simulation.exact_distribution('30_days')
+
+    assert results['iterations'] == 4500
+    assert abs(results['mean_profit'] - exact['mean_profit']) < 5 * exact['std_profit'] / math.sqrt(4500)
+
+
+def test_single_chunk_runs_in_process():
+    results = MonteCarloSimulation([1]).run_simulation('1_week', iterations=500, workers=4)
+
+    assert results['iterations'] == 500
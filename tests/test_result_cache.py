@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from monte_carlo import MonteCarloSimulation
+from result_cache import ResultCache, scenario_fingerprint
+
+
+def _key(fleet=None, time_period='30_days', iterations=1000, **options):
+    """Huella de run_simulation para una flota y opciones del constructor"""
+    simulation = MonteCarloSimulation(fleet or {1: 2, 3: 1}, cache=ResultCache(), **options)
+    return simulation._scenario_key(
+        'simulation', simulation.use_repair_tool, simulation.referral_tier,
+        time_period=time_period, iterations=iterations, precision=None, keep_samples=False
+    )
+
+
+def test_fingerprint_ignores_fleet_order_and_empty_groups():
+    first = scenario_fingerprint(kind='simulation', fleet_counts={3: 1, 1: 2}, seed=1)
+    second = scenario_fingerprint(kind='simulation', fleet_counts={1: 2, 2: 0, 3: 1}, seed=1)
+    assert first == second
+
+
+def test_fingerprint_accepts_numpy_integers():
+    assert scenario_fingerprint(seed=np.int64(5)) == scenario_fingerprint(seed=5)
+
+
+def test_key_is_the_same_for_equivalent_fleets():
+    assert _key([3, 1, 1], seed=1) == _key({1: 2, 3: 1}, seed=1)
+
+
+@pytest.mark.parametrize('changes', [
+    {'seed': 2},
+    {'fleet': {1: 3, 3: 1}},
+    {'time_period': '1_week'},
+    {'iterations': 2000},
+    {'use_repair_tool': True},
+    {'referral_tier': 1},
+    {'engine': 'binomial'},
+])
+def test_key_changes_with_every_scenario_field(changes):
+    assert _key(seed=1) != _key(**dict({'seed': 1}, **changes))
+
+
+def test_no_key_without_cache_or_with_generator_seed():
+    assert MonteCarloSimulation({1: 1}, seed=1)._scenario_key('simulation', False, 0) is None
+    simulation = MonteCarloSimulation({1: 1}, seed=np.random.default_rng(1), cache=ResultCache())
+    assert simulation._scenario_key('simulation', False, 0) is None
+
+
+def test_cached_run_is_reused_across_worker_counts():
+    cache = ResultCache()
+    first = MonteCarloSimulation({1: 2}, seed=3, cache=cache).run_simulation('1_week', iterations=2000)
+    second = MonteCarloSimulation([1, 1], seed=3, cache=cache).run_simulation('1_week', iterations=2000, workers=2)
+    assert second == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_returns_copies():
+    cache = ResultCache()
+    cache.put('key', {'values': [1, 2]})
+    cache.get('key')['values'].append(3)
+    assert cache.get('key') == {'values': [1, 2]}
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert 'a' in cache and 'c' in cache and 'b' not in cache
+
+
+def test_disk_store_survives_a_new_cache(tmp_path):
+    ResultCache(directory=tmp_path).put('key', {'mean_profit': 1.5})
+    assert ResultCache(directory=tmp_path).get('key') == {'mean_profit': 1.5}
+
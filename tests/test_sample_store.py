@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from monte_carlo import MonteCarloSimulation
+from sample_store import SampleStore, SampleStoreWriter, rarity_column
+
+
+def test_store_holds_every_iteration(tmp_path):
+    simulation = MonteCarloSimulation({1: 2, 4: 1}, True, 1, seed=3)
+    results = simulation.run_simulation('30_days', iterations=2500, keep_samples=True, sample_store=tmp_path)
+    store = SampleStore(tmp_path)
+
+    assert len(store) == 2500
+    assert store.metadata['complete']
+    assert store['total_profit'].tolist() == results['all_profits']
+    assert np.array_equal(store[rarity_column(1, 'profit')] + store[rarity_column(4, 'profit')],
+                          store['total_profit'])
+
+
+def test_stats_and_percentiles_match_numpy(tmp_path):
+    MonteCarloSimulation([1, 2], seed=4).run_simulation('1_week', iterations=3000, sample_store=tmp_path)
+    store = SampleStore(tmp_path)
+    profits = np.asarray(store['total_profit'])
+
+    stats = store.stats('total_profit')
+    assert stats['mean'] == pytest.approx(profits.mean())
+    assert stats['std'] == pytest.approx(profits.std())
+    assert store.percentile('total_profit', [5, 50, 95]) == np.percentile(profits, [5, 50, 95]).tolist()
+
+    losses = store.stats('total_profit', where=lambda chunk: chunk['total_profit'] < np.median(profits))
+    assert losses['count'] == np.count_nonzero(profits < np.median(profits))
+
+
+def test_writer_rejects_overflow_and_reader_missing_store(tmp_path):
+    writer = SampleStoreWriter(tmp_path / 'store', {1: 1}, capacity=2)
+    samples = {'total_profit': np.arange(3), 'rarity_stats': {1: {key: np.arange(3) for key in
+                                                                  ('profits', 'trips', 'repairs')}}}
+    with pytest.raises(ValueError):
+        writer.append(samples)
+    writer.close(complete=False)
+
+    assert not SampleStore(tmp_path / 'store').metadata['complete']
+    with pytest.raises(ValueError):
+        SampleStore(tmp_path / 'missing')
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import samplers
+from monte_carlo import MonteCarloSimulation
+from result_cache import ResultCache
+from streaming_stats import BatchMeans
+
+
+@pytest.mark.parametrize('sampler', samplers.SAMPLERS)
+def test_uniforms_shape_and_range(sampler):
+    points = samplers.uniforms(sampler, np.random.default_rng(0), 256, 6)
+
+    assert points.shape == (256, 6)
+    assert ((points >= 0) & (points < 1)).all()
+    assert abs(points.mean() - 0.5) < 0.05
+
+
+def test_latin_hypercube_has_one_point_per_stratum():
+    points = samplers.uniforms('stratified', np.random.default_rng(1), 100, 3)
+
+    for column in points.T:
+        assert sorted(np.floor(column * 100).astype(int)) == list(range(100))
+
+
+@pytest.mark.parametrize('sampler', ['stratified', 'sobol', 'halton'])
+def test_quasi_samplers_match_the_exact_mean(sampler):
+    simulation = MonteCarloSimulation([1, 3, 5], engine='binomial', seed=4, sampler=sampler)
+    exact = simulation.exact_distribution('30_days')
+    results = simulation.run_simulation('30_days', iterations=8000)
+
+    assert results['sampler'] == sampler
+    assert abs(results['mean_profit'] - exact['mean_profit']) < 4 * results['standard_error'] + 1e-9
+
+
+def test_sampler_must_be_available_for_the_engine():
+    with pytest.raises(ValueError):
+        MonteCarloSimulation([1], engine='vectorized', sampler='sobol')
+    with pytest.raises(ValueError):
+        MonteCarloSimulation([1], sampler='unknown')
+
+
+def test_batch_means_merges_pairs_beyond_the_limit():
+    values = np.random.default_rng(2).normal(size=(100, 10))
+    capped = BatchMeans(max_batches=8)
+    for batch in values:
+        capped.update(batch)
+
+    assert 4 <= capped.count <= 8
+    assert sum(capped.sizes) == values.size
+    assert np.dot(capped.sizes, capped.means) / values.size == pytest.approx(values.mean())
+
+    merged = BatchMeans(max_batches=8).merge(capped).merge(capped)
+    assert merged.count <= 8
+    assert sum(merged.sizes) == 2 * values.size
+    assert merged.variance_of_mean > 0
+
+
+def test_cache_key_depends_on_the_sampler():
+    def key(sampler):
+        simulation = MonteCarloSimulation({1: 2}, engine='binomial', seed=1, sampler=sampler, cache=ResultCache())
+        return simulation._scenario_key('simulation', False, 0, time_period='30_days', iterations=1000)
+
+    assert key('pseudo') != key('sobol')
@@ -0,0 +1,46 @@
+import pytest
+
+from result_cache import ResultCache
+from scenario_sweep import run_sweep
+
+
+def test_sweep_has_one_row_per_cell():
+    table = run_sweep([[1, 2], {3: 1}], referral_tiers=(0, 3), periods=['1_week', '30_days'],
+                      iterations=1000, seed=1)
+
+    assert len(table) == 2 * 2 * 2 * 2
+    assert set(table['fleet']) == {"1×R1, 1×R2", "1×R3"}
+    assert not table['cached'].any()
+
+
+def test_repeated_fleets_are_simulated_once():
+    table = run_sweep([[1, 2], [2, 1], {1: 1, 2: 1}], referral_tiers=(0,), repair_tools=(False,),
+                      periods=['1_week'], iterations=1000, seed=1)
+
+    assert len(table) == 1
+
+
+def test_seeded_sweep_matches_a_repeated_sweep_from_the_cache():
+    cache = ResultCache()
+    arguments = dict(referral_tiers=(0, 1), periods=['30_days'], iterations=1000, seed=4, cache=cache)
+    first = run_sweep([[1, 4]], **arguments)
+    second = run_sweep([[1, 4]], **arguments)
+
+    assert second['cached'].all()
+    assert second['mean_profit'].tolist() == first['mean_profit'].tolist()
+
+
+def test_unseeded_sweep_only_simulates_missing_cells():
+    cache = ResultCache()
+    run_sweep([[1]], referral_tiers=(0,), repair_tools=(False,), periods=['1_week'], iterations=1000, cache=cache)
+    table = run_sweep([[1]], referral_tiers=(0, 1), repair_tools=(False,), periods=['1_week'],
+                      iterations=1000, cache=cache)
+
+    assert table.set_index('referral_tier')['cached'].to_dict() == {0: True, 1: False}
+
+
+def test_invalid_grid_is_rejected():
+    with pytest.raises(ValueError):
+        run_sweep([[1]], periods=['2_days'])
+    with pytest.raises(ValueError):
+        run_sweep([[]])
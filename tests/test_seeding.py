@@ -0,0 +1,49 @@
+import pytest
+
+from monte_carlo import MonteCarloSimulation
+from truck_simulator import TruckSimulator
+
+# Estadísticas que identifican una ejecución (todas dependen de cada muestra)
+FIELDS = ('mean_profit', 'std_profit', 'min_profit', 'max_profit', 'median_profit', 'percentile_25',
+          'percentile_75', 'positive_probability')
+
+
+def _summary(results):
+    return [results[field] for field in FIELDS]
+
+
+@pytest.mark.parametrize('engine', MonteCarloSimulation.ENGINES)
+def test_same_seed_gives_same_results(engine):
+    def run():
+        simulation = MonteCarloSimulation({1: 2, 2: 1}, True, 1, engine=engine, seed=123)
+        return simulation.run_simulation('1_week', iterations=1500)
+
+    first, second = run(), run()
+    assert _summary(first) == _summary(second)
+    assert first['seed'] == 123
+
+
+def test_different_seeds_give_different_samples():
+    runs = [MonteCarloSimulation({1: 2}, seed=seed).run_simulation('1_week', iterations=1000) for seed in (1, 2)]
+    assert _summary(runs[0]) != _summary(runs[1])
+
+
+def test_unseeded_run_reports_a_reproducible_seed():
+    first = MonteCarloSimulation({1: 2}).run_simulation('1_week', iterations=1000)
+    second = MonteCarloSimulation({1: 2}, seed=first['seed']).run_simulation('1_week', iterations=1000)
+    assert _summary(first) == _summary(second)
+
+
+@pytest.mark.parametrize('engine', ['vectorized', 'binomial'])
+def test_worker_count_does_not_change_results(engine):
+    def run(workers):
+        simulation = MonteCarloSimulation({1: 2, 4: 1}, True, 2, engine=engine, seed=99)
+        return simulation.run_simulation('30_days', iterations=4000, workers=workers)
+
+    assert _summary(run(1)) == _summary(run(3))
+
+
+def test_seeded_trucks_are_reproducible():
+    first, second = TruckSimulator(2, seed=7), TruckSimulator(2, seed=7)
+
+    assert first.simulate_period(720) == second.simulate_period(720)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import vectorized_engine
+from monte_carlo import MonteCarloSimulation, SimulationCancelled
+from simulation_runner import SimulationRunner
+
+
+def test_runner_completes_with_progress():
+    simulation = MonteCarloSimulation([1, 2], seed=3)
+    runner = SimulationRunner(simulation, 'run_simulation', '30_days', iterations=3000)
+
+    assert runner.wait(30)
+    assert runner.status == SimulationRunner.COMPLETED
+    assert runner.result()['iterations'] == 3000
+    assert runner.progress['completed'] == 3000
+
+
+def test_runner_cancel_discards_result():
+    simulation = MonteCarloSimulation({1: 50}, seed=3)
+    runner = SimulationRunner(simulation, 'run_simulation', '1_year', iterations=10 ** 7)
+    runner.cancel()
+
+    assert not runner.running
+    assert runner.wait(30)
+    assert runner.status == SimulationRunner.CANCELLED
+    with pytest.raises(SimulationCancelled):
+        runner.result()
+
+
+def test_vectorized_engine_checks_cancellation_every_block():
+    calls = []
+
+    def check():
+        calls.append(1)
+        if len(calls) == 2:
+            raise SimulationCancelled("Simulación cancelada")
+
+    # Cada bloque de 2**22 sorteos cubre pocas iteraciones con 200 camiones × 730 viajes
+    with pytest.raises(SimulationCancelled):
+        vectorized_engine.simulate_paths(
+            np.random.default_rng(0), {1: 200}, [730], 1000, [(False, 0)], check=check
+        )
+    assert len(calls) == 2
+
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from simulation_service import SimulationService, _post, parse_request
+
+
+def test_parse_request_applies_defaults_and_aliases():
+    request = parse_request({'fleet': {'2': 1}, 'period': '1_week'})
+
+    assert request['time_period'] == '1_week'
+    assert request['engine'] == 'vectorized'
+    assert request['iterations'] == 10000
+
+
+@pytest.mark.parametrize('payload', [
+    {},
+    {'fleet': {}},
+    {'fleet': {'9': 1}},
+    {'fleet': [1], 'time_period': '2_days'},
+    {'fleet': [1], 'iterations': 0},
+])
+def test_parse_request_rejects_invalid_payloads(payload):
+    with pytest.raises(ValueError):
+        parse_request(payload)
+
+
+def _run(scenario):
+    """Arrancar el servicio en un puerto libre, ejecutar el escenario y detenerlo"""
+    async def main():
+        service = SimulationService(workers=1)
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(service, port)
+        finally:
+            await service.close()
+    return asyncio.run(main())
+
+
+def test_service_status_codes_and_coalescing():
+    async def scenario(service, port):
+        request = {'fleet': {'1': 2}, 'seed': 3, 'iterations': 2000}
+        invalid = await _post('127.0.0.1', port, '/expected', {'fleet': {'9': 1}})
+        streamed_invalid = await _post('127.0.0.1', port, '/simulate', {'fleet': {'9': 1}, 'stream': True})
+        first, second, streamed = await asyncio.gather(
+            _post('127.0.0.1', port, '/simulate', request),
+            _post('127.0.0.1', port, '/simulate', request),
+            _post('127.0.0.1', port, '/simulate', dict(request, stream=True)),
+        )
+        cached = await _post('127.0.0.1', port, '/simulate', request)
+        return invalid, streamed_invalid, first, second, streamed, cached, dict(service.stats)
+
+    invalid, streamed_invalid, first, second, streamed, cached, stats = _run(scenario)
+
+    assert invalid[0] == 400 and streamed_invalid[0] == 400
+    assert first[0] == second[0] == cached[0] == 200
+    assert json.loads(first[1])['mean_profit'] == json.loads(second[1])['mean_profit']
+    assert json.loads(cached[1])['cached']
+    assert b'"event": "result"' in streamed[1]
+    assert stats['simulations'] == 1
+    assert stats['coalesced'] == 2
+
+
+def test_service_recreates_broken_pool():
+    async def scenario(service, port):
+        # Un proceso que termina de golpe rompe el pool
+        with pytest.raises(Exception):
+            await asyncio.wrap_future(service.executor.submit(os._exit, 1))
+        request = {'fleet': [1], 'seed': 1, 'iterations': 1000}
+        broken = await _post('127.0.0.1', port, '/simulate', request)
+        recovered = await _post('127.0.0.1', port, '/simulate', request)
+        return broken, recovered, dict(service.stats)
+
+    broken, recovered, stats = _run(scenario)
+
+    assert broken[0] == 500
+    assert recovered[0] == 200
+    assert stats['pool_restarts'] == 1
+
+
+def test_service_passes_sampler_through():
+    async def scenario(service, port):
+        request = {'fleet': [1, 2], 'seed': 5, 'iterations': 2000, 'engine': 'binomial'}
+        pseudo = await _post('127.0.0.1', port, '/simulate', request)
+        sobol = await _post('127.0.0.1', port, '/simulate', dict(request, sampler='sobol'))
+        unavailable = await _post('127.0.0.1', port, '/simulate', {'fleet': [1], 'sampler': 'sobol'})
+        return pseudo, sobol, unavailable, dict(service.stats)
+
+    pseudo, sobol, unavailable, stats = _run(scenario)
+
+    assert json.loads(pseudo[1])['sampler'] == 'pseudo'
+    assert json.loads(sobol[1])['sampler'] == 'sobol'
+    assert not json.loads(sobol[1])['cached']
+    assert unavailable[0] == 400
+    assert stats['simulations'] == 2
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from streaming_stats import ProfitHistogram, RunningStats, SimulationAggregate
+
+
+def test_running_stats_merge_matches_numpy():
+    values = np.random.default_rng(0).normal(5, 3, size=1000)
+    stats = RunningStats()
+    for chunk in np.array_split(values, 7):
+        part = RunningStats()
+        part.update(chunk)
+        stats.merge(part)
+
+    assert stats.count == 1000
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.variance == pytest.approx(values.var())
+    assert stats.sample_variance == pytest.approx(values.var(ddof=1))
+    assert (stats.min, stats.max) == (values.min(), values.max())
+    assert stats.positives == np.count_nonzero(values > 0)
+
+
+def test_integer_histogram_quantiles_are_exact():
+    values = np.random.default_rng(1).integers(-50, 200, size=5001)
+    histogram = ProfitHistogram(-50, 200)
+    histogram.update(values[:2000])
+    other = ProfitHistogram(-50, 200)
+    other.update(values[2000:])
+    histogram.merge(other)
+
+    for q in (0.05, 0.25, 0.5, 0.75, 0.95):
+        assert histogram.quantile(q, values.min(), values.max()) == np.percentile(values, q * 100)
+
+
+def test_values_outside_the_range_are_counted():
+    histogram = ProfitHistogram(0, 10)
+    histogram.update(np.array([-5, 3, 20]))
+
+    assert (histogram.underflow, histogram.overflow, histogram.total) == (1, 1, 3)
+    with pytest.raises(ValueError):
+        histogram.merge(ProfitHistogram(0, 20))
+
+
+def test_aggregate_quantiles_match_the_samples():
+    rng = np.random.default_rng(2)
+    aggregate = SimulationAggregate({1: 2}, (-100, 100))
+    chunks = [rng.integers(-100, 100, size=500) for _ in range(4)]
+    for chunk in chunks:
+        aggregate.update({
+            'total_profit': chunk,
+            'rarity_stats': {1: {'profits': chunk, 'trips': np.full(500, 10), 'repairs': np.zeros(500)}}
+        })
+    values = np.concatenate(chunks)
+
+    assert aggregate.count == 2000
+    assert aggregate.quantile(0.5) == np.percentile(values, 50)
+    assert aggregate.rarity[1]['profits'].mean == pytest.approx(values.mean())
+
+
+def test_simulation_results_match_kept_samples():
+    from monte_carlo import MonteCarloSimulation
+
+    results = MonteCarloSimulation([1, 2, 3], True, 1, seed=3).run_simulation(
+        '30_days', iterations=3000, keep_samples=True
+    )
+    profits = np.array(results['all_profits'])
+
+    assert results['mean_profit'] == pytest.approx(profits.mean())
+    assert results['std_profit'] == pytest.approx(profits.std())
+    for field, q in (('percentile_25', 25), ('median_profit', 50), ('percentile_75', 75)):
+        assert results[field] == np.percentile(profits, q)
@@ -0,0 +1,31 @@
+import numpy as np
+
+from monte_carlo import MonteCarloSimulation
+
+
+def _run(**options):
+    simulation = MonteCarloSimulation({1: 2, 3: 1}, True, 1, seed=5, **options)
+    return simulation.run_simulation('30_days', iterations=4000, keep_samples=True)
+
+
+def test_histogram_counts_every_sample():
+    results = _run()
+    histogram = results['histogram']
+    counts, _ = np.histogram(results['all_profits'], bins=histogram['bin_edges'])
+
+    assert len(histogram['counts']) <= MonteCarloSimulation.SUMMARY_HISTOGRAM_BINS
+    assert histogram['counts'] == counts.tolist()
+    assert sum(histogram['counts']) == 4000
+
+
+def test_box_summary_matches_the_samples():
+    results = _run()
+    profits = np.array(results['all_profits'])
+    box = results['box']
+    q1, median, q3 = np.percentile(profits, [25, 50, 75])
+    inside = profits[(profits >= q1 - 1.5 * (q3 - q1)) & (profits <= q3 + 1.5 * (q3 - q1))]
+
+    assert (box['q1'], box['median'], box['q3']) == (q1, median, q3)
+    assert (box['lower_whisker'], box['upper_whisker']) == (inside.min(), inside.max())
+    assert box['outlier_count'] == len(profits) - len(inside)
+    assert len(box['outliers']) <= MonteCarloSimulation.MAX_BOX_OUTLIERS
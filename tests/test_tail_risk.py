@@ -0,0 +1,131 @@
+import math
+import numpy as np
+import pytest
+import profit_distribution
+import tail_risk
+from monte_carlo import MonteCarloSimulation
+
+# (flota, período, herramienta, tier): pérdidas frecuentes, raras y cuantiles con ganancia
+SCENARIOS = [
+    ({1: 2}, '30_days', False, 0),
+    ({1: 1}, '1_week', False, 0),
+    ({1: 5, 2: 3}, '30_days', True, 1),
+]
+
+
+def _exact_tail(exact, level):
+    """VaR y CVaR exactos (pérdidas positivas) de exact_distribution"""
+    profits = np.array(exact['profit_values'], dtype=float)
+    probabilities = np.array(exact['probabilities'])
+    quantile = profit_distribution.quantile(profits, probabilities, level)
+    shortfall = np.dot(np.maximum(quantile - profits, 0), probabilities) / level
+    return -quantile, -quantile + shortfall
+
+
+@pytest.fixture(scope='module', params=SCENARIOS)
+def tail_case(request):
+    fleet, time_period, use_repair_tool, referral_tier = request.param
+    simulation = MonteCarloSimulation(fleet, use_repair_tool, referral_tier, seed=21)
+    return (simulation.run_tail_risk(time_period, iterations=20000),
+            simulation.exact_distribution(time_period))
+
+
+def test_loss_probability_matches_exact(tail_case):
+    results, exact = tail_case
+    profits = np.array(exact['profit_values'])
+    exact_loss = float(np.array(exact['probabilities'])[profits < 0].sum() * 100)
+    loss = results['loss_probability']
+
+    assert abs(loss['estimate'] - exact_loss) <= 4 * loss['standard_error']
+    assert loss['ci_low'] <= loss['estimate'] <= loss['ci_high']
+
+
+@pytest.mark.parametrize('level', tail_risk.DEFAULT_LEVELS)
+def test_value_at_risk_matches_exact(tail_case, level):
+    results, exact = tail_case
+    value_at_risk, _ = _exact_tail(exact, level)
+    estimate = results['value_at_risk'][level]
+
+    assert estimate['ci_low'] <= value_at_risk <= estimate['ci_high']
+    # Con ganancias discretas el intervalo llega a los puntos contiguos del soporte
+    assert estimate['ci_low'] < estimate['estimate'] < estimate['ci_high']
+    assert estimate['standard_error'] > 0
+
+
+@pytest.mark.parametrize('level', tail_risk.DEFAULT_LEVELS)
+def test_expected_shortfall_matches_exact(tail_case, level):
+    results, exact = tail_case
+    _, expected_shortfall = _exact_tail(exact, level)
+    estimate = results['expected_shortfall'][level]
+
+    assert abs(estimate['estimate'] - expected_shortfall) <= 4 * estimate['standard_error']
+
+
+def test_rare_tail_beats_naive_sampling(tail_case):
+    results, _ = tail_case
+    level = min(results['levels'])
+    assert results['value_at_risk'][level]['variance_reduction'] > 3
+    assert results['expected_shortfall'][level]['variance_reduction'] > 10
+
+
+def test_rare_loss_is_resolved():
+    simulation = MonteCarloSimulation({1: 5, 2: 3}, True, 1, seed=2)
+    loss = simulation.run_tail_risk('1_year', iterations=5000)['loss_probability']
+
+    # Muestreo directo: ni una pérdida esperada en 1e100 iteraciones
+    assert 0 < loss['estimate'] < 1e-90
+    assert loss['ci_low'] < loss['estimate'] < loss['ci_high']
+    assert math.isnan(loss['variance_reduction'])
+
+
+def test_seed_gives_same_estimates():
+    def run():
+        return MonteCarloSimulation({1: 2, 3: 1}, seed=6).run_tail_risk('30_days', iterations=3000)
+
+    assert run() == run()
+
+
+def test_unresolved_mean_reports_nan_variance_reduction():
+    zeros = tail_risk.weighted_mean(np.zeros(100), np.ones(100), 100)
+    assert zeros['estimate'] == 0
+    assert math.isnan(zeros['variance_reduction'])
+
+    underflow = tail_risk.weighted_mean(np.ones(100), np.full(100, 1e-200), 100)
+    assert underflow['estimate'] > 0
+    assert math.isnan(underflow['variance_reduction'])
+
+
+def test_weighted_mean_without_tilt_is_the_sample_mean():
+    values = np.random.default_rng(0).random(500)
+    estimate = tail_risk.weighted_mean(values, np.ones(500), 500)
+
+    assert estimate['estimate'] == pytest.approx(values.mean())
+    assert estimate['standard_error'] == pytest.approx(values.std(ddof=1) / math.sqrt(500))
+
+
+def test_tilt_reaches_target_cost():
+    _, trials, probabilities, costs = tail_risk.repair_groups({1: 2, 4: 1}, 60)
+    mean_cost = float(np.dot(trials * costs, probabilities))
+    theta = tail_risk.solve_tilt(trials, probabilities, costs, 1.5 * mean_cost)
+    tilted = tail_risk.tilted_probabilities(probabilities, costs, theta)
+
+    assert theta > 0
+    assert np.dot(trials * costs, tilted) == pytest.approx(1.5 * mean_cost)
+    assert tail_risk.solve_tilt(trials, probabilities, costs, 0.5 * mean_cost) == 0
+
+
+def test_likelihood_ratios_average_to_one():
+    fixed_profit, trials, probabilities, costs = tail_risk.repair_groups({2: 3}, 60)
+    theta = tail_risk.solve_tilt(trials, probabilities, costs, 1.1 * float(np.dot(trials * costs, probabilities)))
+    _, weights = tail_risk.sample_tilted(
+        np.random.default_rng(1), fixed_profit, trials, probabilities, costs, theta, 50000
+    )
+    assert abs(weights.mean() - 1) <= 4 * weights.std(ddof=1) / math.sqrt(len(weights))
+
+
+def test_invalid_levels_are_rejected():
+    simulation = MonteCarloSimulation({1: 1}, seed=1)
+    with pytest.raises(ValueError):
+        simulation.run_tail_risk('1_week', levels=(0.0,))
+    with pytest.raises(ValueError):
+        simulation.run_tail_risk('1_week', iterations=3)
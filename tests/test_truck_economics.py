@@ -0,0 +1,99 @@
+import copy
+import json
+import pytest
+import truck_config
+import truck_economics
+from monte_carlo import MonteCarloSimulation
+from result_cache import ResultCache
+from truck_simulator import TruckSimulator
+from vectorized_engine import profit_moments
+
+
+def _default_raw():
+    """Configuración incluida tal como está en el JSON"""
+    with open(truck_config.DEFAULT_CONFIG_PATH, encoding='utf-8') as stream:
+        return json.load(stream)
+
+
+def test_table_matches_config():
+    economics = truck_economics.ECONOMICS
+    for rarity, values in economics.config['rarities'].items():
+        assert economics.table['repair_cost'][rarity] == values['repair_cost']
+        assert economics.breakdown_probability(rarity) == values['breakdown_probability']
+        for trips in (14, 60, 730, 7):
+            expected = (trips // values['fuel_frequency']) * values['fuel_cost'] + \
+                (trips // values['tire_frequency']) * values['tire_cost']
+            assert economics.fuel_tire_costs(rarity, trips) == expected
+
+
+def test_reductions_never_go_below_zero():
+    economics = truck_economics.ECONOMICS
+    for rarity in economics.rarities:
+        for tier in economics.referral_reductions:
+            assert 0 <= economics.breakdown_probability(rarity, tier, tool_active=True) <= \
+                economics.breakdown_probability(rarity, tier)
+
+
+def test_truck_simulator_aliases_follow_active_config(monkeypatch):
+    assert TruckSimulator.TRUCK_CONFIG[1]['repair_cost'] == truck_economics.ECONOMICS.table['repair_cost'][1]
+    assert 'name' not in TruckSimulator.TRUCK_CONFIG[1]
+    with pytest.raises(TypeError):
+        TruckSimulator.TRUCK_CONFIG[1]['repair_cost'] = 0
+
+    config = copy.deepcopy(truck_economics.ECONOMICS.config)
+    config['repair_tool']['trips'] = 5
+    monkeypatch.setattr(truck_economics, 'ECONOMICS', truck_economics.TruckEconomics(config))
+    assert TruckSimulator.REPAIR_TOOL_TRIPS == 5
+
+
+def test_activate_loads_a_patched_config(tmp_path, monkeypatch):
+    monkeypatch.delenv(truck_config.CONFIG_ENV, raising=False)
+    monkeypatch.setattr(truck_economics, 'ECONOMICS', truck_economics.ECONOMICS)
+    raw = _default_raw()
+    raw['rarities']['1']['earnings_per_trip'] = 40
+    path = tmp_path / 'patch.json'
+    path.write_text(json.dumps(raw), encoding='utf-8')
+
+    economics = truck_economics.activate(path)
+    assert truck_economics.ECONOMICS is economics
+    assert economics.fixed_profit(1, 2) == 80 - 2
+    assert TruckSimulator(1, seed=1).simulate_period(24)['total_earnings'] == 80
+
+
+@pytest.mark.parametrize('change', [
+    lambda raw: raw['rarities']['1'].pop('repair_cost'),
+    lambda raw: raw['rarities']['1'].update(breakdown_probability=1.5),
+    lambda raw: raw['rarities']['1'].update(fuel_frequency=0),
+    lambda raw: raw['referral_reductions'].pop('0'),
+    lambda raw: raw.pop('repair_tool'),
+])
+def test_invalid_configs_are_rejected(change):
+    raw = _default_raw()
+    change(raw)
+    with pytest.raises(ValueError):
+        truck_config.parse_config(raw)
+
+
+@pytest.mark.parametrize('rarity', [0, -1, 9])
+def test_invalid_rarities_are_rejected(rarity):
+    simulation = MonteCarloSimulation({rarity: 1})
+    with pytest.raises(ValueError):
+        simulation.estimate_expected_profit('1_week')
+    with pytest.raises(ValueError):
+        simulation.exact_distribution('1_week')
+    with pytest.raises(ValueError):
+        profit_moments({rarity: 1}, 14)
+    with pytest.raises(ValueError):
+        TruckSimulator(rarity)
+
+
+def test_cache_key_changes_with_truck_economics(monkeypatch):
+    def key():
+        simulation = MonteCarloSimulation({1: 2}, seed=1, cache=ResultCache())
+        return simulation._scenario_key('simulation', False, 0, time_period='30_days', iterations=1000)
+
+    original = key()
+    config = copy.deepcopy(truck_economics.ECONOMICS.config)
+    config['rarities'][1]['repair_cost'] += 1
+    monkeypatch.setattr(truck_economics, 'ECONOMICS', truck_economics.TruckEconomics(config))
+    assert key() != original
@@ -0,0 +1,30 @@
+from truck_simulator import TruckSimulator
+
+
+def test_simulate_period_returns_only_the_summary():
+    truck = TruckSimulator(3, use_repair_tool=True, referral_tier=1)
+    summary = truck.simulate_period(720)
+
+    assert 'trip_details' not in summary
+    assert summary['total_trips'] == 60
+    assert summary['net_profit'] == summary['total_earnings'] - summary['total_costs']
+    assert summary['total_earnings'] == 60 * truck.config['earnings_per_trip']
+
+
+def test_iter_trips_matches_the_period_totals():
+    truck = TruckSimulator(2)
+    trips = list(truck.iter_trips(240))
+
+    assert len(trips) == 20
+    assert sum(trip['earnings'] for trip in trips) == truck.total_earnings
+    assert sum(trip['costs'] for trip in trips) == truck.total_costs
+    assert sum(trip['breakdown'] for trip in trips) == truck.repairs_count
+
+
+def test_reset_restores_the_initial_state():
+    truck = TruckSimulator(1, use_repair_tool=True)
+    initial = truck.get_stats()
+    truck.simulate_period(720)
+    truck.reset()
+
+    assert truck.get_stats() == initial
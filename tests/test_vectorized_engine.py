@@ -0,0 +1,41 @@
+import math
+
+import pytest
+
+from monte_carlo import MonteCarloSimulation
+
+# (flota, período, herramienta, tier) con rarezas, ventanas de herramienta y tiers distintos
+SCENARIOS = [
+    ([1, 1], '1_week', False, 0),
+    ([1, 3, 3], '30_days', True, 1),
+    ([2, 4, 5], '1_week', True, 3),
+]
+
+
+@pytest.mark.parametrize('fleet, time_period, use_repair_tool, referral_tier', SCENARIOS)
+def test_vectorized_mean_matches_expected_profit(fleet, time_period, use_repair_tool, referral_tier):
+    iterations = 20000
+    simulation = MonteCarloSimulation(fleet, use_repair_tool, referral_tier, engine='vectorized')
+    results = simulation.run_simulation(time_period, iterations=iterations)
+    expected = simulation.estimate_expected_profit(time_period)['expected_profit']
+
+    assert abs(results['mean_profit'] - expected) < 5 * results['std_profit'] / math.sqrt(iterations)
+    assert results['min_profit'] <= results['percentile_25'] <= results['median_profit']
+    assert results['median_profit'] <= results['percentile_75'] <= results['max_profit']
+
+
+def test_vectorized_breakdown_matches_reference_engine():
+    fleet, time_period = [1, 3, 3], '30_days'
+    vectorized = MonteCarloSimulation(fleet, True, 2, engine='vectorized').run_simulation(time_period, iterations=20000)
+    reference = MonteCarloSimulation(fleet, True, 2, engine='reference').run_simulation(time_period, iterations=2000)
+
+    for rarity in set(fleet):
+        fast, slow = vectorized['rarity_breakdown'][rarity], reference['rarity_breakdown'][rarity]
+        assert fast['avg_trips'] == slow['avg_trips'] == 60
+        assert fast['count'] == slow['count'] == fleet.count(rarity)
+        assert abs(fast['avg_repairs'] - slow['avg_repairs']) < 5 * fast['std_profit'] / math.sqrt(2000)
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        MonteCarloSimulation([1], engine='gpu')
@@ -0,0 +1,112 @@
+"""
+Configuración de la economía de los camiones (rarezas, referidos y herramienta)
+
+Los valores se leen de truck_config.json, o del archivo indicado en la
+variable de entorno MAVIS_TRUCK_CONFIG, para modelar parches de balance del
+juego sin tocar el código:
+
+    MAVIS_TRUCK_CONFIG=parche.json streamlit run app.py
+
+Este módulo solo lee y valida el archivo (sin NumPy, para que la aplicación
+pueda mostrar la tabla de especificaciones sin cargar el motor); la tabla
+compilada que usan los motores está en truck_economics.
+"""
+import json
+import os
+
+# Variable de entorno con la ruta de otra configuración
+CONFIG_ENV = 'MAVIS_TRUCK_CONFIG'
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'truck_config.json')
+
+# Campos enteros de cada rareza (además de name y breakdown_probability)
+INTEGER_FIELDS = ('earnings_per_trip', 'fuel_cost', 'fuel_frequency', 'tire_cost', 'tire_frequency', 'repair_cost')
+
+
+def config_path(path=None):
+    """Ruta de la configuración: la indicada, la de MAVIS_TRUCK_CONFIG o la incluida"""
+    return os.fspath(path or os.environ.get(CONFIG_ENV) or DEFAULT_CONFIG_PATH)
+
+
+def _probability(value, name):
+    """Validar una probabilidad o reducción de probabilidad"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1:
+        raise ValueError(f"{name} debe ser un número entre 0 y 1")
+    return float(value)
+
+
+def _integer(value, name, minimum=0):
+    """Validar un entero no menor que `minimum`"""
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise ValueError(f"{name} debe ser un entero mayor o igual que {minimum}")
+    return value
+
+
+def parse_config(raw):
+    """
+    Validar y normalizar una configuración
+
+    Args:
+        raw (dict): Configuración con 'rarities', 'referral_reductions' y 'repair_tool'
+
+    Returns:
+        dict: Configuración con claves enteras de rareza y tier, ordenadas
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("La configuración debe ser un objeto JSON")
+    for section in ('rarities', 'referral_reductions', 'repair_tool'):
+        if not isinstance(raw.get(section), dict):
+            raise ValueError(f"Falta la sección '{section}' de la configuración")
+
+    rarities = {}
+    for key, values in raw['rarities'].items():
+        rarity = _integer(int(key), f"La rareza {key}", minimum=1)
+        if not isinstance(values, dict):
+            raise ValueError(f"La rareza {key} debe ser un objeto JSON")
+        missing = [field for field in INTEGER_FIELDS + ('breakdown_probability',) if field not in values]
+        if missing:
+            raise ValueError(f"Faltan campos en la rareza {key}: {', '.join(missing)}")
+
+        rarities[rarity] = {'name': str(values.get('name', f"Rarity {rarity}"))}
+        for field in INTEGER_FIELDS:
+            minimum = 1 if field.endswith('_frequency') else 0
+            rarities[rarity][field] = _integer(values[field], f"{field} de la rareza {key}", minimum)
+        rarities[rarity]['breakdown_probability'] = _probability(
+            values['breakdown_probability'], f"breakdown_probability de la rareza {key}"
+        )
+    if not rarities:
+        raise ValueError("La configuración debe incluir al menos una rareza")
+
+    referral_reductions = {
+        _integer(int(tier), f"El tier de referido {tier}"): _probability(reduction, f"La reducción del tier {tier}")
+        for tier, reduction in raw['referral_reductions'].items()
+    }
+    if referral_reductions.get(0) != 0.0:
+        raise ValueError("El tier de referido 0 debe existir y no reducir averías")
+
+    tool = raw['repair_tool']
+    repair_tool = {
+        'reduction': _probability(tool.get('reduction'), "La reducción de la herramienta"),
+        'trips': _integer(tool.get('trips'), "Los viajes de la herramienta"),
+        'cost': _integer(tool.get('cost'), "El costo de la herramienta")
+    }
+
+    return {
+        'rarities': dict(sorted(rarities.items())),
+        'referral_reductions': dict(sorted(referral_reductions.items())),
+        'repair_tool': repair_tool
+    }
+
+
+def read_config(path=None):
+    """
+    Leer y validar una configuración
+
+    Args:
+        path (str): Archivo JSON (por defecto config_path())
+
+    Returns:
+        dict: Configuración normalizada (ver parse_config)
+    """
+    with open(config_path(path), encoding='utf-8') as stream:
+        return parse_config(json.load(stream))
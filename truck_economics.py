@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import numpy as np
+import truck_config
+
+# Viajes por camión de los períodos estándar (1 semana, 30 días y 1 año con viajes
+# de 12 horas), cuyos costos de combustible y gomas se precalculan en la tabla
+PRECOMPUTED_TRIPS = (14, 60, 730)
+
+
+class TruckEconomics:
+    """
+    Constantes por rareza compiladas en una tabla estructurada de NumPy
+
+    La fila de cada rareza es table[rareza] (las filas sin rareza tienen
+    valid=False). Además de los valores de la configuración incluye la
+    probabilidad de avería efectiva por tier de referido y estado de la
+    herramienta, y los costos de combustible y gomas de PRECOMPUTED_TRIPS.
+    """
+
+    def __init__(self, config, precomputed_trips=PRECOMPUTED_TRIPS):
+        """
+        Compilar una configuración
+
+        Args:
+            config (dict): Configuración normalizada por truck_config.parse_config
+            precomputed_trips (tuple): Viajes por camión con costos fijos precalculados
+        """
+        self.config = config
+        self.rarities = tuple(config['rarities'])
+        self.referral_reductions = dict(config['referral_reductions'])
+        self.tool_reduction = config['repair_tool']['reduction']
+        self.tool_trips = config['repair_tool']['trips']
+        self.tool_cost = config['repair_tool']['cost']
+        self.precomputed_trips = tuple(precomputed_trips)
+        self.fingerprint = hashlib.sha256(
+            json.dumps(config, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+        # Columna de cada tier; la última es la de un tier desconocido (sin reducción)
+        self._tier_columns = {tier: index for index, tier in enumerate(self.referral_reductions)}
+        self._precomputed_columns = {trips: index for index, trips in enumerate(self.precomputed_trips)}
+
+        self.table = np.zeros(max(self.rarities) + 1, dtype=np.dtype([
+            ('valid', np.bool_),
+            ('earnings_per_trip', np.int64),
+            ('fuel_cost', np.int64),
+            ('fuel_frequency', np.int64),
+            ('tire_cost', np.int64),
+            ('tire_frequency', np.int64),
+            ('repair_cost', np.int64),
+            ('breakdown_probability', np.float64),
+            # Probabilidad efectiva por (tier de referido, herramienta activa)
+            ('effective_breakdown', np.float64, (len(self._tier_columns) + 1, 2)),
+            # Combustible + gomas de cada período de precomputed_trips
+            ('fuel_tire_costs', np.int64, (len(self.precomputed_trips),))
+        ]))
+        reductions = np.array(list(self.referral_reductions.values()) + [0.0])
+        trips = np.array(self.precomputed_trips, dtype=np.int64)
+        for rarity, values in config['rarities'].items():
+            row = self.table[rarity]
+            row['valid'] = True
+            for field in truck_config.INTEGER_FIELDS + ('breakdown_probability',):
+                row[field] = values[field]
+            probability = np.maximum(0, values['breakdown_probability'] - reductions)
+            row['effective_breakdown'][:, 0] = probability
+            row['effective_breakdown'][:, 1] = np.maximum(0, probability - self.tool_reduction)
+            row['fuel_tire_costs'] = (trips // values['fuel_frequency']) * values['fuel_cost'] + \
+                (trips // values['tire_frequency']) * values['tire_cost']
+        self.table.flags.writeable = False
+
+    def validate(self, rarity):
+        """Verificar que la rareza exista en la configuración"""
+        if rarity not in self.config['rarities']:
+            raise ValueError(
+                f"Rareza {rarity} no válida. Debe estar entre {self.rarities[0]}-{self.rarities[-1]}"
+            )
+
+    def tier_column(self, referral_tier):
+        """Columna de effective_breakdown de un tier (los desconocidos no reducen averías)"""
+        return self._tier_columns.get(referral_tier, -1)
+
+    def breakdown_probability(self, rarity, referral_tier=0, tool_active=False):
+        """
+        Probabilidad de avería efectiva de un viaje
+
+        Args:
+            rarity (int): Rareza del camión
+            referral_tier (int): Tier de referido
+            tool_active (bool): Si la herramienta está activa en el viaje
+
+        Returns:
+            float: Probabilidad tras aplicar las reducciones
+        """
+        return float(self.table['effective_breakdown'][rarity, self.tier_column(referral_tier), int(tool_active)])
+
+    def fuel_tire_costs(self, rarity, trips):
+        """Costo de combustible y gomas de un camión en `trips` viajes"""
+        column = self._precomputed_columns.get(trips)
+        row = self.table[rarity]
+        if column is not None:
+            return int(row['fuel_tire_costs'][column])
+        return int((trips // row['fuel_frequency']) * row['fuel_cost'] +
+                   (trips // row['tire_frequency']) * row['tire_cost'])
+
+    def fixed_profit(self, rarity, trips, use_repair_tool=False):
+        """
+        Ganancia determinista de un camión (sin contar reparaciones)
+
+        Args:
+            rarity (int): Rareza del camión
+            trips (int): Número de viajes del período
+            use_repair_tool (bool): Si se paga la herramienta de reducción de averías
+
+        Returns:
+            int: Ganancias menos combustible, gomas y herramienta
+        """
+        earnings = trips * int(self.table['earnings_per_trip'][rarity])
+        tool_cost = self.tool_cost if use_repair_tool else 0
+        return earnings - self.fuel_tire_costs(rarity, trips) - tool_cost
+
+    def rarity_config(self, rarity):
+        """Valores de la configuración de una rareza (copia)"""
+        return dict(self.config['rarities'][rarity])
+
+
+def load(path=None):
+    """
+    Leer y compilar una configuración
+
+    Args:
+        path (str): Archivo JSON (por defecto el de truck_config.config_path())
+
+    Returns:
+        TruckEconomics: Tabla compilada
+    """
+    return TruckEconomics(truck_config.read_config(path))
+
+
+# Configuración activa (leída una vez al importar)
+ECONOMICS = load()
+
+
+def activate(path):
+    """
+    Activar otra configuración en este proceso y en los que se lancen después
+
+    La ruta se guarda en MAVIS_TRUCK_CONFIG para que los procesos del pool la
+    carguen al importar este módulo.
+
+    Args:
+        path (str): Archivo JSON de la configuración
+
+    Returns:
+        TruckEconomics: Tabla compilada activa
+    """
+    global ECONOMICS
+    path = os.path.abspath(path)
+    ECONOMICS = load(path)
+    os.environ[truck_config.CONFIG_ENV] = path
+    return ECONOMICS
@@ -1,61 +1,56 @@
 import random
+from types import MappingProxyType
 import numpy as np
+import truck_config
+import truck_economics
+
+
+class _EconomicsAlias:
+    """
+    Atributo de clase de solo lectura calculado de la configuración activa
+
+    Mantiene los nombres que TruckSimulator exponía antes de que la economía
+    pasara a truck_economics, siguiendo a truck_economics.activate.
+    """
+
+    def __init__(self, getter):
+        self._getter = getter
+
+    def __get__(self, instance, owner):
+        return self._getter(truck_economics.ECONOMICS)
+
+
+def _truck_config(economics):
+    """Especificaciones por rareza con los campos del antiguo TRUCK_CONFIG"""
+    fields = truck_config.INTEGER_FIELDS + ('breakdown_probability',)
+    return MappingProxyType({
+        rarity: MappingProxyType({field: values[field] for field in fields})
+        for rarity, values in economics.config['rarities'].items()
+    })
+
 
 class TruckSimulator:
     """
     Simulador para un camión individual en Mavis Road
     """
     
-    # Configuración de camiones por rareza
-    TRUCK_CONFIG = {
-        1: {
-            'earnings_per_trip': 4,
-            'fuel_cost': 2,  # cada 2 viajes
-            'fuel_frequency': 2,
-            'tire_cost': 4,  # cada 4 viajes
-            'tire_frequency': 4,
-            'repair_cost': 6,
-            'breakdown_probability': 0.30
-        },
-        2: {
-            'earnings_per_trip': 5,
-            'fuel_cost': 2,  # cada 2 viajes
-            'fuel_frequency': 2,
-            'tire_cost': 4,  # cada 4 viajes
-            'tire_frequency': 4,
-            'repair_cost': 6,
-            'breakdown_probability': 0.26
-        },
-        3: {
-            'earnings_per_trip': 7,
-            'fuel_cost': 2,  # cada 2 viajes
-            'fuel_frequency': 2,
-            'tire_cost': 4,  # cada 4 viajes
-            'tire_frequency': 4,
-            'repair_cost': 6,
-            'breakdown_probability': 0.20
-        },
-        4: {
-            'earnings_per_trip': 9,
-            'fuel_cost': 1,  # cada 2 viajes
-            'fuel_frequency': 2,
-            'tire_cost': 4,  # cada 4 viajes
-            'tire_frequency': 4,
-            'repair_cost': 10,
-            'breakdown_probability': 0.17
-        },
-        5: {
-            'earnings_per_trip': 11,
-            'fuel_cost': 1,  # cada 2 viajes
-            'fuel_frequency': 2,
-            'tire_cost': 4,  # cada 4 viajes
-            'tire_frequency': 4,
-            'repair_cost': 10,
-            'breakdown_probability': 0.14
-        }
-    }
+    # Estado compacto: sin __dict__ por instancia
+    __slots__ = (
+        'rarity', 'config', 'trip_count', 'total_earnings', 'total_costs',
+        'repairs_count', 'use_repair_tool', 'repair_tool_trips_remaining',
+        'repair_tool_cost', 'referral_tier', 'referral_reduction',
+        '_breakdown_prob', '_tool_breakdown_prob', '_random', '_tool_trips',
+        '_earnings', '_fuel_cost', '_fuel_frequency', '_tire_cost', '_tire_frequency', '_repair_cost'
+    )
+    
+    # Alias de solo lectura de la configuración activa (ver truck_economics)
+    TRUCK_CONFIG = _EconomicsAlias(_truck_config)
+    REFERRAL_REDUCTIONS = _EconomicsAlias(lambda economics: MappingProxyType(economics.referral_reductions))
+    REPAIR_TOOL_REDUCTION = _EconomicsAlias(lambda economics: economics.tool_reduction)
+    REPAIR_TOOL_TRIPS = _EconomicsAlias(lambda economics: economics.tool_trips)
+    REPAIR_TOOL_COST = _EconomicsAlias(lambda economics: economics.tool_cost)
     
-    def __init__(self, rarity, use_repair_tool=False, referral_tier=0):
+    def __init__(self, rarity, use_repair_tool=False, referral_tier=0, seed=None):
         """
         Inicializar camión con rareza específica
         
@@ -63,12 +58,31 @@ class TruckSimulator:
             rarity (int): Rareza del camión (1-5)
             use_repair_tool (bool): Si usar la herramienta de reducción de averías
             referral_tier (int): Tier de referido (0: ninguno, 1: -2%, 2: -3%, 3: -5%)
+            seed (int | np.random.Generator): Semilla o generador del que se deriva
+                el flujo aleatorio del camión (None usa el módulo random global)
         """
-        if rarity not in self.TRUCK_CONFIG:
-            raise ValueError(f"Rareza {rarity} no válida. Debe estar entre 1-5")
+        economics = truck_economics.ECONOMICS
+        economics.validate(rarity)
         
         self.rarity = rarity
-        self.config = self.TRUCK_CONFIG[rarity]
+        self.config = economics.rarity_config(rarity)
+        
+        # Constantes de la tabla compilada como enteros de Python (los más rápidos en _run_trip)
+        row = economics.table[rarity]
+        self._earnings = int(row['earnings_per_trip'])
+        self._fuel_cost = int(row['fuel_cost'])
+        self._fuel_frequency = int(row['fuel_frequency'])
+        self._tire_cost = int(row['tire_cost'])
+        self._tire_frequency = int(row['tire_frequency'])
+        self._repair_cost = int(row['repair_cost'])
+        
+        # Flujo aleatorio propio (random.Random es más rápido por llamada que Generator.random)
+        if seed is None:
+            self._random = random.random
+        elif isinstance(seed, np.random.Generator):
+            self._random = random.Random(int(seed.integers(2**63))).random
+        else:
+            self._random = random.Random(seed).random
         self.trip_count = 0
         self.total_earnings = 0
         self.total_costs = 0
@@ -76,79 +90,99 @@ class TruckSimulator:
         
         # Herramienta de reducción de averías
         self.use_repair_tool = use_repair_tool
-        self.repair_tool_trips_remaining = 2 if use_repair_tool else 0
-        self.repair_tool_cost = 1 if use_repair_tool else 0
+        self._tool_trips = economics.tool_trips
+        self.repair_tool_trips_remaining = self._tool_trips if use_repair_tool else 0
+        self.repair_tool_cost = economics.tool_cost if use_repair_tool else 0
         
         # Tier de referido
         self.referral_tier = referral_tier
-        self.referral_reduction = {
-            0: 0.0,
-            1: 0.02,  # 2%
-            2: 0.03,  # 3%
-            3: 0.05   # 5%
-        }.get(referral_tier, 0.0)
+        self.referral_reduction = economics.referral_reductions.get(referral_tier, 0.0)
+        
+        # Probabilidades de avería de la tabla (sin y con herramienta activa)
+        self._breakdown_prob = economics.breakdown_probability(rarity, referral_tier)
+        self._tool_breakdown_prob = economics.breakdown_probability(rarity, referral_tier, tool_active=True)
         
         # Añadir costo de herramienta al inicio
         if use_repair_tool:
             self.total_costs += self.repair_tool_cost
         
-    def simulate_trip(self):
+    @staticmethod
+    def effective_breakdown_probability(rarity, referral_tier=0, tool_active=False):
         """
-        Simular un viaje individual
+        Probabilidad de avería efectiva de un viaje
         
+        Args:
+            rarity (int): Rareza del camión (1-5)
+            referral_tier (int): Tier de referido (0-3)
+            tool_active (bool): Si la herramienta está activa en el viaje
+            
         Returns:
-            dict: Resultados del viaje
+            float: Probabilidad de avería tras aplicar las reducciones
         """
-        trip_result = {
-            'earnings': 0,
-            'costs': 0,
-            'breakdown': False,
-            'fuel_cost': 0,
-            'tire_cost': 0,
-            'repair_cost': 0
-        }
-        
-        # Calcular probabilidad de avería (reducida por tier de referido y herramienta)
-        current_breakdown_prob = self.config['breakdown_probability']
-        
-        # Aplicar reducción por tier de referido
-        current_breakdown_prob = max(0, current_breakdown_prob - self.referral_reduction)
+        return truck_economics.ECONOMICS.breakdown_probability(rarity, referral_tier, tool_active)
+    
+    def _run_trip(self):
+        """
+        Avanzar un viaje actualizando solo los totales del camión
         
-        # Aplicar reducción por herramienta si está activa
+        Returns:
+            bool: Si el camión se averió antes del viaje
+        """
+        # Probabilidad de avería (reducida por tier de referido y herramienta)
         if self.repair_tool_trips_remaining > 0:
-            current_breakdown_prob = max(0, current_breakdown_prob - 0.05)  # Reducir 5%
+            current_breakdown_prob = self._tool_breakdown_prob
             self.repair_tool_trips_remaining -= 1
+        else:
+            current_breakdown_prob = self._breakdown_prob
+        
+        costs = 0
         
         # Verificar si el camión se rompe antes del viaje
-        if random.random() < current_breakdown_prob:
-            trip_result['breakdown'] = True
-            trip_result['repair_cost'] = self.config['repair_cost']
-            trip_result['costs'] += self.config['repair_cost']
+        breakdown = self._random() < current_breakdown_prob
+        if breakdown:
+            costs += self._repair_cost
             self.repairs_count += 1
         
         # El camión puede hacer el viaje después de reparación
         self.trip_count += 1
-        trip_result['earnings'] = self.config['earnings_per_trip']
         
-        # Calcular costos de combustible
-        if self.trip_count % self.config['fuel_frequency'] == 0:
-            trip_result['fuel_cost'] = self.config['fuel_cost']
-            trip_result['costs'] += self.config['fuel_cost']
-        
-        # Calcular costos de gomas
-        if self.trip_count % self.config['tire_frequency'] == 0:
-            trip_result['tire_cost'] = self.config['tire_cost']
-            trip_result['costs'] += self.config['tire_cost']
+        # Costos de combustible y gomas
+        if self.trip_count % self._fuel_frequency == 0:
+            costs += self._fuel_cost
+        if self.trip_count % self._tire_frequency == 0:
+            costs += self._tire_cost
         
         # Actualizar totales
-        self.total_earnings += trip_result['earnings']
-        self.total_costs += trip_result['costs']
+        self.total_earnings += self._earnings
+        self.total_costs += costs
         
-        return trip_result
+        return breakdown
+    
+    def simulate_trip(self):
+        """
+        Simular un viaje individual
+        
+        Returns:
+            dict: Resultados del viaje
+        """
+        breakdown = self._run_trip()
+        
+        fuel_cost = self._fuel_cost if self.trip_count % self._fuel_frequency == 0 else 0
+        tire_cost = self._tire_cost if self.trip_count % self._tire_frequency == 0 else 0
+        repair_cost = self._repair_cost if breakdown else 0
+        
+        return {
+            'earnings': self._earnings,
+            'costs': fuel_cost + tire_cost + repair_cost,
+            'breakdown': breakdown,
+            'fuel_cost': fuel_cost,
+            'tire_cost': tire_cost,
+            'repair_cost': repair_cost
+        }
     
     def simulate_period(self, hours):
         """
-        Simular un período de tiempo específico
+        Simular un período de tiempo específico (solo resumen, sin detalle por viaje)
         
         Args:
             hours (int): Número de horas a simular
@@ -159,19 +193,58 @@ class TruckSimulator:
         # Cada viaje toma 12 horas
         trips_possible = hours // 12
         
-        trip_results = []
+        run_trip = self._run_trip
         for _ in range(trips_possible):
-            trip_results.append(self.simulate_trip())
+            run_trip()
         
         return {
             'total_trips': trips_possible,
             'total_earnings': self.total_earnings,
             'total_costs': self.total_costs,
             'net_profit': self.total_earnings - self.total_costs,
-            'repairs_count': self.repairs_count,
-            'trip_details': trip_results
+            'repairs_count': self.repairs_count
         }
     
+    def simulate_checkpoints(self, hours_list):
+        """
+        Simular hasta el mayor horizonte tomando un resumen en cada horizonte
+        
+        Args:
+            hours_list (list): Horas acumuladas de cada horizonte
+            
+        Returns:
+            list: Resumen del período (formato de simulate_period) por horizonte
+        """
+        trip_counts = [hours // 12 for hours in hours_list]
+        summaries = {}
+        
+        run_trip = self._run_trip
+        for trips in sorted(set(trip_counts)):
+            for _ in range(trips - self.trip_count):
+                run_trip()
+            summaries[trips] = {
+                'total_trips': trips,
+                'total_earnings': self.total_earnings,
+                'total_costs': self.total_costs,
+                'net_profit': self.total_earnings - self.total_costs,
+                'repairs_count': self.repairs_count
+            }
+        
+        return [summaries[trips] for trips in trip_counts]
+    
+    def iter_trips(self, hours):
+        """
+        Generar los resultados de cada viaje de un período bajo demanda
+        
+        Args:
+            hours (int): Número de horas a simular
+            
+        Yields:
+            dict: Resultados del viaje (mismo formato que simulate_trip)
+        """
+        for _ in range(hours // 12):
+            yield self.simulate_trip()
+    
     def reset(self):
         """Resetear el estado del camión"""
         self.trip_count = 0
@@ -180,7 +253,7 @@ class TruckSimulator:
         self.repairs_count = 0
         
         # Resetear herramienta
-        self.repair_tool_trips_remaining = 2 if self.use_repair_tool else 0
+        self.repair_tool_trips_remaining = self._tool_trips if self.use_repair_tool else 0
         if self.use_repair_tool:
             self.total_costs = self.repair_tool_cost
         else:
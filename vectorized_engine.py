@@ -0,0 +1,338 @@
+import numpy as np
+import truck_economics
+import profit_distribution
+import samplers
+
+# Máximo de números aleatorios generados por bloque (controla el uso de memoria)
+MAX_DRAWS_PER_BLOCK = 1 << 22
+
+
+def profit_moments(fleet_counts, trips, use_repair_tool=False, referral_tier=0):
+    """
+    Momentos exactos y rango posible de la ganancia de la flota
+
+    Args:
+        fleet_counts (dict): Cantidad de camiones por rareza
+        trips (int): Viajes por camión en el período
+        use_repair_tool (bool): Si usar herramienta de reducción de averías
+        referral_tier (int): Tier de referido (0-3)
+
+    Returns:
+        dict: Media, varianza, mínimo (todas las averías) y máximo (ninguna avería)
+    """
+    economics = truck_economics.ECONOMICS
+    tool_trips = min(economics.tool_trips, trips) if use_repair_tool else 0
+    tier = economics.tier_column(referral_tier)
+    mean = variance = 0.0
+    minimum = maximum = 0
+
+    for rarity, count in fleet_counts.items():
+        economics.validate(rarity)
+        row = economics.table[rarity]
+        repair_cost = int(row['repair_cost'])
+        base_prob, tool_prob = (float(p) for p in row['effective_breakdown'][tier])
+        fixed = count * economics.fixed_profit(rarity, trips, use_repair_tool)
+
+        expected_repairs = count * (tool_trips * tool_prob + (trips - tool_trips) * base_prob)
+        repairs_variance = count * (tool_trips * tool_prob * (1 - tool_prob) +
+                                    (trips - tool_trips) * base_prob * (1 - base_prob))
+
+        mean += fixed - expected_repairs * repair_cost
+        variance += repairs_variance * repair_cost ** 2
+        maximum += fixed
+        minimum += fixed - count * trips * repair_cost
+
+    return {'mean': mean, 'variance': variance, 'min': minimum, 'max': maximum}
+
+
+def _validate_fleet(fleet_counts):
+    """Verificar que todas las rarezas de la flota existan"""
+    for rarity in fleet_counts:
+        truck_economics.ECONOMICS.validate(rarity)
+
+
+def _summarize(fleet_counts, trips, repairs, use_repair_tool):
+    """
+    Convertir averías por grupo de rareza en ganancias por iteración
+
+    Args:
+        fleet_counts (dict): Cantidad de camiones por rareza
+        trips (int): Viajes por camión en el período
+        repairs (np.ndarray): Averías totales por (iteración, rareza)
+        use_repair_tool (bool): Si se paga la herramienta
+
+    Returns:
+        dict: Ganancia total por iteración y estadísticas por rareza
+    """
+    economics = truck_economics.ECONOMICS
+    iterations = repairs.shape[0]
+    total_profit = np.zeros(iterations, dtype=np.int64)
+    rarity_stats = {}
+
+    for index, (rarity, count) in enumerate(fleet_counts.items()):
+        repair_cost = int(economics.table['repair_cost'][rarity])
+        profits = count * economics.fixed_profit(rarity, trips, use_repair_tool) - repairs[:, index] * repair_cost
+        total_profit += profits
+        rarity_stats[rarity] = {
+            'count': count,
+            'profits': profits,
+            'trips': np.full(iterations, count * trips, dtype=np.int64),
+            'repairs': repairs[:, index]
+        }
+
+    return {
+        'total_profit': total_profit,
+        'rarity_stats': rarity_stats
+    }
+
+
+def _scenario_trip_probabilities(rarity, trips, tool_window, scenarios):
+    """
+    Probabilidad de avería por viaje para cada escenario
+
+    Args:
+        rarity (int): Rareza del camión
+        trips (int): Viajes por camión en el período
+        tool_window (int): Viajes iniciales en los que alguna herramienta puede estar activa
+        scenarios (list): Tuplas (use_repair_tool, referral_tier)
+
+    Returns:
+        np.ndarray: Probabilidades por (escenario, viaje)
+    """
+    economics = truck_economics.ECONOMICS
+    effective = economics.table['effective_breakdown'][rarity]
+    trip_prob = np.empty((len(scenarios), trips))
+    for index, (use_repair_tool, referral_tier) in enumerate(scenarios):
+        base_prob, tool_prob = effective[economics.tier_column(referral_tier)]
+        trip_prob[index] = base_prob
+        if use_repair_tool:
+            trip_prob[index, :tool_window] = tool_prob
+    return trip_prob
+
+
+def simulate_paths(rng, fleet_counts, horizons, iterations, scenarios, antithetic=False, check=None):
+    """
+    Simular varios escenarios y horizontes con los mismos números aleatorios
+
+    Cada uniforme (iteración, camión, viaje) se compara con la probabilidad de
+    avería de cada escenario (números aleatorios comunes), y las averías se
+    acumulan viaje a viaje para tomar una foto en cada horizonte, que son
+    prefijos de la misma secuencia de viajes. La cadencia de combustible y
+    gomas, la reducción por referido y la ventana de herramienta son las de
+    TruckSimulator.
+
+    Args:
+        rng (np.random.Generator): Generador de números aleatorios
+        fleet_counts (dict): Cantidad de camiones por rareza
+        horizons (list): Viajes por camión de cada horizonte
+        iterations (int): Número de iteraciones a simular
+        scenarios (list): Tuplas (use_repair_tool, referral_tier)
+        antithetic (bool): Usar 1 - u en la segunda mitad de cada bloque (variables antitéticas)
+        check (callable): Se llama antes de cada bloque de iteraciones; puede lanzar una
+            excepción para interrumpir la simulación (cancelación)
+
+    Returns:
+        list: Por escenario, lista por horizonte de ganancias e estadísticas por rareza
+    """
+    _validate_fleet(fleet_counts)
+    max_trips = max(horizons)
+    tool_window = min(truck_economics.ECONOMICS.tool_trips, max_trips)
+    snapshot = np.array(horizons) - 1
+    repairs = np.zeros((len(scenarios), len(horizons), iterations, len(fleet_counts)), dtype=np.int64)
+
+    for index, (rarity, count) in enumerate(fleet_counts.items()):
+        if max_trips == 0 or count == 0:
+            continue
+
+        trip_prob = _scenario_trip_probabilities(rarity, max_trips, tool_window, scenarios)
+
+        # Contar averías del grupo en bloques de iteraciones
+        block = max(1, MAX_DRAWS_PER_BLOCK // (count * max_trips))
+        for start in range(0, iterations, block):
+            if check is not None:
+                check()
+            size = min(block, iterations - start)
+            if antithetic:
+                half = rng.random((-(-size // 2), count, max_trips))
+                draws = np.concatenate([half, 1.0 - half])[:size]
+            else:
+                draws = rng.random((size, count, max_trips))
+            for scenario_index in range(len(scenarios)):
+                breakdowns = draws < trip_prob[scenario_index]
+                if len(horizons) == 1:
+                    counts = np.count_nonzero(breakdowns[:, :, :horizons[0]], axis=(1, 2))[None]
+                else:
+                    cumulative = np.cumsum(np.count_nonzero(breakdowns, axis=1), axis=1)
+                    counts = np.where(snapshot[:, None] >= 0, cumulative[:, np.maximum(snapshot, 0)].T, 0)
+                repairs[scenario_index, :, start:start + size, index] = counts
+
+    return [
+        [
+            _summarize(fleet_counts, trips, repairs[scenario_index, horizon_index], use_repair_tool)
+            for horizon_index, trips in enumerate(horizons)
+        ]
+        for scenario_index, (use_repair_tool, _) in enumerate(scenarios)
+    ]
+
+
+def _coupled_binomials(rng, trials, probabilities, iterations):
+    """
+    Muestrear binomiales acopladas con los mismos ensayos para varias probabilidades
+
+    Equivale a comparar los mismos uniformes con cada probabilidad: se muestrea
+    la probabilidad mayor y las menores se obtienen por adelgazamiento
+    Binomial(K, p_menor / p_mayor), que conserva cada marginal exacta.
+
+    Args:
+        rng (np.random.Generator): Generador de números aleatorios
+        trials (int): Ensayos de cada binomial
+        probabilities (np.ndarray): Probabilidad de cada escenario
+        iterations (int): Número de iteraciones
+
+    Returns:
+        np.ndarray: Averías por (escenario, iteración)
+    """
+    counts = np.zeros((len(probabilities), iterations), dtype=np.int64)
+    if trials == 0:
+        return counts
+
+    previous_prob = None
+    previous_count = None
+    for scenario_index in np.argsort(-probabilities, kind='stable'):
+        probability = probabilities[scenario_index]
+        if previous_prob is None:
+            current = rng.binomial(trials, probability, size=iterations)
+        elif probability == previous_prob:
+            current = previous_count
+        elif previous_prob > 0:
+            current = rng.binomial(previous_count, probability / previous_prob)
+        else:
+            current = np.zeros(iterations, dtype=np.int64)
+        counts[scenario_index] = current
+        previous_prob, previous_count = probability, current
+    return counts
+
+
+def simulate_paths_binomial(rng, fleet_counts, horizons, iterations, scenarios, check=None):
+    """
+    Versión binomial de simulate_paths con acoplamiento exacto entre escenarios
+
+    Los viajes se parten en segmentos (ventana de herramienta y tramos entre
+    horizontes); las averías de cada segmento son binomiales independientes y
+    se acumulan para obtener cada horizonte. Como los camiones de una misma
+    rareza son idénticos, el costo no depende ni del número de viajes ni del
+    tamaño de la flota.
+
+    Args:
+        rng (np.random.Generator): Generador de números aleatorios
+        fleet_counts (dict): Cantidad de camiones por rareza
+        horizons (list): Viajes por camión de cada horizonte
+        iterations (int): Número de iteraciones a simular
+        scenarios (list): Tuplas (use_repair_tool, referral_tier)
+        check (callable): Se llama antes de cada bloque de rareza; puede lanzar una
+            excepción para interrumpir la simulación (cancelación)
+
+    Returns:
+        list: Por escenario, lista por horizonte de ganancias e estadísticas por rareza
+    """
+    _validate_fleet(fleet_counts)
+    max_trips = max(horizons)
+    any_tool = any(use_repair_tool for use_repair_tool, _ in scenarios)
+    tool_window = min(truck_economics.ECONOMICS.tool_trips, max_trips) if any_tool else 0
+    boundaries = sorted({0, tool_window, *horizons})
+    repairs = np.zeros((len(scenarios), len(horizons), iterations, len(fleet_counts)), dtype=np.int64)
+
+    for index, (rarity, count) in enumerate(fleet_counts.items()):
+        if check is not None:
+            check()
+        trip_prob = _scenario_trip_probabilities(rarity, max(max_trips, 1), tool_window, scenarios)
+
+        cumulative = {0: np.zeros((len(scenarios), iterations), dtype=np.int64)}
+        for segment_start, segment_end in zip(boundaries[:-1], boundaries[1:]):
+            cumulative[segment_end] = cumulative[segment_start] + _coupled_binomials(
+                rng, count * (segment_end - segment_start), trip_prob[:, segment_start], iterations
+            )
+        for horizon_index, trips in enumerate(horizons):
+            repairs[:, horizon_index, :, index] = cumulative[trips]
+
+    return [
+        [
+            _summarize(fleet_counts, trips, repairs[scenario_index, horizon_index], use_repair_tool)
+            for horizon_index, trips in enumerate(horizons)
+        ]
+        for scenario_index, (use_repair_tool, _) in enumerate(scenarios)
+    ]
+
+
+def _binomial_quantile(trials, probability, u):
+    """
+    Inversa de la función de distribución de una binomial
+
+    Args:
+        trials (int): Ensayos
+        probability (float): Probabilidad de éxito
+        u (np.ndarray): Uniformes en [0, 1]
+
+    Returns:
+        np.ndarray: Menor k con P(X <= k) > u para cada uniforme
+    """
+    start, pmf = profit_distribution.binomial_pmf(trials, probability)
+    index = np.searchsorted(np.cumsum(pmf), u, side='right')
+    return start + np.minimum(index, len(pmf) - 1)
+
+
+def simulate_paths_quasi(rng, fleet_counts, horizons, iterations, scenarios, sampler, check=None):
+    """
+    Versión de simulate_paths_binomial que invierte la distribución de cada binomial
+
+    Las averías de cada (rareza, segmento de viajes) se obtienen de una
+    coordenada uniforme del muestreador, así que la dimensión de cada punto
+    es rarezas × segmentos y no camiones × viajes: pocas dimensiones en las
+    que los puntos de baja discrepancia o estratificados cubren el espacio
+    mucho mejor que los pseudoaleatorios. Todos los escenarios usan la misma
+    uniforme (acoplamiento monótono de números aleatorios comunes).
+
+    Args:
+        rng (np.random.Generator): Generador de la aleatorización del bloque
+        fleet_counts (dict): Cantidad de camiones por rareza
+        horizons (list): Viajes por camión de cada horizonte
+        iterations (int): Número de iteraciones (puntos) del bloque
+        scenarios (list): Tuplas (use_repair_tool, referral_tier)
+        sampler (str): Muestreador de samplers.SAMPLERS
+        check (callable): Se llama antes de cada bloque de rareza; puede lanzar una
+            excepción para interrumpir la simulación (cancelación)
+
+    Returns:
+        list: Por escenario, lista por horizonte de ganancias e estadísticas por rareza
+    """
+    _validate_fleet(fleet_counts)
+    max_trips = max(horizons)
+    any_tool = any(use_repair_tool for use_repair_tool, _ in scenarios)
+    tool_window = min(truck_economics.ECONOMICS.tool_trips, max_trips) if any_tool else 0
+    boundaries = sorted({0, tool_window, *horizons})
+    segments = list(zip(boundaries[:-1], boundaries[1:]))
+    points = samplers.uniforms(sampler, rng, iterations, len(fleet_counts) * len(segments))
+    repairs = np.zeros((len(scenarios), len(horizons), iterations, len(fleet_counts)), dtype=np.int64)
+
+    for index, (rarity, count) in enumerate(fleet_counts.items()):
+        if check is not None:
+            check()
+        trip_prob = _scenario_trip_probabilities(rarity, max(max_trips, 1), tool_window, scenarios)
+
+        cumulative = {0: np.zeros((len(scenarios), iterations), dtype=np.int64)}
+        for segment_index, (segment_start, segment_end) in enumerate(segments):
+            u = points[:, index * len(segments) + segment_index]
+            trials = count * (segment_end - segment_start)
+            cumulative[segment_end] = cumulative[segment_start] + np.array([
+                _binomial_quantile(trials, probability, u) for probability in trip_prob[:, segment_start]
+            ])
+        for horizon_index, trips in enumerate(horizons):
+            repairs[:, horizon_index, :, index] = cumulative[trips]
+
+    return [
+        [
+            _summarize(fleet_counts, trips, repairs[scenario_index, horizon_index], use_repair_tool)
+            for horizon_index, trips in enumerate(horizons)
+        ]
+        for scenario_index, (use_repair_tool, _) in enumerate(scenarios)
+    ]